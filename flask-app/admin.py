@@ -3,11 +3,12 @@ Admin Routes for Blog Management
 Simple admin interface for creating and managing blog posts
 """
 
-from flask import render_template, request, redirect, url_for, flash, session
-from models import db, BlogPost, Comment, ContactInquiry
+from flask import current_app, render_template, request, redirect, url_for, flash, session
+from models import db, BlogPost, Comment, ContactInquiry, slugify, start_background_purge
 from forms import BlogPostForm
 from datetime import datetime
 from functools import wraps
+from sqlalchemy.orm import joinedload
 
 
 def admin_required(f):
@@ -21,12 +22,45 @@ def admin_required(f):
     return decorated_function
 
 
+COMMENT_BULK_ACTIONS = {
+    'approve': ('approved', 'approved'),
+    'reject': ('rejected', 'rejected'),
+    'spam': ('spam', 'marked as spam'),
+}
+
+
+def comment_filter_criteria(status_filter='all', ip_address=None, phrase=None):
+    """
+    Build filter criteria for the admin comment list
+    
+    Args:
+        status_filter: Comment status or 'all'
+        ip_address: Exact IP address to match (optional)
+        phrase: Text the comment content must contain (optional)
+    
+    Returns:
+        List of SQLAlchemy filter expressions
+    """
+    criteria = []
+    if status_filter and status_filter != 'all':
+        criteria.append(Comment.status == status_filter)
+    if ip_address:
+        criteria.append(Comment.ip_address == ip_address)
+    if phrase:
+        # autoescape: '%' and '_' in the phrase are literal, not wildcards
+        criteria.append(Comment.content.contains(phrase, autoescape=True))
+    return criteria
+
+
 def register_admin_routes(app):
     """Register all admin routes"""
     
     @app.route('/admin/login', methods=['GET', 'POST'])
     def admin_login():
         """Admin login page"""
+        if session.get('is_admin'):
+            return redirect(url_for('admin_dashboard'))
+        
         if request.method == 'POST':
             username = request.form.get('username')
             password = request.form.get('password')
@@ -57,7 +91,8 @@ def register_admin_routes(app):
     def admin_dashboard():
         """Admin dashboard"""
         # Get statistics
-        total_posts = BlogPost.query.count()
+        live_posts = BlogPost.query.filter(BlogPost.deleted_at.is_(None))
+        total_posts = live_posts.count()
         published_posts = BlogPost.query.filter_by(status='published').count()
         draft_posts = BlogPost.query.filter_by(status='draft').count()
         pending_posts = BlogPost.query.filter_by(status='pending').count()
@@ -67,7 +102,7 @@ def register_admin_routes(app):
         new_inquiries = ContactInquiry.query.filter_by(status='new').count()
         
         # Get recent posts
-        recent_posts = BlogPost.query.order_by(BlogPost.created_at.desc()).limit(5).all()
+        recent_posts = live_posts.order_by(BlogPost.created_at.desc()).limit(5).all()
         
         # Get pending comments
         pending_comments_list = Comment.query.filter_by(status='pending').order_by(Comment.created_at.desc()).limit(5).all()
@@ -97,7 +132,7 @@ def register_admin_routes(app):
         status_filter = request.args.get('status', 'all')
         per_page = 20
         
-        query = BlogPost.query
+        query = BlogPost.query.filter(BlogPost.deleted_at.is_(None))
         if status_filter != 'all':
             query = query.filter_by(status=status_filter)
         
@@ -108,16 +143,30 @@ def register_admin_routes(app):
         return render_template('admin/posts.html', posts=posts, status_filter=status_filter)
     
     
+    def save_featured_image(form):
+        """Store an uploaded featured image and point the URL field at it; False if it is invalid"""
+        upload = form.featured_image_file.data
+        if not upload or not upload.filename:
+            return True
+        store = current_app.extensions['images']
+        try:
+            image = store.save(upload)
+        except ValueError as e:
+            form.featured_image_file.errors.append(str(e))
+            return False
+        form.featured_image.data = store.url(image)
+        return True
+    
+    
     @app.route('/admin/posts/new', methods=['GET', 'POST'])
     @admin_required
     def admin_new_post():
         """Create new blog post"""
         form = BlogPostForm()
         
-        if form.validate_on_submit():
+        if form.validate_on_submit() and save_featured_image(form):
             # Create slug from English title
-            slug = form.title_en.data.lower().replace(' ', '-')
-            slug = ''.join(c for c in slug if c.isalnum() or c == '-')
+            slug = slugify(form.title_en.data)
             
             # Check if slug already exists
             existing = BlogPost.query.filter_by(slug=slug).first()
@@ -157,7 +206,7 @@ def register_admin_routes(app):
         post = BlogPost.query.get_or_404(post_id)
         form = BlogPostForm(obj=post)
         
-        if form.validate_on_submit():
+        if form.validate_on_submit() and save_featured_image(form):
             post.title_en = form.title_en.data
             post.title_pl = form.title_pl.data
             post.content_en = form.content_en.data
@@ -188,8 +237,16 @@ def register_admin_routes(app):
     def admin_delete_post(post_id):
         """Delete blog post"""
         post = BlogPost.query.get_or_404(post_id)
-        db.session.delete(post)
-        db.session.commit()
+        
+        if app.config.get('SOFT_DELETE_POSTS'):
+            # Tombstone now, remove the row and its comments in chunks later
+            post.soft_delete()
+            if app.config.get('PURGE_IN_BACKGROUND'):
+                start_background_purge(app)
+        else:
+            # Comments are removed by ON DELETE CASCADE in the database
+            db.session.delete(post)
+            db.session.commit()
         
         flash('Blog post deleted successfully!', 'success')
         return redirect(url_for('admin_posts'))
@@ -231,23 +288,133 @@ def register_admin_routes(app):
         return redirect(request.referrer or url_for('admin_posts'))
     
     
+    @app.route('/admin/posts/bulk', methods=['POST'])
+    @admin_required
+    def admin_bulk_posts():
+        """
+        Approve or reject many pending blog posts at once
+        
+        Customer posts are auto-translated with batched API calls and all
+        status changes are committed in one transaction.
+        """
+        action = request.form.get('action')
+        ids = request.form.getlist('post_ids', type=int)
+        batch_size = app.config.get('BULK_MODERATION_BATCH_SIZE', 500)
+        pending_only = [BlogPost.status == 'pending']
+        
+        if action not in ('approve', 'reject'):
+            flash('Unknown bulk action!', 'error')
+            return redirect(request.referrer or url_for('admin_posts'))
+        
+        if not ids:
+            flash('No posts selected!', 'error')
+            return redirect(request.referrer or url_for('admin_posts'))
+        
+        if action == 'reject':
+            count = BlogPost.bulk_set_status(
+                'rejected', ids=ids, criteria=pending_only, batch_size=batch_size
+            )
+            flash(f'{count} blog post(s) rejected!', 'success')
+            return redirect(request.referrer or url_for('admin_posts'))
+        
+        # Auto-translate customer posts; changes are flushed with the status update
+        if app.config.get('ENABLE_AUTO_TRANSLATION'):
+            customer_posts = BlogPost.query.filter(
+                BlogPost.id.in_(ids),
+                BlogPost.is_customer_post.is_(True),
+                *pending_only
+            ).all()
+            if customer_posts:
+                try:
+                    from translation_service import translate_blog_posts
+                    translated = translate_blog_posts(customer_posts)
+                    if translated:
+                        flash(f'{len(translated)} post(s) auto-translated successfully!', 'info')
+                except Exception as e:
+                    db.session.rollback()
+                    flash(f'Auto-translation failed: {str(e)}. Publishing with original language only.', 'warning')
+        
+        count = BlogPost.bulk_set_status(
+            'published',
+            ids=ids,
+            criteria=pending_only,
+            batch_size=batch_size,
+            published_at=datetime.utcnow()
+        )
+        
+        flash(f'{count} blog post(s) approved and published!', 'success')
+        return redirect(request.referrer or url_for('admin_posts'))
+    
+    
     @app.route('/admin/comments')
     @admin_required
     def admin_comments():
         """List all comments"""
         page = request.args.get('page', 1, type=int)
         status_filter = request.args.get('status', 'all')
+        ip_filter = request.args.get('ip', '').strip()
+        search_query = request.args.get('q', '').strip()
         per_page = 20
         
-        query = Comment.query
-        if status_filter != 'all':
-            query = query.filter_by(status=status_filter)
+        # The list links every comment to its post; load them in the same query
+        query = Comment.query.options(joinedload(Comment.post)).filter(
+            *comment_filter_criteria(status_filter, ip_filter, search_query)
+        )
         
         comments = query.order_by(Comment.created_at.desc()).paginate(
             page=page, per_page=per_page, error_out=False
         )
         
-        return render_template('admin/comments.html', comments=comments, status_filter=status_filter)
+        return render_template('admin/comments.html',
+                             comments=comments,
+                             status_filter=status_filter,
+                             ip_filter=ip_filter,
+                             search_query=search_query)
+    
+    
+    @app.route('/admin/comments/bulk', methods=['POST'])
+    @admin_required
+    def admin_bulk_comments():
+        """
+        Moderate many comments at once
+        
+        Applies to the checked comments, or with scope=filter to every
+        comment matching the current status/IP/phrase filter.
+        """
+        action = request.form.get('action')
+        scope = request.form.get('scope', 'selected')
+        batch_size = app.config.get('BULK_MODERATION_BATCH_SIZE', 500)
+        
+        if action not in COMMENT_BULK_ACTIONS and action != 'delete':
+            flash('Unknown bulk action!', 'error')
+            return redirect(request.referrer or url_for('admin_comments'))
+        
+        if scope == 'filter':
+            ids = None
+            criteria = comment_filter_criteria(
+                request.form.get('status', 'all'),
+                request.form.get('ip', '').strip(),
+                request.form.get('q', '').strip()
+            )
+            if not criteria:
+                flash('Refusing to apply a bulk action to all comments without a filter.', 'error')
+                return redirect(request.referrer or url_for('admin_comments'))
+        else:
+            ids = request.form.getlist('comment_ids', type=int)
+            criteria = None
+            if not ids:
+                flash('No comments selected!', 'error')
+                return redirect(request.referrer or url_for('admin_comments'))
+        
+        if action == 'delete':
+            count = Comment.bulk_delete(ids=ids, criteria=criteria, batch_size=batch_size)
+            verb = 'deleted'
+        else:
+            status, verb = COMMENT_BULK_ACTIONS[action]
+            count = Comment.bulk_set_status(status, ids=ids, criteria=criteria, batch_size=batch_size)
+        
+        flash(f'{count} comment(s) {verb}!', 'success')
+        return redirect(request.referrer or url_for('admin_comments'))
     
     
     @app.route('/admin/comments/<int:comment_id>/approve', methods=['POST'])
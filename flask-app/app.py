@@ -4,13 +4,13 @@ Modular structure with separated concerns, enhanced with logging and security
 """
 
 from typing import Optional
-from flask import Flask, session
+from flask import Flask
 from flask_babel import get_locale
-from config import Config
+from config import Config, config
 from models import init_db
 from extensions import init_extensions
 from routes import register_routes
-from logging_config import setup_logging, get_logger
+from logging_config import setup_logging, init_request_logging, get_logger
 from security import add_security_headers
 
 
@@ -20,11 +20,15 @@ def create_app(config_class=Config) -> Flask:
     Creates and configures the Flask application with proper error handling
     
     Args:
-        config_class: Configuration class to use
+        config_class: Configuration class, or its name in config.config
+            ('development', 'production', 'testing', ...)
     
     Returns:
         Configured Flask application instance
     """
+    if isinstance(config_class, str):
+        config_class = config[config_class]
+    
     # Initialize Flask app
     app = Flask(__name__)
     
@@ -36,8 +40,12 @@ def create_app(config_class=Config) -> Flask:
     logger = setup_logging(
         app_name='flask_app',
         log_level=app.config.get('LOG_LEVEL', 'INFO'),
-        log_file=log_file
+        log_file=log_file,
+        json_console=app.config.get('LOG_FORMAT') == 'json',
+        sampling=app.config.get('LOG_SAMPLING'),
+        use_queue=app.config.get('LOG_QUEUE', True)
     )
+    init_request_logging(app)
     logger.info("Initializing Flask application")
     
     # Initialize database
@@ -56,6 +64,78 @@ def create_app(config_class=Config) -> Flask:
         logger.error(f"Extensions initialization failed: {e}")
         raise
     
+    # Instrument SQL queries per request
+    try:
+        from instrumentation import init_query_instrumentation
+        init_query_instrumentation(app)
+        logger.info("SQL instrumentation initialized")
+    except Exception as e:
+        logger.error(f"SQL instrumentation initialization failed: {e}")
+        raise
+    
+    # Record request metrics
+    try:
+        from metrics import init_metrics
+        init_metrics(app)
+        logger.info("Metrics initialized")
+    except Exception as e:
+        logger.error(f"Metrics initialization failed: {e}")
+        raise
+    
+    # Compress responses (right after metrics, so it runs just before them)
+    try:
+        from compression import init_compression
+        init_compression(app)
+        logger.info("Compression initialized")
+    except Exception as e:
+        logger.error(f"Compression initialization failed: {e}")
+        raise
+    
+    # Route public pages by language prefix (before the routes use it)
+    try:
+        from i18n import init_language_urls
+        init_language_urls(app)
+        logger.info("Language URLs initialized")
+    except Exception as e:
+        logger.error(f"Language URLs initialization failed: {e}")
+        raise
+    
+    # Cache localized blog post cards
+    try:
+        from cards import init_post_cards
+        init_post_cards(app)
+        logger.info("Post cards initialized")
+    except Exception as e:
+        logger.error(f"Post cards initialization failed: {e}")
+        raise
+    
+    # Serve fingerprinted static assets (static_url() in templates)
+    try:
+        from assets import init_assets
+        init_assets(app)
+        logger.info("Static assets initialized")
+    except Exception as e:
+        logger.error(f"Static assets initialization failed: {e}")
+        raise
+    
+    # Serve uploaded images and make their resized copies
+    try:
+        from images import init_images
+        init_images(app)
+        logger.info("Uploaded images initialized")
+    except Exception as e:
+        logger.error(f"Uploaded images initialization failed: {e}")
+        raise
+    
+    # Render post content to sanitized HTML when posts are saved
+    try:
+        from content import init_content
+        init_content(app)
+        logger.info("Content rendering initialized")
+    except Exception as e:
+        logger.error(f"Content rendering initialization failed: {e}")
+        raise
+    
     # Register routes
     try:
         register_routes(app)
@@ -64,6 +144,15 @@ def create_app(config_class=Config) -> Flask:
         logger.error(f"Public routes registration failed: {e}")
         raise
     
+    # Register sitemap and feed routes
+    try:
+        from feeds import register_feed_routes
+        register_feed_routes(app)
+        logger.info("Feed routes registered")
+    except Exception as e:
+        logger.error(f"Feed routes registration failed: {e}")
+        raise
+    
     # Register admin routes
     try:
         from admin import register_admin_routes
@@ -82,25 +171,65 @@ def create_app(config_class=Config) -> Flask:
         logger.error(f"Customer blog routes registration failed: {e}")
         raise
     
+    # Register admin export routes
+    try:
+        from exports import register_export_routes
+        register_export_routes(app)
+        logger.info("Export routes registered")
+    except Exception as e:
+        logger.error(f"Export routes registration failed: {e}")
+        raise
+    
+    # Register admin bulk import routes
+    try:
+        from imports import register_import_routes
+        register_import_routes(app)
+        logger.info("Import routes registered")
+    except Exception as e:
+        logger.error(f"Import routes registration failed: {e}")
+        raise
+    
+    # Register request profiler
+    try:
+        from profiler import init_profiler, register_profiler_routes
+        init_profiler(app)
+        register_profiler_routes(app)
+        logger.info("Profiler registered")
+    except Exception as e:
+        logger.error(f"Profiler registration failed: {e}")
+        raise
+    
+    # Register memory tracking
+    try:
+        from memory import init_memory_tracking, register_memory_routes
+        init_memory_tracking(app)
+        register_memory_routes(app)
+        logger.info("Memory tracking registered")
+    except Exception as e:
+        logger.error(f"Memory tracking registration failed: {e}")
+        raise
+    
+    # Register CLI commands
+    try:
+        from commands import register_commands
+        register_commands(app)
+        logger.info("CLI commands registered")
+    except Exception as e:
+        logger.error(f"CLI commands registration failed: {e}")
+        raise
+    
     # Context processor for templates
     @app.context_processor
     def inject_language():
         """Make current language available in all templates"""
         return dict(
-            current_language=session.get('language', 'en'),
+            current_language=str(get_locale()),
             get_locale=get_locale
         )
     
     # Template filters
-    @app.template_filter('format_date')
-    def format_date(date):
-        """Format datetime for display"""
-        if date is None:
-            return ''
-        from datetime import datetime
-        if isinstance(date, datetime):
-            return date.strftime('%B %d, %Y')
-        return str(date)
+    from cards import format_date
+    app.add_template_filter(format_date, 'format_date')
     
     # Add security headers to all responses
     @app.after_request
@@ -111,6 +240,15 @@ def create_app(config_class=Config) -> Flask:
     # Register error handlers
     register_error_handlers(app)
     
+    # Template bytecode cache and warm-up (after filters are registered)
+    try:
+        from template_cache import init_template_cache
+        init_template_cache(app)
+        logger.info("Template cache initialized")
+    except Exception as e:
+        logger.error(f"Template cache initialization failed: {e}")
+        raise
+    
     logger.info("Application created successfully")
     return app
 
@@ -162,11 +300,22 @@ def register_error_handlers(app: Flask) -> None:
         }), 429
 
 
-# Create the application instance
-app = create_app()
+def __getattr__(name):
+    """
+    Create the module-level ``app`` on first access
+    
+    Importing this module (tests, scripts, 'flask --app app') does not
+    build an application; production servers load wsgi:app instead.
+    """
+    if name == 'app':
+        global app
+        app = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 if __name__ == '__main__':
+    app = create_app(config['development'])
     logger = get_logger('main')
     
     print("\n" + "="*60)
@@ -0,0 +1,331 @@
+"""
+Static Assets
+Self-hosted, minified and fingerprinted CSS/JS served with immutable caching
+
+'flask vendor-assets' downloads the pinned third-party libraries into
+static/vendor (commit them), and 'flask build-assets' copies every asset
+to static/dist under a content-hashed name, next to .gz/.br siblings and
+a manifest.json. Templates link assets through static_url(), which
+resolves the manifest, so a changed file gets a new URL and the old one
+can be cached forever.
+
+Without a build, static_url() serves the source files; libraries that
+were not vendored yet come from their CDN and the Content-Security-Policy
+allows that origin.
+"""
+
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import shutil
+import urllib.request
+from urllib.parse import urlsplit
+from flask import request, send_from_directory, url_for
+from compression import choose_encoding
+from logging_config import get_logger
+
+try:
+    import brotli
+except ImportError:  # optional: without it only .gz siblings are written
+    brotli = None
+
+logger = get_logger('assets')
+
+# Third-party files and the pinned CDN URLs they are vendored from
+VENDOR_ASSETS = {
+    'vendor/bootstrap.min.css': 'https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css',
+    'vendor/bootstrap.bundle.min.js': 'https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/js/bootstrap.bundle.min.js',
+    'vendor/bootstrap-icons.css': 'https://cdn.jsdelivr.net/npm/bootstrap-icons@1.11.0/font/bootstrap-icons.css',
+    'vendor/fonts/bootstrap-icons.woff2': 'https://cdn.jsdelivr.net/npm/bootstrap-icons@1.11.0/font/fonts/bootstrap-icons.woff2',
+    'vendor/fonts/bootstrap-icons.woff': 'https://cdn.jsdelivr.net/npm/bootstrap-icons@1.11.0/font/fonts/bootstrap-icons.woff',
+}
+
+# Directories of the static folder that hold assets (not uploads)
+ASSET_DIRS = ('css', 'js', 'img', 'vendor')
+
+# Extensions worth precompressing
+COMPRESSIBLE = ('.css', '.js', '.svg', '.json', '.txt')
+
+# Encodings with a precompressed sibling, most preferred first
+PRECOMPRESSED = (('br', '.br'), ('gzip', '.gz'))
+
+MANIFEST = 'manifest.json'
+
+_CSS_COMMENT = re.compile(r'/\*(?!!).*?\*/', re.S)
+_CSS_SPACE = re.compile(r'\s*([{};,>])\s*')
+_CSS_URL = re.compile(r'url\(\s*([\'"]?)([^\'")]+)\1\s*\)')
+_JS_BLOCK_COMMENT = re.compile(r'^\s*/\*(?!!).*?\*/\s*$', re.S | re.M)
+
+
+def minify_css(text):
+    """
+    Strip comments and insignificant whitespace from a stylesheet
+    
+    Meant for the project's own stylesheets, not a full CSS parser:
+    '/*! ... */' comments (licences) and the spaces that separate
+    selectors and values are kept.
+    """
+    text = _CSS_COMMENT.sub('', text)
+    text = re.sub(r'\s+', ' ', text)
+    text = _CSS_SPACE.sub(r'\1', text)
+    text = re.sub(r':\s+', ':', text)
+    return text.replace(';}', '}').strip() + '\n'
+
+
+def minify_js(text):
+    """
+    Strip indentation, blank lines and comments on lines of their own
+    
+    Conservative: code is never joined or rewritten, so no parser is needed.
+    """
+    lines = (line.strip() for line in _JS_BLOCK_COMMENT.sub('', text).splitlines())
+    return '\n'.join(line for line in lines if line and not line.startswith('//')) + '\n'
+
+
+def fingerprint(path, data):
+    """'css/site.css' -> 'css/site.<12 hex digits of the content hash>.css'"""
+    root, ext = os.path.splitext(path)
+    return f'{root}.{hashlib.blake2b(data, digest_size=6).hexdigest()}{ext}'
+
+
+def vendor_assets(static_dir, force=False):
+    """
+    Download VENDOR_ASSETS into the static folder
+    
+    Args:
+        static_dir: Static folder
+        force: Download files that are already there too
+    
+    Returns:
+        Static paths downloaded
+    """
+    downloaded = []
+    for name, url in VENDOR_ASSETS.items():
+        path = os.path.join(static_dir, name)
+        if os.path.exists(path) and not force:
+            continue
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with urllib.request.urlopen(url, timeout=30) as response:
+            data = response.read()
+        with open(path, 'wb') as f:
+            f.write(data)
+        downloaded.append(name)
+        logger.info(f"Vendored {name} ({len(data)} bytes) from {url}")
+    return downloaded
+
+
+def _source_files(static_dir):
+    """Static paths of the assets to build, stylesheets last"""
+    names = []
+    for directory in ASSET_DIRS:
+        for root, _, files in os.walk(os.path.join(static_dir, directory)):
+            for filename in files:
+                path = os.path.relpath(os.path.join(root, filename), static_dir)
+                names.append(path.replace(os.sep, '/'))
+    # Stylesheets refer to fonts and images by their fingerprinted names
+    return sorted(names, key=lambda name: (name.endswith('.css'), name))
+
+
+def _rewrite_css_urls(text, name, manifest):
+    """Point relative url() references of a stylesheet at fingerprinted files"""
+    directory = os.path.dirname(name)
+    
+    def replace(match):
+        url = match.group(2)
+        if url.startswith(('data:', '/', '#')) or urlsplit(url).scheme:
+            return match.group(0)
+        path, _, suffix = url.partition('?')
+        target = os.path.normpath(os.path.join(directory, path)).replace(os.sep, '/')
+        if target not in manifest:
+            return match.group(0)
+        # The hash in the name replaces any cache-busting query string
+        fragment = suffix.partition('#')[2]
+        hashed = os.path.relpath(manifest[target], directory).replace(os.sep, '/')
+        return f'url("{hashed}{"#" + fragment if fragment else ""}")'
+    
+    return _CSS_URL.sub(replace, text)
+
+
+def write_atomic(path, data):
+    """Write a file under a temporary name and rename it into place"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary = f'{path}.{os.getpid()}.tmp'
+    with open(temporary, 'wb') as f:
+        f.write(data)
+    os.replace(temporary, path)
+
+
+def write_precompressed(path, data):
+    """
+    Write .gz (and .br) siblings of a file when smaller than the file itself
+    
+    Siblings left from an earlier version of the file are removed when
+    the new one is not written, so they never go stale.
+    
+    Returns:
+        Suffixes written
+    """
+    written = []
+    encoded = {'.gz': gzip.compress(data, 9, mtime=0)}
+    if brotli is not None:
+        encoded['.br'] = brotli.compress(data, quality=11)
+    for suffix in ('.gz', '.br'):
+        body = encoded.get(suffix)
+        if body is not None and len(body) < len(data):
+            write_atomic(path + suffix, body)
+            written.append(suffix)
+        elif os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    return written
+
+
+def build_assets(static_dir, minify=True):
+    """
+    Minify, fingerprint and precompress every asset into static/dist
+    
+    The dist directory is rebuilt from scratch. Files that are already
+    minified ('.min.' in the name) are copied as they are.
+    
+    Args:
+        static_dir: Static folder
+        minify: Minify CSS and JS sources
+    
+    Returns:
+        Dict with the manifest (static path -> dist path), bytes (source
+        and output totals) and precompressed (count of .gz/.br siblings)
+    """
+    dist_dir = os.path.join(static_dir, 'dist')
+    if os.path.isdir(dist_dir):
+        shutil.rmtree(dist_dir)
+    
+    manifest = {}
+    source_bytes = output_bytes = precompressed = 0
+    for name in _source_files(static_dir):
+        with open(os.path.join(static_dir, name), 'rb') as f:
+            data = f.read()
+        source_bytes += len(data)
+        
+        if name.endswith('.css'):
+            text = data.decode('utf-8')
+            if minify and '.min.' not in name:
+                text = minify_css(text)
+            data = _rewrite_css_urls(text, name, manifest).encode('utf-8')
+        elif name.endswith('.js') and minify and '.min.' not in name:
+            data = minify_js(data.decode('utf-8')).encode('utf-8')
+        
+        hashed = fingerprint(name, data)
+        path = os.path.join(dist_dir, hashed)
+        write_atomic(path, data)
+        output_bytes += len(data)
+        if name.endswith(COMPRESSIBLE):
+            precompressed += len(write_precompressed(path, data))
+        manifest[name] = hashed
+    
+    os.makedirs(dist_dir, exist_ok=True)
+    with open(os.path.join(dist_dir, MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    logger.info(f"Built {len(manifest)} assets into {dist_dir}")
+    return {
+        'manifest': manifest,
+        'bytes': {'source': source_bytes, 'output': output_bytes},
+        'precompressed': precompressed,
+    }
+
+
+class Assets:
+    """
+    Asset URLs for templates, resolved through the build manifest
+    
+    Args:
+        static_dir: Static folder holding the sources and dist/
+    """
+    
+    def __init__(self, static_dir):
+        self.static_dir = static_dir
+        self.dist_dir = os.path.join(static_dir, 'dist')
+        self.load()
+    
+    def load(self):
+        """(Re)read the manifest and check which vendored files exist"""
+        try:
+            with open(os.path.join(self.dist_dir, MANIFEST)) as f:
+                self.manifest = json.load(f)
+        except FileNotFoundError:
+            self.manifest = {}
+        self.missing = {
+            name for name in VENDOR_ASSETS
+            if name not in self.manifest and not os.path.isfile(os.path.join(self.static_dir, name))
+        }
+        # CDN origins pages load from, for libraries not vendored yet
+        self.external_origins = tuple(sorted({
+            '{0.scheme}://{0.netloc}'.format(urlsplit(VENDOR_ASSETS[name])) for name in self.missing
+        }))
+    
+    def url(self, name):
+        """URL of a static asset: fingerprinted when built, else the source"""
+        hashed = self.manifest.get(name)
+        if hashed is not None:
+            return url_for('asset', filename=hashed)
+        if name in self.missing:
+            return VENDOR_ASSETS[name]
+        return url_for('static', filename=name)
+
+
+def send_asset(dist_dir, filename, max_age):
+    """
+    Send a fingerprinted file, precompressed when the client accepts it
+    
+    Args:
+        dist_dir: Build output directory
+        filename: Path under dist_dir
+        max_age: Cache lifetime in seconds
+    """
+    siblings = {
+        encoding: suffix for encoding, suffix in PRECOMPRESSED
+        if os.path.isfile(os.path.join(dist_dir, filename + suffix))
+    }
+    encoding = choose_encoding(request.accept_encodings, tuple(siblings)) if siblings else None
+    if encoding is None:
+        response = send_from_directory(dist_dir, filename, max_age=max_age)
+    else:
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        response = send_from_directory(dist_dir, filename + siblings[encoding],
+                                       mimetype=mimetype, max_age=max_age)
+        response.headers['Content-Encoding'] = encoding
+    if siblings:
+        response.vary.add('Accept-Encoding')
+    # The name changes with the content, so the file never needs revalidating
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+
+def init_assets(app):
+    """
+    Add the static_url() template helper and the fingerprinted asset route
+    
+    Files under <static>/dist are served at /static/dist/ with
+    'Cache-Control: public, max-age=ASSETS_MAX_AGE, immutable'.
+    
+    Args:
+        app: Flask application instance
+    """
+    static_dir = app.config.get('ASSETS_STATIC_DIR') or app.static_folder
+    assets = Assets(static_dir)
+    app.extensions['assets'] = assets
+    max_age = app.config.get('ASSETS_MAX_AGE', 31536000)
+    
+    @app.route(f'{app.static_url_path}/dist/<path:filename>', endpoint='asset')
+    def asset(filename):
+        return send_asset(assets.dist_dir, filename, max_age)
+    
+    app.add_template_global(assets.url, 'static_url')
+    
+    if not assets.manifest:
+        logger.debug("No asset manifest; serving source files (run 'flask build-assets')")
+    if assets.missing:
+        logger.warning(f"Not vendored, loading from CDN: {', '.join(sorted(assets.missing))} "
+                       f"(run 'flask vendor-assets')")
@@ -0,0 +1,147 @@
+"""
+Post Cards
+Localized, ORM-free view models of blog posts for listings and feeds
+"""
+
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from flask import current_app, g, url_for
+from images import responsive_image
+
+
+def format_date(date):
+    """Format datetime for display"""
+    if date is None:
+        return ''
+    if isinstance(date, datetime):
+        return date.strftime('%B %d, %Y')
+    return str(date)
+
+
+class PostCard:
+    """
+    What a post card shows, resolved for one language
+    
+    Built once from a BlogPost and then independent of it: nothing is
+    loaded lazily, so cards can outlive the request and its session.
+    
+    Attributes:
+        post_id, slug: Identify the post
+        title, excerpt, category: Localized text (category may be None)
+        image: Featured image URL or None
+        picture: Its ResponsiveImage (variants and size) or None
+        url: Path of the post page in the card's language
+        published: published_at, else created_at
+        date: published, formatted for display
+        updated: updated_at (what the card was built from)
+    """
+    
+    __slots__ = ('post_id', 'slug', 'title', 'excerpt', 'category', 'image', 'picture',
+                 'url', 'published', 'date', 'updated')
+    
+    def __init__(self, post, language):
+        self.post_id = post.id
+        self.slug = post.slug
+        self.title = post.get_title(language)
+        self.excerpt = post.get_excerpt(language)
+        self.category = post.get_category(language)
+        self.image = post.featured_image
+        self.picture = responsive_image(post.featured_image)
+        self.url = url_for('blog_post', slug=post.slug, lang_code=language)
+        self.published = post.published_at or post.created_at
+        self.date = format_date(self.published)
+        self.updated = post.updated_at
+    
+    def __repr__(self):
+        return f'<PostCard {self.slug}>'
+
+
+class PostCardCache:
+    """
+    Bounded LRU of post cards, per post and language
+    
+    Entries are keyed by (post id, language, updated_at), so an edited
+    post gets a new card and the stale one ages out. Shared by the
+    threads of a worker.
+    
+    Args:
+        maxsize: Cards kept (0 builds every card afresh)
+    """
+    
+    def __init__(self, maxsize=2000):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._cards = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def __len__(self):
+        return len(self._cards)
+    
+    def get(self, post, language):
+        """Card for a post in a language, built on a miss"""
+        key = (post.id, language, post.updated_at)
+        with self._lock:
+            card = self._cards.get(key)
+            if card is not None:
+                self._cards.move_to_end(key)
+                self.hits += 1
+                return card
+            self.misses += 1
+        
+        card = PostCard(post, language)
+        if self.maxsize:
+            with self._lock:
+                self._cards[key] = card
+                while len(self._cards) > self.maxsize:
+                    self._cards.popitem(last=False)
+        return card
+    
+    def clear(self):
+        """Drop every card"""
+        with self._lock:
+            self._cards.clear()
+
+
+def post_cards(posts, language=None):
+    """
+    Cards for posts, in the page's language by default
+    
+    Args:
+        posts: Iterable of BlogPost
+        language: Language code (default: the current page's)
+    
+    Returns:
+        List of PostCard, in the order of posts
+    """
+    cache = current_app.extensions['post_cards']
+    language = language or g.lang_code
+    return [cache.get(post, language) for post in posts]
+
+
+def _post_card_collector(cache):
+    """Collector reporting the post card cache statistics"""
+    def collect():
+        labels = {'cache': 'post_cards'}
+        return [
+            ('flask_app_cache_entries', labels, len(cache)),
+            ('flask_app_cache_hits_total', labels, cache.hits),
+            ('flask_app_cache_misses_total', labels, cache.misses),
+        ]
+    return collect
+
+
+def init_post_cards(app):
+    """
+    Keep a per-worker post card cache (POST_CARD_CACHE_SIZE cards)
+    
+    Args:
+        app: Flask application instance
+    """
+    cache = PostCardCache(app.config.get('POST_CARD_CACHE_SIZE', 2000))
+    app.extensions['post_cards'] = cache
+    
+    registry = app.extensions.get('metrics')
+    if registry is not None:
+        registry.register_collector(_post_card_collector(cache))
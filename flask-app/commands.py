@@ -0,0 +1,467 @@
+"""
+CLI Commands
+Maintenance commands for the Flask CLI (run with: flask --app app <command>)
+"""
+
+import click
+from flask import current_app
+
+
+def register_commands(app):
+    """Register all CLI commands"""
+    
+    @app.cli.command('init-db')
+    @click.option('--drop', is_flag=True, help='Drop all tables first (deletes all data)')
+    @click.option('--sample-data', is_flag=True, help='Add sample blog posts to an empty database')
+    def init_db_command(drop, sample_data):
+        """Create the database tables and stamp the schema version"""
+        from models import SCHEMA_VERSION, create_schema, seed_sample_data
+        
+        if drop:
+            click.confirm('Drop all tables and their data?', abort=True)
+        tables = create_schema(drop=drop)
+        click.echo(f"✓ Schema version {SCHEMA_VERSION}: {', '.join(tables)}")
+        
+        if sample_data:
+            seed_sample_data()
+            click.echo("✓ Sample data added")
+    
+    @app.cli.command('purge-posts')
+    @click.option('--chunk-size', type=int, default=None,
+                  help='Comments deleted per transaction (default: POST_PURGE_CHUNK_SIZE)')
+    @click.option('--limit', type=int, default=None,
+                  help='Maximum number of posts to purge')
+    def purge_posts(chunk_size, limit):
+        """Permanently delete soft-deleted posts and their comments"""
+        from models import purge_deleted_posts
+        
+        chunk_size = chunk_size or current_app.config.get('POST_PURGE_CHUNK_SIZE', 500)
+        purged = purge_deleted_posts(chunk_size=chunk_size, limit=limit)
+        
+        click.echo(f"✓ Purged {purged['posts']} posts and {purged['comments']} comments")
+    
+    @app.cli.command('precompile-templates')
+    @click.option('--directory', default=None,
+                  help='Bytecode cache directory (default: TEMPLATE_CACHE_DIR)')
+    @click.option('--clear', is_flag=True, help='Remove previously compiled templates first')
+    def precompile_templates_command(directory, clear):
+        """Compile all templates into the shared bytecode cache"""
+        from template_cache import precompile_templates
+        
+        directory = directory or current_app.config.get('TEMPLATE_CACHE_DIR')
+        if not directory:
+            raise click.ClickException("Set TEMPLATE_CACHE_DIR or pass --directory")
+        
+        result = precompile_templates(current_app, directory, clear=clear)
+        for name, error in result['errors'].items():
+            click.echo(f"✗ {name}: {error}", err=True)
+        if result['errors']:
+            raise click.ClickException(f"{len(result['errors'])} template(s) failed to compile")
+        click.echo(f"✓ Compiled {result['templates']} templates into {directory} in {result['ms']}ms")
+    
+    @app.cli.command('vendor-assets')
+    @click.option('--force', is_flag=True, help='Download files that are already vendored too')
+    def vendor_assets_command(force):
+        """Download the pinned third-party CSS/JS/fonts into static/vendor"""
+        from assets import vendor_assets
+        
+        try:
+            downloaded = vendor_assets(current_app.extensions['assets'].static_dir, force=force)
+        except OSError as e:
+            raise click.ClickException(f"Download failed: {e}")
+        for name in downloaded:
+            click.echo(f"✓ {name}")
+        click.echo(f"✓ Vendored {len(downloaded)} file(s); commit them and run 'flask build-assets'")
+    
+    @app.cli.command('build-assets')
+    @click.option('--no-minify', is_flag=True, help='Fingerprint the files without minifying them')
+    def build_assets_command(no_minify):
+        """Minify, fingerprint and precompress static assets into static/dist"""
+        from assets import build_assets
+        
+        assets = current_app.extensions['assets']
+        result = build_assets(assets.static_dir, minify=not no_minify)
+        assets.load()
+        sizes = result['bytes']
+        click.echo(f"✓ Built {len(result['manifest'])} assets into {assets.dist_dir} "
+                   f"({sizes['source']} -> {sizes['output']} bytes, "
+                   f"{result['precompressed']} precompressed)")
+        if assets.missing:
+            click.echo(f"! Not vendored, still loaded from CDN: {', '.join(sorted(assets.missing))}", err=True)
+    
+    @app.cli.command('prerender')
+    @click.option('--directory', default=None, help='Output directory (default: PRERENDER_DIR)')
+    @click.option('--full', is_flag=True, help='Render every page, not only the changed ones')
+    @click.option('--jobs', type=int, default=None,
+                  help='Render processes (default: PRERENDER_JOBS, 0 = one per CPU)')
+    def prerender_command(directory, full, jobs):
+        """Write published pages as static HTML for the web server"""
+        from prerender import prerender_site
+        
+        try:
+            result = prerender_site(current_app, directory, full=full, jobs=jobs)
+        except ValueError as e:
+            raise click.ClickException(str(e))
+        for path, error in result['errors'].items():
+            click.echo(f"✗ {path}: {error}", err=True)
+        click.echo(f"✓ Rendered {result['rendered']} of {result['pages']} pages "
+                   f"({result['unchanged']} unchanged, {result['removed']} removed) "
+                   f"in {result['seconds']}s with {result['jobs']} process(es)")
+        if result['errors']:
+            raise click.ClickException(f"{len(result['errors'])} page(s) failed")
+    
+    @app.cli.command('process-images')
+    @click.option('--all', 'all_images', is_flag=True,
+                  help='Remake the copies of every image (after changing IMAGE_WIDTHS or IMAGE_FORMATS)')
+    def process_images_command(all_images):
+        """Make the resized copies of uploaded images that are missing or failed"""
+        from images import process_pending
+        
+        try:
+            result = process_pending(current_app, all_images=all_images)
+        except ValueError as e:
+            raise click.ClickException(str(e))
+        click.echo(f"✓ Processed {result['processed']} image(s), {result['failed']} failed")
+        if result['failed']:
+            raise click.ClickException(f"{result['failed']} image(s) failed, see the log")
+    
+    @app.cli.command('render-content')
+    @click.option('--all', 'all_posts', is_flag=True,
+                  help='Render every post again (after changing the allowlist or CONTENT_MARKDOWN)')
+    def render_content_command(all_posts):
+        """Render sanitized HTML and reading time of posts that have none"""
+        from content import render_pending
+        
+        rendered = render_pending(all_posts=all_posts)
+        click.echo(f"✓ Rendered the content of {rendered} post(s)")
+    
+    @app.cli.command('export')
+    @click.argument('dataset', type=click.Choice(['inquiries', 'comments', 'posts']))
+    @click.option('--format', 'fmt', type=click.Choice(['csv', 'ndjson']), default='csv',
+                  help='Output format')
+    @click.option('--status', default='all', help='Status filter, as in the admin lists')
+    @click.option('--ip', default=None, help='Comment IP address filter')
+    @click.option('--contains', default=None, help='Comment text filter')
+    @click.option('--newsletter', is_flag=True, help='Only newsletter subscribers (inquiries)')
+    @click.option('--gzip', 'compress', is_flag=True, help='Gzip the output')
+    @click.option('--output', '-o', type=click.File('wb'), required=True,
+                  help='Output file')
+    def export(dataset, fmt, status, ip, contains, newsletter, compress, output):
+        """Stream a dataset as CSV or NDJSON"""
+        from exports import export_criteria, generate_export
+        
+        criteria = export_criteria(dataset, status, ip, contains, newsletter)
+        stream = generate_export(
+            dataset,
+            fmt,
+            criteria,
+            compress=compress,
+            chunk_size=current_app.config.get('EXPORT_CHUNK_SIZE', 1000)
+        )
+        for data in stream:
+            output.write(data)
+    
+    @app.cli.command('import-posts')
+    @click.argument('path', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--format', 'fmt', type=click.Choice(['csv', 'ndjson']), default=None,
+                  help='Input format (default: from the file extension)')
+    @click.option('--status', type=click.Choice(['draft', 'published', 'pending', 'archived']),
+                  default='draft', help='Status for records without one')
+    @click.option('--chunk-size', type=int, default=None,
+                  help='Rows per INSERT (default: IMPORT_CHUNK_SIZE)')
+    @click.option('--translate', is_flag=True,
+                  help='Translate posts imported in one language only')
+    def import_posts_command(path, fmt, status, chunk_size, translate):
+        """Bulk import blog posts from a CSV or NDJSON file"""
+        from imports import read_records, detect_format, import_posts, translate_imported_posts
+        
+        fmt = fmt or detect_format(path)
+        with open(path, 'rb') as stream:
+            stats = import_posts(
+                read_records(stream, fmt, compressed=path.lower().endswith('.gz')),
+                chunk_size=chunk_size or current_app.config.get('IMPORT_CHUNK_SIZE', 500),
+                default_status=status
+            )
+        
+        click.echo(
+            f"✓ Imported {stats['imported']} posts in {stats['seconds']}s "
+            f"({stats['posts_per_second']} posts/s)"
+        )
+        for error in stats['errors']:
+            click.echo(f"  ✗ {error}", err=True)
+        
+        if translate and stats['needs_translation']:
+            count = translate_imported_posts(stats['needs_translation'])
+            click.echo(f"✓ Translated {count} of {len(stats['needs_translation'])} posts")
+    
+    @app.cli.command('generate-data')
+    @click.option('--preset', type=click.Choice(['small', 'medium', 'large']), default='small',
+                  help='Dataset size (small: 1k posts, medium: 10k, large: 100k/10M comments)')
+    @click.option('--posts', type=int, default=None, help='Override number of posts')
+    @click.option('--comments', type=int, default=None, help='Override number of comments')
+    @click.option('--inquiries', type=int, default=None, help='Override number of inquiries')
+    @click.option('--seed', type=int, default=42, help='Random seed (same seed, same data)')
+    @click.option('--chunk-size', type=int, default=10000, help='Rows per INSERT/transaction')
+    @click.option('--drop', is_flag=True, help='Drop and recreate all tables first')
+    def generate_data(preset, posts, comments, inquiries, seed, chunk_size, drop):
+        """Fill the database with a deterministic synthetic dataset"""
+        from datagen import PRESETS, generate_dataset
+        from models import create_schema
+        
+        if drop:
+            create_schema(drop=True)
+        
+        sizes = dict(PRESETS[preset])
+        for name, value in (('posts', posts), ('comments', comments), ('inquiries', inquiries)):
+            if value is not None:
+                sizes[name] = value
+        
+        try:
+            stats = generate_dataset(seed=seed, chunk_size=chunk_size, **sizes)
+        except ValueError as e:
+            raise click.ClickException(f"{e} (use --drop)")
+        
+        click.echo(
+            f"✓ Generated {stats['posts']} posts, {stats['comments']} comments and "
+            f"{stats['inquiries']} inquiries in {stats['seconds']}s"
+        )
+    
+    @app.cli.command('benchmark')
+    @click.option('--mode', type=click.Choice(['inprocess', 'gunicorn']), default='inprocess',
+                  help='Drive the Flask test client or a real gunicorn server')
+    @click.option('--preset', type=click.Choice(['small', 'medium', 'large']), default='small',
+                  help='Fixture dataset size (generated once and cached)')
+    @click.option('--seed', type=int, default=42, help='Fixture dataset seed')
+    @click.option('--endpoint', 'endpoints', multiple=True,
+                  help='Only run these scenarios (repeatable, default: all)')
+    @click.option('--requests', type=int, default=200, help='Measured requests per endpoint')
+    @click.option('--concurrency', '-c', type=int, default=4, help='Concurrent clients')
+    @click.option('--warmup', type=int, default=5, help='Unmeasured requests per endpoint')
+    @click.option('--workers', type=int, default=2, help='Gunicorn worker processes')
+    @click.option('--threads', type=int, default=1, help='Threads per gunicorn worker')
+    @click.option('--preload/--no-preload', default=True,
+                  help='Load the app in the gunicorn master before forking')
+    @click.option('--output', '-o', type=click.Path(dir_okay=False), required=True,
+                  help='Results JSON file')
+    def benchmark(mode, preset, seed, endpoints, requests, concurrency, warmup, workers, threads,
+                  preload, output):
+        """Measure latency, throughput, queries and memory per endpoint"""
+        from benchmark import run_benchmark, save_results
+        from datagen import PRESETS
+        
+        results = run_benchmark(
+            mode=mode,
+            dataset=dict(PRESETS[preset], seed=seed),
+            scenarios=endpoints or None,
+            requests=requests,
+            concurrency=concurrency,
+            warmup=warmup,
+            workers=workers,
+            threads=threads,
+            preload=preload
+        )
+        save_results(results, output)
+        
+        click.echo(f"{'endpoint':<18}{'p50':>9}{'p95':>9}{'p99':>9}{'req/s':>9}{'queries':>9}{'rss MB':>9}")
+        for entry in results['endpoints'].values():
+            click.echo(
+                f"{entry['endpoint']:<18}{entry['p50_ms']:>9}{entry['p95_ms']:>9}{entry['p99_ms']:>9}"
+                f"{entry['requests_per_second']:>9}{str(entry['queries_per_request']):>9}"
+                f"{entry['peak_rss_mb']:>9}"
+                + (f"  ✗ {entry['errors']} errors" if entry['errors'] else '')
+            )
+        memory = results['meta']['server_memory']
+        if memory:
+            click.echo(
+                f"{memory['workers']} workers: {memory['worker_rss_mb']} MB RSS / "
+                f"{memory['worker_uss_mb']} MB private each, {memory['total_pss_mb']} MB PSS in total"
+            )
+        click.echo(f"✓ Results written to {output}")
+    
+    @app.cli.command('benchmark-compare')
+    @click.argument('baseline', type=click.Path(exists=True, dir_okay=False))
+    @click.argument('current', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--threshold', type=float, default=0.10,
+                  help='Allowed relative slowdown before flagging (default: 0.10)')
+    def benchmark_compare(baseline, current, threshold):
+        """Compare two benchmark results files and flag regressions"""
+        from benchmark import load_results, compare_results
+        
+        baseline_results, current_results = load_results(baseline), load_results(current)
+        if baseline_results['meta'].get('mode') != current_results['meta'].get('mode'):
+            click.echo("! Runs used different modes; numbers are not directly comparable", err=True)
+        
+        rows = compare_results(baseline_results, current_results, threshold)
+        regressions = [row for row in rows if row['regression']]
+        
+        for row in rows:
+            marker = '✗' if row['regression'] else ' '
+            click.echo(
+                f"{marker} {row['endpoint']:<18}{row['metric']:<22}"
+                f"{row['baseline']:>10} -> {row['current']:<10}{row['change']:+.1%}"
+            )
+        
+        if regressions:
+            raise click.ClickException(f"{len(regressions)} regression(s) over {threshold:.0%}")
+        click.echo("✓ No regressions")
+    
+    @app.cli.command('benchmark-logging')
+    @click.option('--requests', type=int, default=5000, help='Simulated requests')
+    @click.option('--records', type=int, default=3, help='INFO records logged per request')
+    def benchmark_logging(requests, records):
+        """Compare per-request logging cost of direct and queued handlers"""
+        from benchmark import logging_overhead
+        
+        results = logging_overhead(requests=requests, records_per_request=records)
+        for setup, entry in results.items():
+            click.echo(
+                f"{setup:<8} {entry['us_per_request']:>9} us/request "
+                f"{entry['us_per_record']:>8} us/record   drain {entry['drain_ms']}ms"
+            )
+    
+    @app.cli.command('benchmark-contention')
+    @click.option('--readers', type=int, default=3, help='Processes loading the blog listing')
+    @click.option('--writers', type=int, default=1, help='Processes loading a post (one view-count commit each)')
+    @click.option('--duration', type=float, default=5.0, help='Seconds of load per engine setup')
+    def benchmark_contention(readers, writers, duration):
+        """Compare mixed read/write load on the default and tuned SQLite engines"""
+        from benchmark import lock_contention
+        
+        results = lock_contention(readers=readers, writers=writers, duration=duration)
+        click.echo(f"{'setup':<9}{'role':<7}{'req/s':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}{'errors':>8}")
+        for setup, roles in results.items():
+            for role, entry in roles.items():
+                click.echo(
+                    f"{setup:<9}{role:<7}{entry['requests_per_second']:>9}{entry['p50_ms']:>9}"
+                    f"{entry['p95_ms']:>9}{entry['p99_ms']:>9}{entry['max_ms']:>9}{entry['errors']:>8}"
+                )
+    
+    @app.cli.command('benchmark-render')
+    @click.option('--posts', type=int, default=10, help='Cards per page')
+    @click.option('--rounds', type=int, default=500, help='Pages rendered per variant')
+    def benchmark_render(posts, rounds):
+        """Compare rendering blog cards from ORM posts and from cached post cards"""
+        from benchmark import card_rendering
+        
+        results = card_rendering(posts=posts, rounds=rounds)
+        for variant, entry in results.items():
+            click.echo(f"{variant:<11}{entry['us_per_page']:>10} us/page {entry['us_per_card']:>9} us/card")
+    
+    @app.cli.command('benchmark-templates')
+    @click.option('--runs', type=int, default=5, help='Fresh apps created per setup')
+    def benchmark_templates(runs):
+        """Compare first-request latency without and with the template cache and warm-up"""
+        from benchmark import first_request_latency
+        
+        results = first_request_latency(runs=runs)
+        click.echo(f"{'setup':<10}{'startup':>10}{'first requests':>16}")
+        for setup, entry in results.items():
+            click.echo(f"{setup:<10}{entry['startup_ms']:>8}ms{entry['first_requests_ms']:>14}ms")
+            for path, ms in entry['per_path_ms'].items():
+                click.echo(f"  {path:<22}{ms:>10}ms")
+    
+    @app.cli.command('benchmark-compression')
+    @click.option('--rounds', type=int, default=200, help='Requests per page and encoding')
+    def benchmark_compression(rounds):
+        """Compare bytes on the wire and CPU per request for each response encoding"""
+        from benchmark import compression_cost
+        
+        results = compression_cost(rounds=rounds)
+        for path, variants in results.items():
+            click.echo(path)
+            for variant, entry in variants.items():
+                click.echo(f"  {variant:<14}{entry['bytes']:>9} bytes ({entry['ratio']:>6.1%})"
+                           f"{entry['cpu_us']:>10} us CPU/request{entry['encode_us']:>9} us encoding")
+    
+    @app.cli.command('benchmark-feeds')
+    @click.option('--rounds', type=int, default=100, help='Requests per document and variant')
+    @click.option('--posts', type=int, default=500, help='Published posts to generate')
+    def benchmark_feeds(rounds, posts):
+        """Compare rebuilt, cached and 304 responses of the sitemap and feeds"""
+        from benchmark import feed_polling
+        
+        results = feed_polling(rounds=rounds, dataset={'posts': posts})
+        for path, variants in results.items():
+            click.echo(path)
+            for variant, entry in variants.items():
+                click.echo(f"  {variant:<24}{entry['status']:>4}{entry['bytes']:>10} bytes"
+                           f"{entry['us']:>12} us/request")
+    
+    @app.cli.command('benchmark-startup')
+    @click.option('--module', default='wsgi', show_default=True, help='Module to import')
+    @click.option('--runs', type=int, default=5, help='Fresh interpreters to time')
+    @click.option('--budget-ms', type=float, default=None,
+                  help='Fail above this cold start time (default: STARTUP_BUDGET_MS)')
+    def benchmark_startup(module, runs, budget_ms):
+        """Time a cold import of the WSGI module and list the slowest packages"""
+        from benchmark import STARTUP_BUDGET_MS, startup_time
+        
+        budget_ms = budget_ms or STARTUP_BUDGET_MS
+        result = startup_time(module=module, runs=runs)
+        click.echo(f"Cold start of '{module}': {result['wall_ms']}ms "
+                   f"(runs: {', '.join(str(ms) for ms in result['runs_ms'])})")
+        click.echo("Slowest packages (import self time):")
+        for package, ms in result['packages']:
+            click.echo(f"  {package:<24}{ms:>8} ms")
+        
+        if result['deferred_imported']:
+            raise click.ClickException(
+                f"Imported at startup but meant to load lazily: {', '.join(result['deferred_imported'])}"
+            )
+        if result['wall_ms'] > budget_ms:
+            raise click.ClickException(f"Cold start {result['wall_ms']}ms exceeds budget of {budget_ms}ms")
+        click.echo(f"✓ Within budget of {budget_ms}ms")
+    
+    @app.cli.command('memory-report')
+    @click.option('--path', 'paths', multiple=True, default=['/blog'], show_default=True,
+                  help='Path to request (repeatable); replayed round-robin')
+    @click.option('--requests', type=int, default=500, help='Requests replayed between snapshots')
+    @click.option('--warmup', type=int, default=20, help='Requests before the first snapshot')
+    @click.option('--admin', is_flag=True, help='Send requests with an admin session')
+    @click.option('--key', type=click.Choice(['lineno', 'filename', 'traceback']), default='lineno',
+                  help='Group allocations by')
+    @click.option('--limit', type=int, default=15, help='Allocation sites to show')
+    def memory_report(paths, requests, warmup, admin, key, limit):
+        """Replay requests in-process and report what memory grew"""
+        from memory import SnapshotStore, cache_sizes, diff_snapshots, process_rss
+        
+        client = current_app.test_client()
+        if admin:
+            with client.session_transaction() as sess:
+                sess['is_admin'] = True
+        
+        def replay(count):
+            for i in range(count):
+                response = client.get(paths[i % len(paths)])
+                response.close()
+        
+        store = SnapshotStore(history=2, frames=25 if key == 'traceback' else 1)
+        replay(warmup)
+        store.start()
+        try:
+            before = store.take('before', current_app)
+            replay(requests)
+            after = store.take('after', current_app)
+        finally:
+            store.stop()
+        
+        click.echo(
+            f"RSS {before['rss'] / 1048576:.1f}MB -> {after['rss'] / 1048576:.1f}MB, "
+            f"traced {before['traced'] / 1048576:.2f}MB -> {after['traced'] / 1048576:.2f}MB "
+            f"after {requests} requests"
+        )
+        click.echo(f"\nTop {limit} changes by {key}:")
+        for stat in diff_snapshots(before['snapshot'], after['snapshot'], limit=limit, key=key):
+            click.echo(
+                f"  {stat['size_diff'] / 1024:>+10.1f} KiB {stat['count_diff']:>+8} blocks  {stat['site']}"
+            )
+            if key == 'traceback':
+                for frame in stat['traceback'][1:]:
+                    click.echo(f"{'':>33}{frame}")
+        
+        click.echo("\nCaches:")
+        previous = {cache['name']: cache for cache in before['caches']}
+        for cache in cache_sizes(current_app):
+            start = previous.get(cache['name'], {}).get('entries', 0)
+            click.echo(f"  {cache['name']:<44}{start:>8} -> {cache['entries']:<8}{cache['description']}")
+        click.echo(f"\nCurrent RSS {process_rss() / 1048576:.1f}MB")
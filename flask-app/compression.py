@@ -0,0 +1,237 @@
+"""
+Response Compression
+gzip and brotli response encoding negotiated from Accept-Encoding
+
+Pages that do not depend on the visitor (they did not use the session)
+are the same bytes for everyone, so their compressed forms are kept in
+a small per-worker cache keyed by a hash of the body: each such page is
+compressed once per encoding, not once per request. Streamed responses
+and large uncacheable bodies are compressed chunk by chunk as they are
+sent.
+"""
+
+import hashlib
+import threading
+import zlib
+from collections import OrderedDict
+from flask import request, session
+from logging_config import get_logger
+
+try:
+    import brotli
+except ImportError:  # optional: without it only gzip is offered
+    brotli = None
+
+logger = get_logger('compression')
+
+# Chunk size used when compressing a large body as a stream
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def available_encodings():
+    """Supported encodings, most preferred first"""
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def choose_encoding(accept_encodings, encodings=None):
+    """
+    Best encoding the client accepts, or None for identity
+    
+    Args:
+        accept_encodings: werkzeug Accept parsed from Accept-Encoding
+        encodings: Candidates in server preference order (default:
+            available_encodings())
+    """
+    best, best_quality = None, 0
+    for encoding in encodings or available_encodings():
+        quality = accept_encodings[encoding]
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+class _BrotliCompressor:
+    """brotli.Compressor with zlib's compress()/flush() interface"""
+    
+    def __init__(self, quality):
+        self._compressor = brotli.Compressor(quality=quality)
+    
+    def compress(self, data):
+        return self._compressor.process(data)
+    
+    def flush(self):
+        return self._compressor.finish()
+
+
+def _compressor(encoding, config):
+    """Incremental compressor with compress(data) and flush() methods"""
+    if encoding == 'br':
+        return _BrotliCompressor(config.get('COMPRESSION_BROTLI_QUALITY', 5))
+    # wbits=31: gzip container
+    return zlib.compressobj(config.get('COMPRESSION_GZIP_LEVEL', 6), zlib.DEFLATED, 31)
+
+
+def compress(body, encoding, config):
+    """Compress a whole body"""
+    if encoding == 'br':
+        return brotli.compress(body, quality=config.get('COMPRESSION_BROTLI_QUALITY', 5))
+    compressor = _compressor(encoding, config)
+    return compressor.compress(body) + compressor.flush()
+
+
+def compress_stream(chunks, encoding, config):
+    """Compress an iterable of str/bytes chunks, yielding compressed chunks"""
+    compressor = _compressor(encoding, config)
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode()
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def _chunked(body, size=STREAM_CHUNK_SIZE):
+    for start in range(0, len(body), size):
+        yield body[start:start + size]
+
+
+class CompressionCache:
+    """
+    Bounded LRU of compressed bodies, keyed by body hash and encoding
+    
+    Args:
+        max_bytes: Compressed bytes kept (0 disables the cache)
+    """
+    
+    def __init__(self, max_bytes=16 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def __len__(self):
+        return len(self._entries)
+    
+    def get(self, body, encoding, config):
+        """Compressed body, compressed on a miss"""
+        if not self.max_bytes:
+            return compress(body, encoding, config)
+        
+        key = (hashlib.blake2b(body, digest_size=16).digest(), encoding)
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return data
+            self.misses += 1
+        
+        data = compress(body, encoding, config)
+        if len(data) <= self.max_bytes:
+            with self._lock:
+                if key not in self._entries:
+                    self._entries[key] = data
+                    self.bytes += len(data)
+                while self.bytes > self.max_bytes:
+                    _, evicted = self._entries.popitem(last=False)
+                    self.bytes -= len(evicted)
+        return data
+    
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+
+def compress_response(response, config, cache):
+    """
+    Encode a response for the current request when worthwhile
+    
+    Skipped for types outside COMPRESSION_MIMETYPES, bodies under
+    COMPRESSION_MIN_SIZE, files sent by send_file, partial or empty
+    responses, already encoded ones and 'Cache-Control: no-transform'.
+    
+    Args:
+        response: Flask response
+        config: Application config
+        cache: CompressionCache for bodies that do not depend on the visitor
+    
+    Returns:
+        The response, encoded in place
+    """
+    if (response.mimetype not in config['COMPRESSION_MIMETYPES']
+            or response.status_code < 200 or response.status_code in (204, 206, 304)
+            or response.direct_passthrough or 'Content-Encoding' in response.headers
+            or response.cache_control.no_transform):
+        return response
+    
+    response.vary.add('Accept-Encoding')
+    encoding = choose_encoding(request.accept_encodings)
+    if encoding is None:
+        return response
+    
+    if response.is_streamed:
+        response.response = compress_stream(response.response, encoding, config)
+        response.headers.pop('Content-Length', None)
+    else:
+        body = response.get_data()
+        if len(body) < config['COMPRESSION_MIN_SIZE']:
+            return response
+        if not session.accessed and not response.cache_control.no_store:
+            response.set_data(cache.get(body, encoding, config))
+        elif len(body) > config['COMPRESSION_STREAM_SIZE']:
+            response.response = compress_stream(_chunked(body), encoding, config)
+            response.headers.pop('Content-Length', None)
+        else:
+            response.set_data(compress(body, encoding, config))
+    
+    response.headers['Content-Encoding'] = encoding
+    # The encoded bytes differ, but the representation is equivalent
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def _compression_collector(cache):
+    """Collector reporting the compressed body cache statistics"""
+    def collect():
+        labels = {'cache': 'compression'}
+        return [
+            ('flask_app_cache_entries', labels, len(cache)),
+            ('flask_app_cache_hits_total', labels, cache.hits),
+            ('flask_app_cache_misses_total', labels, cache.misses),
+        ]
+    return collect
+
+
+def init_compression(app):
+    """
+    Compress responses when COMPRESSION_ENABLED
+    
+    Register right after metrics: after_request functions run in reverse
+    order, so every later hook sees the uncompressed response and the
+    metrics record the size sent on the wire.
+    
+    Args:
+        app: Flask application instance
+    """
+    if not app.config.get('COMPRESSION_ENABLED', True):
+        return
+    cache = CompressionCache(app.config.get('COMPRESSION_CACHE_MB', 16) * 1024 * 1024)
+    app.extensions['compression'] = cache
+    
+    registry = app.extensions.get('metrics')
+    if registry is not None:
+        registry.register_collector(_compression_collector(cache))
+    
+    if brotli is None:
+        logger.debug("Brotli not installed; compressing with gzip only")
+    
+    @app.after_request
+    def compress_after_request(response):
+        return compress_response(response, app.config, cache)
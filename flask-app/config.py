@@ -16,11 +16,32 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or \
         'sqlite:///' + os.path.join(basedir, 'instance', 'website.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Startup compares the stamped schema version with models.SCHEMA_VERSION;
+    # tables are created by 'flask init-db', not at startup
+    SCHEMA_CHECK = True
+    AUTO_CREATE_SCHEMA = False
+    
+    # SQLite tuning, applied to file databases only (None keeps SQLite's default).
+    # WAL lets readers proceed while a write commits. With NORMAL, WAL only
+    # syncs at checkpoints: a power loss may drop the last commits but
+    # cannot corrupt the database
+    SQLITE_JOURNAL_MODE = 'WAL'
+    SQLITE_SYNCHRONOUS = 'NORMAL'
+    SQLITE_BUSY_TIMEOUT_MS = 5000
+    SQLITE_MMAP_SIZE_MB = 256
+    SQLITE_CACHE_SIZE_MB = 16
+    # Reads during requests use a pool of query_only connections; writes go
+    # through a single connection per process
+    SQLITE_SPLIT_READS = True
+    SQLITE_READ_POOL_SIZE = 5
     
     # Babel configuration for internationalization
     BABEL_DEFAULT_LOCALE = 'en'
     BABEL_SUPPORTED_LOCALES = ['en', 'pl']
     BABEL_TRANSLATION_DIRECTORIES = 'translations'
+    # Public pages are served under /en/... and /pl/...; when set, those not
+    # depending on the session get 'Cache-Control: public, max-age=N'
+    PUBLIC_CACHE_MAX_AGE = int(os.environ.get('PUBLIC_CACHE_MAX_AGE', 0))
     
     # Translation API Configuration
     DEEPL_API_KEY = os.environ.get('DEEPL_API_KEY', '')
@@ -37,16 +58,124 @@ class Config:
     # Pagination
     POSTS_PER_PAGE = 9
     
-    # Upload configuration (if needed in future)
+    # Bulk moderation - max ids per UPDATE/DELETE statement
+    BULK_MODERATION_BATCH_SIZE = 500
+    
+    # Post deletion - tombstone posts and purge them (with comments) in chunks
+    SOFT_DELETE_POSTS = os.environ.get('SOFT_DELETE_POSTS', 'True').lower() == 'true'
+    PURGE_IN_BACKGROUND = True
+    POST_PURGE_CHUNK_SIZE = 500
+    
+    # Exports - rows fetched per keyset query
+    EXPORT_CHUNK_SIZE = 1000
+    
+    # Bulk import - rows per multi-row INSERT/transaction
+    IMPORT_CHUNK_SIZE = 500
+    
+    # SQL instrumentation - per-request query counts and N+1 detection
+    SLOW_QUERY_THRESHOLD_MS = 100
+    N_PLUS_ONE_THRESHOLD = 5  # same statement with this many parameter sets (executions without QUERY_DEBUG_HEADERS)
+    QUERY_DEBUG_HEADERS = False  # X-Query-Count / X-Query-Time / Server-Timing
+    
+    # Metrics - /metrics for admins or 'Authorization: Bearer <METRICS_TOKEN>'
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+    METRICS_DIR = os.environ.get('METRICS_DIR')  # set for multi-worker (gunicorn) aggregation
+    METRICS_FLUSH_INTERVAL = 1.0  # seconds between per-worker snapshot writes
+    
+    # Logging - queued JSON records; console is text unless LOG_FORMAT=json
+    LOG_FORMAT = os.environ.get('LOG_FORMAT', 'text')
+    LOG_QUEUE = True  # write logs on a background listener thread
+    LOG_REQUESTS = os.environ.get('LOG_REQUESTS', 'False').lower() == 'true'
+    # Fraction of sub-WARNING records kept per logger (hot-path messages)
+    LOG_SAMPLING = {'flask_app.translation': 0.1}
+    
+    # Profiler - admins add ?_profile=1 (or X-Profile: 1) to profile a request
+    PROFILE_SAMPLE_EVERY = 0  # also profile every Nth request (0 = off)
+    PROFILE_HISTORY = 20  # profiles kept per worker
+    PROFILE_INTERVAL_MS = 5
+    
+    # Memory - tracemalloc snapshots at /admin/memory and worker recycling
+    MEMORY_TRACING = os.environ.get('MEMORY_TRACING', 'False').lower() == 'true'
+    MEMORY_TRACE_FRAMES = 10  # frames kept per traced allocation
+    MEMORY_SNAPSHOT_INTERVAL = int(os.environ.get('MEMORY_SNAPSHOT_INTERVAL', 0))  # seconds (0 = on demand only)
+    MEMORY_SNAPSHOT_HISTORY = 5  # snapshots kept per worker
+    MAX_WORKER_RSS_MB = int(os.environ.get('MAX_WORKER_RSS_MB', 0))  # recycle gunicorn workers above this (0 = off)
+    MEMORY_CHECK_EVERY = 100  # requests between RSS checks
+    
+    # Compression - gzip, and brotli when the Brotli package is installed,
+    # chosen by Accept-Encoding (turn off when a proxy compresses instead)
+    COMPRESSION_ENABLED = os.environ.get('COMPRESSION_ENABLED', 'True').lower() == 'true'
+    COMPRESSION_MIN_SIZE = 1024  # bytes; smaller bodies are sent as they are
+    COMPRESSION_MIMETYPES = {
+        'text/html', 'text/plain', 'text/css', 'text/csv', 'text/xml', 'application/json',
+        'application/x-ndjson', 'application/javascript', 'application/xml',
+        'application/rss+xml', 'application/atom+xml', 'image/svg+xml',
+    }
+    COMPRESSION_GZIP_LEVEL = 6
+    COMPRESSION_BROTLI_QUALITY = 5
+    COMPRESSION_CACHE_MB = 16  # compressed pages that are the same for every visitor
+    COMPRESSION_STREAM_SIZE = 1024 * 1024  # larger per-visitor bodies are compressed in chunks
+    
+    # Templates - compiled bytecode shared by workers through a directory
+    TEMPLATE_CACHE_DIR = os.environ.get('TEMPLATE_CACHE_DIR')  # None = compile in each worker
+    TEMPLATE_WARMUP = os.environ.get('TEMPLATE_WARMUP', 'False').lower() == 'true'  # load all templates at startup
+    
+    # Post content - sanitized HTML, word count and reading time made when a
+    # post is saved (content.py); text without HTML is Markdown when the
+    # markdown package is installed, else plain text
+    CONTENT_MARKDOWN = True
+    CONTENT_WORDS_PER_MINUTE = 200
+    
+    # Static assets - 'flask build-assets' writes fingerprinted copies, .gz/.br
+    # siblings and a manifest to static/dist, served as immutable
+    ASSETS_STATIC_DIR = None  # None = the app's static folder
+    ASSETS_MAX_AGE = 365 * 24 * 3600  # seconds fingerprinted files may be cached
+    
+    # Pre-rendering - published pages written as static HTML for the web
+    # server ('flask prerender'), refreshed after posts or comments change
+    PRERENDER_DIR = os.environ.get('PRERENDER_DIR')  # None = off
+    PRERENDER_JOBS = int(os.environ.get('PRERENDER_JOBS', 0))  # render processes for rebuilds (0 = CPUs)
+    PRERENDER_IN_BACKGROUND = True
+    SITE_URL = os.environ.get('SITE_URL', 'http://localhost')  # public origin for absolute links
+    
+    # Sitemap and feeds - /sitemap.xml and /<lang>/blog/{rss,atom}.xml, rebuilt
+    # per worker when the posts they list change
+    SITEMAP_MAX_URLS = 50000  # per sitemap file (the protocol's limit); more makes a sitemap index
+    FEED_POSTS = 20  # newest posts in each feed
+    FEEDS_CHECK_SECONDS = int(os.environ.get('FEEDS_CHECK_SECONDS', 10))  # how long a worker reuses what it read
+    FEEDS_CACHE_SIZE = 100  # documents kept per worker
+    
+    # Post cards - localized blog post view models cached per worker
+    POST_CARD_CACHE_SIZE = int(os.environ.get('POST_CARD_CACHE_SIZE', 2000))  # cards kept (0 = no cache)
+    
+    # Gunicorn (gunicorn.conf.py) - preloaded app shared copy-on-write by workers
+    SERVER_BIND = os.environ.get('SERVER_BIND', '0.0.0.0:8000')
+    SERVER_WORKERS = int(os.environ.get('SERVER_WORKERS', 0))  # 0 = 2 x CPUs + 1
+    SERVER_THREADS = int(os.environ.get('SERVER_THREADS', 1))  # more than 1 selects gthread
+    SERVER_WORKER_CLASS = os.environ.get('SERVER_WORKER_CLASS')  # override sync/gthread choice
+    SERVER_PRELOAD = os.environ.get('SERVER_PRELOAD', 'True').lower() == 'true'
+    SERVER_TIMEOUT = 30
+    SERVER_MAX_REQUESTS = int(os.environ.get('SERVER_MAX_REQUESTS', 0))  # recycle workers (0 = never)
+    SERVER_MAX_REQUESTS_JITTER = 50
+    
+    # Upload configuration (featured images, see images.py)
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
     UPLOAD_FOLDER = 'static/uploads'
-    ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
+    ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
+    IMAGE_MAX_PIXELS = 40_000_000  # larger images are refused
+    IMAGE_WIDTHS = (320, 640, 960, 1280, 1920)  # widths of the resized copies (needs Pillow)
+    IMAGE_FORMATS = ('webp', 'jpeg')  # formats of the resized copies
+    IMAGE_QUALITY = 80
+    IMAGE_WORKERS = int(os.environ.get('IMAGE_WORKERS', 1))  # resizing processes per worker (0 = CPUs)
+    IMAGES_IN_BACKGROUND = True
 
 
 class DevelopmentConfig(Config):
     """Development configuration"""
     DEBUG = True
     TESTING = False
+    QUERY_DEBUG_HEADERS = True
+    AUTO_CREATE_SCHEMA = True
 
 
 class ProductionConfig(Config):
@@ -57,6 +186,11 @@ class ProductionConfig(Config):
     # In production, these should be set via environment variables
     SECRET_KEY = os.environ.get('SECRET_KEY')
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL')
+    
+    # Fill with 'flask precompile-templates' at build time
+    TEMPLATE_CACHE_DIR = os.environ.get('TEMPLATE_CACHE_DIR') or \
+        os.path.join(Config.basedir, 'instance', 'jinja-cache')
+    TEMPLATE_WARMUP = os.environ.get('TEMPLATE_WARMUP', 'True').lower() == 'true'
 
 
 class TestingConfig(Config):
@@ -64,6 +198,23 @@ class TestingConfig(Config):
     TESTING = True
     WTF_CSRF_ENABLED = False
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    PURGE_IN_BACKGROUND = False
+    PRERENDER_IN_BACKGROUND = False
+    IMAGES_IN_BACKGROUND = False
+    SCHEMA_CHECK = False  # tests create tables per test case
+
+
+class BenchmarkConfig(Config):
+    """Benchmark configuration - production settings, forms accepted without CSRF"""
+    DEBUG = False
+    TESTING = False
+    WTF_CSRF_ENABLED = False
+    ENABLE_AUTO_TRANSLATION = False
+    PURGE_IN_BACKGROUND = False
+    LOG_LEVEL = 'WARNING'
+    QUERY_DEBUG_HEADERS = True
+    SQLALCHEMY_DATABASE_URI = os.environ.get('BENCHMARK_DATABASE_URL') or \
+        'sqlite:///' + os.path.join(Config.basedir, 'instance', 'benchmark.db')
 
 
 # Configuration dictionary
@@ -71,5 +222,6 @@ config = {
     'development': DevelopmentConfig,
     'production': ProductionConfig,
     'testing': TestingConfig,
+    'benchmark': BenchmarkConfig,
     'default': DevelopmentConfig
 }
\ No newline at end of file
@@ -0,0 +1,330 @@
+"""
+Post Content Rendering
+Sanitized HTML and reading statistics of post content, made when a post is saved
+
+Post content comes from the admin, from customers (customer_blog.py) and
+from DeepL (translate_html), so it cannot be output as it is. Whenever the
+content of a post changes - created, edited, submitted, translated or
+imported - it is rendered once into the content_html_*, word_count_* and
+reading_time_* columns, and the post page outputs that HTML without any
+work per view:
+
+- Content without HTML block tags is Markdown (with the markdown package
+  installed and CONTENT_MARKDOWN on) or plain text, whose blank-line
+  separated blocks become paragraphs and '- ' lines lists
+- The HTML is reduced to ALLOWED_TAGS and ALLOWED_ATTRIBUTES; scripts,
+  styles and embeds are dropped with their content, and links and images
+  keep http(s), mailto and relative URLs only
+- Headings get ids and a '#' link to themselves (h1 becomes h2: the page
+  title is the h1)
+- Words are counted in the text, reading time at CONTENT_WORDS_PER_MINUTE
+
+Bulk inserts skip ORM events, so they add rendered_columns() to their
+rows; 'flask render-content' renders posts saved before this existed.
+"""
+
+import importlib.util
+import math
+import re
+from html import escape
+from html.parser import HTMLParser
+from urllib.parse import urlsplit
+from flask import current_app, has_app_context
+from markupsafe import Markup
+from sqlalchemy import event, inspect, or_, select
+from logging_config import get_logger
+from models import db, slugify, BlogPost
+
+logger = get_logger('content')
+
+LANGUAGES = ('en', 'pl')
+
+ALLOWED_TAGS = frozenset({
+    'p', 'br', 'hr', 'h2', 'h3', 'h4', 'h5', 'h6', 'blockquote', 'pre', 'code',
+    'ul', 'ol', 'li', 'dl', 'dt', 'dd', 'strong', 'b', 'em', 'i', 'u', 's', 'del', 'ins',
+    'mark', 'small', 'sub', 'sup', 'abbr', 'a', 'img', 'figure', 'figcaption',
+    'table', 'caption', 'thead', 'tbody', 'tfoot', 'tr', 'th', 'td', 'span', 'div',
+})
+
+ALLOWED_ATTRIBUTES = {
+    'a': frozenset({'href', 'title'}),
+    'img': frozenset({'src', 'alt', 'title', 'width', 'height'}),
+    'abbr': frozenset({'title'}),
+    'ol': frozenset({'start'}),
+    'th': frozenset({'colspan', 'rowspan', 'scope'}),
+    'td': frozenset({'colspan', 'rowspan'}),
+}
+
+ALLOWED_SCHEMES = frozenset({'', 'http', 'https', 'mailto'})
+
+# Tags dropped together with everything inside them
+DROPPED_TAGS = frozenset({
+    'script', 'style', 'iframe', 'object', 'embed', 'template', 'noscript',
+    'textarea', 'select', 'svg', 'math', 'head', 'title',
+})
+
+# Tags renamed rather than dropped
+RENAMED_TAGS = {'h1': 'h2'}
+
+VOID_TAGS = frozenset({'br', 'hr', 'img'})
+HEADINGS = frozenset({'h2', 'h3', 'h4', 'h5', 'h6'})
+
+# Content with one of these is HTML, otherwise Markdown or plain text
+_HTML_BLOCK = re.compile(r'<(?:p|div|h[1-6]|ul|ol|blockquote|pre|table|figure|br)\b', re.IGNORECASE)
+_LIST_ITEM = re.compile(r'^\s*[-*]\s+')
+_WORD = re.compile(r'\w+(?:[\'’-]\w+)*')
+_URL_IGNORED = re.compile(r'[\x00-\x20\x7f]+')
+
+
+class _Sanitizer(HTMLParser):
+    """Rewrites HTML to the allowlist while counting words"""
+    
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.out = []
+        self.words = 0
+        self._open = []
+        self._dropping = 0
+        self._heading = None  # (depth, output index of the start tag, text parts)
+        self._ids = set()
+    
+    def handle_starttag(self, tag, attrs):
+        if tag in DROPPED_TAGS:
+            self._dropping += 1
+            return
+        tag = RENAMED_TAGS.get(tag, tag)
+        if self._dropping or tag not in ALLOWED_TAGS:
+            return
+        
+        allowed = ALLOWED_ATTRIBUTES.get(tag, ())
+        kept = []
+        for name, value in attrs:
+            if name not in allowed or value is None:
+                continue
+            if name in ('href', 'src') and not _safe_url(value):
+                continue
+            kept.append(f' {name}="{escape(value)}"')
+        
+        if tag in HEADINGS and self._heading is None:
+            self._heading = (len(self._open), len(self.out), [])
+        self.out.append(f"<{tag}{''.join(kept)}>")
+        if tag not in VOID_TAGS:
+            self._open.append(tag)
+    
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS:
+            self.handle_endtag(tag)
+    
+    def handle_endtag(self, tag):
+        if tag in DROPPED_TAGS:
+            self._dropping = max(self._dropping - 1, 0)
+            return
+        tag = RENAMED_TAGS.get(tag, tag)
+        if self._dropping or tag not in self._open:
+            return
+        # Close what was left open inside it
+        while self._open:
+            current = self._open.pop()
+            self._close(current)
+            if current == tag:
+                break
+    
+    def handle_data(self, data):
+        if self._dropping:
+            return
+        self.words += len(_WORD.findall(data))
+        if self._heading is not None:
+            self._heading[2].append(data)
+        self.out.append(escape(data, quote=False))
+    
+    def _close(self, tag):
+        if self._heading is not None and self._heading[0] == len(self._open):
+            _, index, text = self._heading
+            self._heading = None
+            anchor = self._anchor(''.join(text))
+            self.out[index] = self.out[index][:-1] + f' id="{anchor}">'
+            self.out.append(f'<a class="heading-anchor" href="#{anchor}" aria-hidden="true">#</a>')
+        self.out.append(f'</{tag}>')
+    
+    def _anchor(self, text):
+        """Unique id of a heading, from its text"""
+        base = slugify(' '.join(text.split())).strip('-') or 'section'
+        anchor, number = base, 1
+        while anchor in self._ids:
+            number += 1
+            anchor = f'{base}-{number}'
+        self._ids.add(anchor)
+        return anchor
+    
+    def result(self):
+        self.close()
+        while self._open:
+            self._close(self._open.pop())
+        return ''.join(self.out)
+
+
+def _safe_url(value):
+    """Whether a link or image URL uses an allowed scheme (or none)"""
+    try:
+        scheme = urlsplit(_URL_IGNORED.sub('', value)).scheme
+    except ValueError:
+        return False
+    return scheme.lower() in ALLOWED_SCHEMES
+
+
+def markdown_available():
+    """Whether the markdown package is installed (imported only when content is rendered)"""
+    return importlib.util.find_spec('markdown') is not None
+
+
+def _text_to_html(text):
+    """Plain text blocks as paragraphs, '- ' lines as lists (the text escaped)"""
+    blocks = []
+    for block in re.split(r'\n\s*\n', text.strip()):
+        lines = [escape(line.strip(), quote=False) for line in block.splitlines() if line.strip()]
+        if not lines:
+            continue
+        if all(_LIST_ITEM.match(line) for line in lines):
+            items = ''.join(f'<li>{_LIST_ITEM.sub("", line)}</li>' for line in lines)
+            blocks.append(f'<ul>{items}</ul>')
+        else:
+            blocks.append('<p>' + '<br>'.join(lines) + '</p>')
+    return '\n'.join(blocks)
+
+
+def sanitize_html(html):
+    """
+    Reduce HTML to the allowlist
+    
+    Returns:
+        (safe HTML, word count)
+    """
+    parser = _Sanitizer()
+    parser.feed(html)
+    return parser.result(), parser.words
+
+
+def render_content(text, markdown=None):
+    """
+    Render post content to safe HTML
+    
+    Args:
+        text: Content as saved (HTML, Markdown or plain text)
+        markdown: Treat text without HTML blocks as Markdown (default:
+            CONTENT_MARKDOWN, when the markdown package is installed)
+    
+    Returns:
+        (HTML, word count)
+    """
+    text = text or ''
+    if not _HTML_BLOCK.search(text):
+        if markdown is None:
+            markdown = has_app_context() and current_app.config.get('CONTENT_MARKDOWN', True)
+        if markdown and markdown_available():
+            import markdown as markdown_module
+            text = markdown_module.markdown(text, extensions=['extra', 'sane_lists'])
+        else:
+            text = _text_to_html(text)
+    return sanitize_html(text)
+
+
+def reading_time(words):
+    """Minutes to read a number of words (at least 1 for any text)"""
+    per_minute = current_app.config.get('CONTENT_WORDS_PER_MINUTE', 200) if has_app_context() else 200
+    return math.ceil(words / per_minute) if words else 0
+
+
+def rendered_columns(row):
+    """
+    Rendered column values for a post row's content
+    
+    Args:
+        row: Mapping with content_en and content_pl
+    
+    Returns:
+        Dict of content_html_*, word_count_* and reading_time_* values
+    """
+    columns = {}
+    for language in LANGUAGES:
+        html, words = render_content(row.get(f'content_{language}'))
+        columns[f'content_html_{language}'] = html
+        columns[f'word_count_{language}'] = words
+        columns[f'reading_time_{language}'] = reading_time(words)
+    return columns
+
+
+def render_post(post, languages=LANGUAGES):
+    """Set the rendered columns of a post for the given languages"""
+    for language in languages:
+        html, words = render_content(getattr(post, f'content_{language}'))
+        setattr(post, f'content_html_{language}', html)
+        setattr(post, f'word_count_{language}', words)
+        setattr(post, f'reading_time_{language}', reading_time(words))
+
+
+def content_html(post, language):
+    """Post content ready to output, rendered now for posts saved before rendering existed"""
+    html = getattr(post, f'content_html_{language}')
+    if html is None:
+        html = render_content(getattr(post, f'content_{language}'))[0]
+    return Markup(html)
+
+
+@event.listens_for(BlogPost, 'before_insert')
+@event.listens_for(BlogPost, 'before_update')
+def _render_on_save(mapper, connection, post):
+    """Render the languages whose content changed (or was never rendered)"""
+    state = inspect(post)
+    languages = [
+        language for language in LANGUAGES
+        if getattr(post, f'content_html_{language}') is None
+        or state.attrs[f'content_{language}'].history.has_changes()
+    ]
+    if languages:
+        render_post(post, languages)
+
+
+def render_pending(all_posts=False, chunk_size=500):
+    """
+    Render posts without rendered content, in chunks
+    
+    Args:
+        all_posts: Render every post again (after changing the allowlist
+            or CONTENT_MARKDOWN)
+        chunk_size: Posts per transaction
+    
+    Returns:
+        Number of posts rendered
+    """
+    query = select(BlogPost).order_by(BlogPost.id).limit(chunk_size)
+    if not all_posts:
+        query = query.where(or_(*(getattr(BlogPost, f'content_html_{language}').is_(None)
+                                  for language in LANGUAGES)))
+    rendered = 0
+    last_id = 0
+    while True:
+        posts = db.session.scalars(query.where(BlogPost.id > last_id)).all()
+        if not posts:
+            break
+        for post in posts:
+            render_post(post)
+        last_id = posts[-1].id
+        rendered += len(posts)
+        db.session.commit()
+    logger.info(f"Rendered the content of {rendered} post(s)")
+    return rendered
+
+
+def init_content(app):
+    """
+    Render post content when posts are saved
+    
+    The ORM events are registered when this module is imported; this
+    reports how text without HTML will be rendered.
+    
+    Args:
+        app: Flask application instance
+    """
+    if app.config.get('CONTENT_MARKDOWN', True) and not markdown_available():
+        logger.debug("markdown not installed: content without HTML is rendered as plain text")
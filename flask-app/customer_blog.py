@@ -3,30 +3,39 @@ Customer Blog Routes
 Allow customers to submit blog posts directly from the blog page
 """
 
-from flask import render_template, request, redirect, url_for, flash, session
-from models import db, BlogPost
+from flask import render_template, request, redirect, url_for, flash, session, make_response
+from models import db, BlogPost, TRANSLATION_PLACEHOLDERS, slugify
 from forms import CustomerBlogPostForm
+from i18n import LANGUAGE_PREFIX
 from datetime import datetime
 
 
 def register_customer_blog_routes(app):
     """Register customer blog submission routes"""
     
-    @app.route('/blog/submit', methods=['POST'])
+    @app.route(f'{LANGUAGE_PREFIX}/blog/submit', methods=['GET', 'POST'])
     def submit_blog_post():
         """
         Handle customer blog post submission
         Customers submit in ONE language only
+        
+        GET returns the form markup for the blog page to load when the
+        visitor opens it, so only they get a CSRF token (and a session
+        cookie), not every reader of the cacheable blog listing.
         """
         form = CustomerBlogPostForm()
         
+        if request.method == 'GET':
+            response = make_response(render_template('components/blog_submit_form.html', form=form))
+            response.cache_control.no_store = True
+            return response
+        
         if form.validate_on_submit():
             # Get the selected language
             language = form.language.data
             
             # Create slug from title
-            slug = form.title.data.lower().replace(' ', '-')
-            slug = ''.join(c for c in slug if c.isalnum() or c == '-')
+            slug = slugify(form.title.data)
             
             # Check if slug already exists
             existing = BlogPost.query.filter_by(slug=slug).first()
@@ -54,11 +63,11 @@ def register_customer_blog_routes(app):
             
             # Create post with pending status (requires admin approval)
             post = BlogPost(
-                title_en=title_en or 'Pending Translation',
-                title_pl=title_pl or 'Oczekuje na tłumaczenie',
+                title_en=title_en or TRANSLATION_PLACEHOLDERS['title_en'],
+                title_pl=title_pl or TRANSLATION_PLACEHOLDERS['title_pl'],
                 slug=slug,
-                content_en=content_en or 'Content pending translation',
-                content_pl=content_pl or 'Treść oczekuje na tłumaczenie',
+                content_en=content_en or TRANSLATION_PLACEHOLDERS['content_en'],
+                content_pl=content_pl or TRANSLATION_PLACEHOLDERS['content_pl'],
                 category_en=category_en,
                 category_pl=category_pl,
                 status='pending',  # Requires admin approval
@@ -0,0 +1,172 @@
+"""
+Database Engine Configuration
+SQLite pragmas, read-only connections for request reads and a single writer
+"""
+
+from flask import has_request_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.sql.elements import TextClause
+
+# Bind key of the query_only engine serving reads during requests
+READ_BIND = 'read'
+
+
+def sqlite_file(uri):
+    """Path of a file-backed SQLite URI, or None (other databases, :memory:)"""
+    if not uri:
+        return None
+    url = make_url(uri)
+    if url.get_backend_name() != 'sqlite' or url.database in (None, '', ':memory:'):
+        return None
+    return url.database
+
+
+def sqlite_pragmas(app, read_only=False):
+    """
+    PRAGMA statements run on every new connection
+    
+    Settings left at None keep SQLite's default. journal_mode is stored
+    in the database file; the others only last for the connection.
+    
+    Args:
+        app: Flask application instance
+        read_only: Add query_only, so a write on this connection fails
+    
+    Returns:
+        List of (pragma, value) tuples
+    """
+    mmap_mb = app.config.get('SQLITE_MMAP_SIZE_MB')
+    cache_mb = app.config.get('SQLITE_CACHE_SIZE_MB')
+    pragmas = [
+        ('journal_mode', app.config.get('SQLITE_JOURNAL_MODE')),
+        ('synchronous', app.config.get('SQLITE_SYNCHRONOUS')),
+        ('busy_timeout', app.config.get('SQLITE_BUSY_TIMEOUT_MS')),
+        ('mmap_size', mmap_mb * 1024 * 1024 if mmap_mb is not None else None),
+        # A negative cache_size is in KiB rather than pages
+        ('cache_size', -cache_mb * 1024 if cache_mb is not None else None),
+    ]
+    if read_only:
+        pragmas.append(('query_only', 'ON'))
+    return [(name, value) for name, value in pragmas if value is not None]
+
+
+def configure_engines(app):
+    """
+    Set engine options and the read bind before the engines are created
+    
+    Call before db.init_app(). For a SQLite file with SQLITE_SPLIT_READS,
+    the default engine becomes the writer: one pooled connection per
+    process, so threads queue for it instead of competing for the
+    database lock, and other processes wait up to SQLITE_BUSY_TIMEOUT_MS.
+    A second engine (READ_BIND) holds SQLITE_READ_POOL_SIZE query_only
+    connections to the same file.
+    
+    Args:
+        app: Flask application instance
+    
+    Returns:
+        True if reads are split from writes
+    """
+    uri = app.config.get('SQLALCHEMY_DATABASE_URI')
+    if sqlite_file(uri) is None or not app.config.get('SQLITE_SPLIT_READS', True):
+        return False
+    
+    timeout = (app.config.get('SQLITE_BUSY_TIMEOUT_MS') or 5000) / 1000
+    # Copied: the dicts may be shared class attributes of the config
+    options = dict(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    options.setdefault('pool_size', 1)
+    options.setdefault('max_overflow', 0)
+    options.setdefault('pool_timeout', timeout)
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+    
+    binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+    binds.setdefault(READ_BIND, {
+        'url': uri,
+        'pool_size': app.config.get('SQLITE_READ_POOL_SIZE', 5),
+        'max_overflow': app.config.get('SQLITE_READ_POOL_SIZE', 5),
+    })
+    app.config['SQLALCHEMY_BINDS'] = binds
+    return True
+
+
+def init_engines(app, db):
+    """
+    Apply SQLite pragmas and transaction handling to the created engines
+    
+    With reads split, the pysqlite driver's own transaction handling is
+    switched off and SQLAlchemy emits BEGIN itself: reads get a plain
+    (deferred) BEGIN, the writer BEGIN IMMEDIATE. Taking the write lock
+    up front means a writer waits in busy_timeout for another writer
+    instead of failing with 'database is locked' when its read
+    transaction could not be upgraded.
+    
+    Call within an app context, after db.init_app().
+    
+    Args:
+        app: Flask application instance
+        db: The SQLAlchemy extension
+    """
+    # The read bind serves the default metadata's tables. Flask-SQLAlchemy
+    # creates an (empty) metadata for every bind, shared by all apps, and
+    # create_all()/drop_all() would then expect the bind in apps without one
+    db.metadatas.pop(READ_BIND, None)
+    
+    split = READ_BIND in db.engines
+    for key, engine in db.engines.items():
+        if key not in (None, READ_BIND) or sqlite_file(str(engine.url)) is None:
+            continue
+        read_only = key == READ_BIND
+        pragmas = sqlite_pragmas(app, read_only=read_only)
+        
+        def set_pragmas(dbapi_connection, connection_record, pragmas=pragmas):
+            if split:
+                dbapi_connection.isolation_level = None
+            cursor = dbapi_connection.cursor()
+            for name, value in pragmas:
+                cursor.execute(f'PRAGMA {name}={value}')
+            cursor.close()
+        
+        event.listen(engine, 'connect', set_pragmas)
+        if split:
+            begin = 'BEGIN' if read_only else 'BEGIN IMMEDIATE'
+            
+            def begin_transaction(conn, begin=begin):
+                # On the driver connection, like pysqlite's own BEGIN, so it
+                # is not counted as a query by the instrumentation
+                conn.connection.driver_connection.execute(begin)
+            
+            event.listen(engine, 'begin', begin_transaction)
+
+
+def _is_write(clause):
+    """INSERT/UPDATE/DELETE, or raw SQL that might be one"""
+    return clause is not None and (getattr(clause, 'is_dml', False) or isinstance(clause, TextClause))
+
+
+class RoutingSession(Session):
+    """
+    Session sending reads made during a request to the read-only engine
+    
+    Statements go to READ_BIND (when configured) until the transaction
+    writes: a flush or an INSERT/UPDATE/DELETE goes to the writer, and so
+    does every later statement of that transaction, so it reads its own
+    changes. Outside requests (CLI, scripts, background threads) all
+    statements use the writer.
+    """
+    
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_request_context() and READ_BIND in self._db.engines:
+            if self._flushing or _is_write(clause):
+                self.info['writing'] = True
+            elif not self.info.get('writing'):
+                return self._db.engines[READ_BIND]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, 'after_transaction_end')
+def _end_writing(session, transaction):
+    """Route the next transaction's reads to the read engine again"""
+    if transaction.parent is None:
+        session.info.pop('writing', None)
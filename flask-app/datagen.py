@@ -0,0 +1,336 @@
+"""
+Synthetic Data Generator
+Deterministic large-scale datasets for load, scaling and query-plan tests
+"""
+
+import os
+import random
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import func, select
+from models import db, BlogPost, Comment, ContactInquiry, create_schema
+from content import rendered_columns
+from logging_config import get_logger
+
+logger = get_logger('datagen')
+
+# Named dataset sizes
+PRESETS = {
+    'small': {'posts': 1000, 'comments': 20000, 'inquiries': 1000},
+    'medium': {'posts': 10000, 'comments': 1000000, 'inquiries': 20000},
+    'large': {'posts': 100000, 'comments': 10000000, 'inquiries': 100000},
+}
+
+# Timestamps are spread over a fixed window so output does not depend on "now"
+BASE_DATE = datetime(2023, 1, 1)
+DATE_SPAN_DAYS = 730
+
+WORDS_EN = (
+    'study exam student university lecture notes thesis research library course '
+    'semester grade essay project deadline tutor seminar review practice method '
+    'learning skill focus plan schedule goal success question answer method chapter '
+    'reading writing memory habit progress result group support advice guide'
+).split()
+
+WORDS_PL = (
+    'nauka egzamin student uczelnia wykład notatki praca badania biblioteka kurs '
+    'semestr ocena esej projekt termin korepetytor seminarium powtórka ćwiczenie '
+    'metoda umiejętność skupienie plan harmonogram cel sukces pytanie odpowiedź '
+    'rozdział czytanie pisanie pamięć nawyk postęp wynik grupa wsparcie porada'
+).split()
+
+CATEGORIES = [
+    ('Guides', 'Przewodniki'),
+    ('Tips & Advice', 'Porady i wskazówki'),
+    ('Announcements', 'Ogłoszenia'),
+    ('Exams', 'Egzaminy'),
+    ('Student Life', 'Życie studenckie'),
+    ('Research', 'Badania'),
+]
+
+# (value, cumulative weight) tables
+POST_STATUSES = [('published', 0.80), ('draft', 0.90), ('pending', 0.97), ('archived', 1.0)]
+COMMENT_STATUSES = [('approved', 0.70), ('pending', 0.90), ('rejected', 0.95), ('spam', 1.0)]
+INQUIRY_STATUSES = [('new', 0.40), ('in_progress', 0.55), ('replied', 0.80), ('resolved', 1.0)]
+
+
+def _pick(rng, table):
+    """Pick a value from a cumulative weight table"""
+    roll = rng.random()
+    for value, threshold in table:
+        if roll < threshold:
+            return value
+    return table[-1][0]
+
+
+def _sentence(rng, words, count):
+    """Build a capitalised pseudo-sentence"""
+    text = ' '.join(rng.choices(words, k=count))
+    return text[0].upper() + text[1:] + '.'
+
+
+def _paragraphs(rng, words, paragraphs, sentences=5):
+    """Build HTML paragraphs of pseudo-text"""
+    return '\n'.join(
+        '<p>' + ' '.join(_sentence(rng, words, rng.randint(6, 14)) for _ in range(sentences)) + '</p>'
+        for _ in range(paragraphs)
+    )
+
+
+def _timestamp(rng):
+    """Random timestamp inside the fixed generation window"""
+    return BASE_DATE + timedelta(seconds=rng.randrange(DATE_SPAN_DAYS * 86400))
+
+
+def _ip(rng, index):
+    """Deterministic IPv4 address for a pool index"""
+    return f"10.{(index >> 16) & 255}.{(index >> 8) & 255}.{index & 255}"
+
+
+def generate_posts(rng, count, paragraphs=3):
+    """
+    Yield bilingual post rows with explicit ids 1..count
+    
+    Args:
+        rng: random.Random instance
+        count: Number of posts
+        paragraphs: Paragraphs of content per language
+    
+    Yields:
+        Dict per post row
+    """
+    for post_id in range(1, count + 1):
+        category_en, category_pl = CATEGORIES[rng.randrange(len(CATEGORIES))]
+        status = _pick(rng, POST_STATUSES)
+        created_at = _timestamp(rng)
+        is_customer_post = status == 'pending' or rng.random() < 0.1
+        
+        row = {
+            'id': post_id,
+            'title_en': _sentence(rng, WORDS_EN, rng.randint(3, 8))[:-1],
+            'title_pl': _sentence(rng, WORDS_PL, rng.randint(3, 8))[:-1],
+            'slug': f'post-{post_id}',
+            'content_en': _paragraphs(rng, WORDS_EN, paragraphs),
+            'content_pl': _paragraphs(rng, WORDS_PL, paragraphs),
+            'excerpt_en': _sentence(rng, WORDS_EN, 20),
+            'excerpt_pl': _sentence(rng, WORDS_PL, 20),
+            'category_en': category_en,
+            'category_pl': category_pl,
+            'status': status,
+            'is_customer_post': is_customer_post,
+            'customer_language': rng.choice(('en', 'pl')) if is_customer_post else None,
+            'customer_name': f'Customer {post_id}' if is_customer_post else None,
+            'views_count': int(rng.paretovariate(1.2) * 10),
+            'created_at': created_at,
+            'updated_at': created_at,
+            'published_at': (
+                created_at + timedelta(hours=rng.randint(1, 72)) if status == 'published' else None
+            ),
+        }
+        # Bulk inserts skip the ORM event that renders content on save
+        row.update(rendered_columns(row))
+        yield row
+
+
+def generate_comments(rng, count, post_count, ip_pool=None):
+    """
+    Yield comment rows spread unevenly over posts 1..post_count
+    
+    A few posts receive most comments and a small set of IPs sends
+    most spam, as in real traffic.
+    
+    Args:
+        rng: random.Random instance
+        count: Number of comments
+        post_count: Number of posts to attach comments to
+        ip_pool: Number of distinct commenter IPs (default: count // 20)
+    
+    Yields:
+        Dict per comment row
+    """
+    ip_pool = ip_pool or max(count // 20, 1)
+    spam_ips = max(ip_pool // 100, 1)
+    
+    for comment_id in range(1, count + 1):
+        status = _pick(rng, COMMENT_STATUSES)
+        created_at = _timestamp(rng)
+        ip_index = rng.randrange(spam_ips) if status == 'spam' else rng.randrange(ip_pool)
+        named = rng.random() < 0.6
+        
+        yield {
+            'id': comment_id,
+            # Squaring the roll skews comments towards low post ids
+            'post_id': 1 + int(post_count * rng.random() ** 2),
+            'author_name': f'Reader {ip_index}' if named else None,
+            'author_email': f'reader{ip_index}@example.com' if named and rng.random() < 0.5 else None,
+            'content': _sentence(rng, rng.choice((WORDS_EN, WORDS_PL)), rng.randint(8, 40)),
+            'rating': rng.randint(1, 5) if rng.random() < 0.6 else None,
+            'status': status,
+            'ip_address': _ip(rng, ip_index),
+            'created_at': created_at,
+            'updated_at': created_at,
+        }
+
+
+def generate_inquiries(rng, count):
+    """
+    Yield contact inquiry rows
+    
+    Args:
+        rng: random.Random instance
+        count: Number of inquiries
+    
+    Yields:
+        Dict per inquiry row
+    """
+    for inquiry_id in range(1, count + 1):
+        status = _pick(rng, INQUIRY_STATUSES)
+        created_at = _timestamp(rng)
+        replied = status in ('replied', 'resolved')
+        
+        yield {
+            'id': inquiry_id,
+            'name': f'Contact {inquiry_id}',
+            'email': f'contact{inquiry_id}@example.com',
+            'phone': f'+48 {rng.randint(500000000, 899999999)}' if rng.random() < 0.4 else None,
+            'subject': _sentence(rng, WORDS_EN, rng.randint(3, 8)),
+            'message': _sentence(rng, WORDS_EN, rng.randint(20, 80)),
+            'status': status,
+            'admin_reply': _sentence(rng, WORDS_EN, 15) if replied else None,
+            'replied_at': created_at + timedelta(days=1) if replied else None,
+            'subscribe_newsletter': rng.random() < 0.3,
+            'ip_address': _ip(rng, rng.randrange(max(count, 1))),
+            'created_at': created_at,
+            'updated_at': created_at,
+            'resolved_at': created_at + timedelta(days=2) if status == 'resolved' else None,
+        }
+
+
+def _bulk_insert(conn, model, rows, chunk_size):
+    """Insert rows with one executemany per chunk, committing each chunk"""
+    table = model.__table__
+    inserted = 0
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            conn.execute(table.insert(), chunk)
+            conn.commit()
+            inserted += len(chunk)
+            chunk = []
+    if chunk:
+        conn.execute(table.insert(), chunk)
+        conn.commit()
+        inserted += len(chunk)
+    return inserted
+
+
+def generate_dataset(posts=1000, comments=20000, inquiries=1000, seed=42,
+                     chunk_size=10000, paragraphs=3):
+    """
+    Fill an empty database with a deterministic synthetic dataset
+    
+    The same arguments always produce the same rows, so generated
+    databases can be reused as fixtures. Call within an app context.
+    
+    Args:
+        posts: Number of blog posts
+        comments: Number of comments
+        inquiries: Number of contact inquiries
+        seed: Random seed
+        chunk_size: Rows per INSERT/transaction
+        paragraphs: Paragraphs of content per post language
+    
+    Returns:
+        Dict with row counts per table and elapsed seconds
+    
+    Raises:
+        ValueError: If the database already contains data
+    """
+    for model in (BlogPost, Comment, ContactInquiry):
+        if db.session.scalar(select(func.count()).select_from(model)):
+            raise ValueError(f'{model.__tablename__} is not empty; generate into an empty database')
+    
+    db.session.commit()
+    
+    started = time.perf_counter()
+    rng = random.Random(seed)
+    conn = db.engine.connect()
+    relaxed = {'foreign_keys': 0, 'synchronous': 0, 'cache_size': -65536}
+    saved = {}
+    # These pragmas cannot change inside a transaction, so they go straight
+    # to the driver connection rather than through SQLAlchemy (which begins one)
+    driver_connection = conn.connection.driver_connection
+    try:
+        if conn.dialect.name == 'sqlite':
+            # Generated ids are consistent by construction, and a half-written
+            # fixture is thrown away anyway, so skip FK checks and fsyncs
+            for pragma, value in relaxed.items():
+                saved[pragma] = driver_connection.execute(f'PRAGMA {pragma}').fetchone()[0]
+                driver_connection.execute(f'PRAGMA {pragma}={value}')
+        
+        stats = {'posts': _bulk_insert(conn, BlogPost, generate_posts(rng, posts, paragraphs), chunk_size)}
+        stats['comments'] = _bulk_insert(
+            conn, Comment, generate_comments(rng, comments, posts), chunk_size
+        ) if posts else 0
+        stats['inquiries'] = _bulk_insert(
+            conn, ContactInquiry, generate_inquiries(rng, inquiries), chunk_size
+        )
+    finally:
+        # Restore the pooled connection's settings
+        conn.rollback()
+        for pragma, value in saved.items():
+            driver_connection.execute(f'PRAGMA {pragma}={value}')
+        conn.close()
+    stats['seconds'] = round(time.perf_counter() - started, 2)
+    
+    logger.info(
+        f"Generated {stats['posts']} posts, {stats['comments']} comments and "
+        f"{stats['inquiries']} inquiries in {stats['seconds']}s (seed {seed})"
+    )
+    return stats
+
+
+def fixture_path(posts, comments, inquiries, seed=42, directory=None):
+    """Path of the cached fixture database for a given dataset size and seed"""
+    directory = directory or os.path.join(os.path.dirname(__file__), 'instance', 'fixtures')
+    return os.path.join(directory, f'dataset-p{posts}-c{comments}-i{inquiries}-s{seed}.db')
+
+
+def ensure_fixture_database(posts=1000, comments=20000, inquiries=1000, seed=42, directory=None):
+    """
+    Return a SQLite fixture database, generating it on first use
+    
+    Benchmarks and query-plan tests point SQLALCHEMY_DATABASE_URI at the
+    returned path instead of regenerating data on every run.
+    
+    Returns:
+        Absolute path of the SQLite file
+    """
+    path = fixture_path(posts, comments, inquiries, seed, directory)
+    if os.path.exists(path):
+        return path
+    
+    from app import create_app
+    from config import TestingConfig
+    
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    partial = path + '.partial'
+    if os.path.exists(partial):
+        os.remove(partial)
+    
+    fixture_config = type('FixtureConfig', (TestingConfig,), {
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + partial
+    })
+    app = create_app(fixture_config)
+    with app.app_context():
+        create_schema()
+        generate_dataset(posts, comments, inquiries, seed)
+        db.session.remove()
+        # Closing every connection also checkpoints and removes a WAL file
+        for engine in db.engines.values():
+            engine.dispose()
+    
+    # Only publish complete fixtures
+    os.replace(partial, path)
+    return path
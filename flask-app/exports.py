@@ -0,0 +1,227 @@
+"""
+Data Export
+Stream inquiries, comments and posts as CSV or NDJSON (optionally gzipped)
+"""
+
+import csv
+import json
+import zlib
+from datetime import datetime
+from flask import Response, request, stream_with_context, abort
+from sqlalchemy import select
+from models import db, BlogPost, Comment, ContactInquiry
+
+
+# Columns written for each dataset, in output order
+EXPORT_DATASETS = {
+    'inquiries': (ContactInquiry, [
+        'id', 'name', 'email', 'phone', 'subject', 'message', 'status',
+        'subscribe_newsletter', 'admin_reply', 'replied_at', 'ip_address',
+        'created_at', 'updated_at', 'resolved_at'
+    ]),
+    'comments': (Comment, [
+        'id', 'post_id', 'author_name', 'author_email', 'content', 'rating',
+        'status', 'ip_address', 'created_at', 'updated_at'
+    ]),
+    'posts': (BlogPost, [
+        'id', 'slug', 'title_en', 'title_pl', 'excerpt_en', 'excerpt_pl',
+        'category_en', 'category_pl', 'content_en', 'content_pl', 'status',
+        'is_customer_post', 'customer_language', 'customer_name',
+        'customer_email', 'views_count', 'created_at', 'updated_at', 'published_at'
+    ]),
+}
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def export_criteria(dataset, status_filter='all', ip_address=None, phrase=None, newsletter=False):
+    """
+    Build filter criteria matching the admin list filters
+    
+    Args:
+        dataset: 'inquiries', 'comments' or 'posts'
+        status_filter: Status value or 'all'
+        ip_address: Comment IP address (comments only)
+        phrase: Text the comment must contain (comments only)
+        newsletter: Only newsletter subscribers (inquiries only)
+    
+    Returns:
+        List of SQLAlchemy filter expressions
+    """
+    if dataset == 'comments':
+        from admin import comment_filter_criteria
+        return comment_filter_criteria(status_filter, ip_address, phrase)
+    
+    model = EXPORT_DATASETS[dataset][0]
+    criteria = []
+    if status_filter and status_filter != 'all':
+        criteria.append(model.status == status_filter)
+    if dataset == 'inquiries' and newsletter:
+        criteria.append(ContactInquiry.subscribe_newsletter.is_(True))
+    if dataset == 'posts':
+        criteria.append(BlogPost.deleted_at.is_(None))
+    return criteria
+
+
+def iter_export_rows(dataset, criteria=None, chunk_size=1000):
+    """
+    Yield rows of a dataset as dicts using keyset pagination
+    
+    Each chunk is a separate short read (``WHERE id > last_id LIMIT n``)
+    and the session is released in between, so memory stays constant and
+    no transaction is held open while the client downloads.
+    
+    Args:
+        dataset: Name of a dataset in EXPORT_DATASETS
+        criteria: List of filter expressions
+        chunk_size: Rows fetched per query
+    
+    Yields:
+        Dict of column name to value
+    """
+    model, columns = EXPORT_DATASETS[dataset]
+    selected = [getattr(model, column) for column in columns]
+    last_id = 0
+    
+    while True:
+        rows = db.session.execute(
+            select(*selected)
+            .where(model.id > last_id, *(criteria or []))
+            .order_by(model.id)
+            .limit(chunk_size)
+        ).mappings().all()
+        db.session.close()
+        
+        if not rows:
+            return
+        
+        for row in rows:
+            yield row
+        last_id = rows[-1]['id']
+
+
+def _serialize(value):
+    """Convert column values to plain text/JSON types"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+class _Echo:
+    """File-like object that hands back what csv.writer writes"""
+    
+    def write(self, value):
+        return value
+
+
+def csv_stream(rows, columns):
+    """Yield CSV text: a header line, then one line per row"""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(columns)
+    for row in rows:
+        yield writer.writerow([_serialize(row[column]) for column in columns])
+
+
+def ndjson_stream(rows, columns):
+    """Yield one JSON object per line"""
+    for row in rows:
+        yield json.dumps(
+            {column: _serialize(row[column]) for column in columns},
+            ensure_ascii=False
+        ) + '\n'
+
+
+def encode_stream(chunks, compress=False, flush_bytes=65536):
+    """
+    Encode text chunks as UTF-8, optionally gzip-compressed
+    
+    Output is buffered up to ``flush_bytes`` so the client receives a
+    reasonable number of larger writes instead of one per row.
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+    buffer = []
+    size = 0
+    
+    for chunk in chunks:
+        data = chunk.encode('utf-8')
+        if compressor:
+            data = compressor.compress(data)
+        if data:
+            buffer.append(data)
+            size += len(data)
+        if size >= flush_bytes:
+            yield b''.join(buffer)
+            buffer, size = [], 0
+    
+    if compressor:
+        buffer.append(compressor.flush())
+    if buffer:
+        yield b''.join(buffer)
+
+
+def generate_export(dataset, fmt='csv', criteria=None, compress=False, chunk_size=1000):
+    """
+    Generate an export as a stream of bytes
+    
+    Args:
+        dataset: Name of a dataset in EXPORT_DATASETS
+        fmt: 'csv' or 'ndjson'
+        criteria: List of filter expressions
+        compress: Gzip the output
+        chunk_size: Rows fetched per query
+    
+    Returns:
+        Generator of bytes
+    """
+    columns = EXPORT_DATASETS[dataset][1]
+    rows = iter_export_rows(dataset, criteria, chunk_size)
+    text = csv_stream(rows, columns) if fmt == 'csv' else ndjson_stream(rows, columns)
+    return encode_stream(text, compress=compress)
+
+
+def register_export_routes(app):
+    """Register admin export routes"""
+    from admin import admin_required
+    
+    @app.route('/admin/export/<dataset>.<fmt>')
+    @admin_required
+    def admin_export(dataset, fmt):
+        """
+        Stream a dataset as CSV or NDJSON
+        
+        Query parameters mirror the admin list filters (status, ip, q,
+        newsletter); gzip=1 compresses the download.
+        """
+        if dataset not in EXPORT_DATASETS or fmt not in EXPORT_FORMATS:
+            abort(404)
+        
+        criteria = export_criteria(
+            dataset,
+            status_filter=request.args.get('status', 'all'),
+            ip_address=request.args.get('ip', '').strip(),
+            phrase=request.args.get('q', '').strip(),
+            newsletter=request.args.get('newsletter', type=int) == 1
+        )
+        compress = request.args.get('gzip', type=int) == 1
+        
+        filename = f"{dataset}-{datetime.utcnow().strftime('%Y%m%d%H%M%S')}.{fmt}"
+        if compress:
+            filename += '.gz'
+        
+        stream = generate_export(
+            dataset,
+            fmt,
+            criteria,
+            compress=compress,
+            chunk_size=app.config.get('EXPORT_CHUNK_SIZE', 1000)
+        )
+        
+        response = Response(
+            stream_with_context(stream),
+            mimetype='application/gzip' if compress else EXPORT_FORMATS[fmt]
+        )
+        response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
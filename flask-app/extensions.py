@@ -3,12 +3,11 @@ Flask Extensions
 Initialize all Flask extensions
 """
 
-from flask_migrate import Migrate
+import click
 from flask_babel import Babel
 from flask_wtf.csrf import CSRFProtect
 
 # Initialize extensions
-migrate = Migrate()
 babel = Babel()
 csrf = CSRFProtect()
 
@@ -19,30 +18,23 @@ def init_extensions(app):
     """
     from models import db
     
-    # Initialize migrations (db already initialized in models.py)
-    migrate.init_app(app, db)
+    # Initialize migrations (db already initialized in models.py). Flask-Migrate
+    # imports Alembic (~0.15s), which only 'flask db ...' commands need, so
+    # skip it when the app is not being loaded by the Flask CLI
+    if click.get_current_context(silent=True) is not None:
+        from flask_migrate import Migrate
+        Migrate(app, db)
     
     # Initialize CSRF protection
     csrf.init_app(app)
     
     # Initialize Babel for i18n
     babel.init_app(app, locale_selector=get_locale)
-    
-    print("✓ All extensions initialized")
 
 
 def get_locale():
     """
-    Determine the user's preferred locale
+    Determine the locale: the page's URL prefix, else Accept-Language
     """
-    from flask import session, request
-    
-    # Check if language is set in session
-    if 'language' in session:
-        return session['language']
-    
-    # Try to get from request
-    from flask import current_app
-    return request.accept_languages.best_match(
-        current_app.config['BABEL_SUPPORTED_LOCALES']
-    )
\ No newline at end of file
+    from i18n import current_language
+    return current_language()
\ No newline at end of file
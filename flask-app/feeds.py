@@ -0,0 +1,309 @@
+"""
+Sitemap and Feeds
+/sitemap.xml and per-language RSS/Atom feeds of the published posts
+
+Documents are built from columns-only queries (no post content, no ORM
+objects) and kept per worker with the version of the data they list: a
+signature of the post ids and updated_at values. A request reads the
+current version with one small query (trusted for FEEDS_CHECK_SECONDS)
+and rebuilds a document only when its version changed, so publishing or
+editing a post rebuilds the feeds and the one sitemap shard that list
+it. The version is sent as ETag and the newest updated_at as
+Last-Modified, so polling clients mostly get 304 Not Modified without a
+document being touched.
+
+Above SITEMAP_MAX_URLS URLs, /sitemap.xml becomes a sitemap index of
+/sitemap-<n>.xml shards, each listing a fixed range of post ids.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import timezone
+from email.utils import format_datetime
+from flask import Response, abort, current_app, g, render_template, request, url_for
+from sqlalchemy import func, select
+from werkzeug.http import is_resource_modified
+from i18n import LANGUAGE_PREFIX
+from models import db, BlogPost
+from prerender import is_prerendering
+
+# Localized pages listed in the sitemap besides the posts
+SITEMAP_PAGES = ('index', 'services', 'blog', 'contact')
+
+FEED_MIMETYPES = {
+    'rss': 'application/rss+xml',
+    'atom': 'application/atom+xml',
+}
+
+
+class FeedCache:
+    """
+    Sitemap and feed documents of one worker, with the versions they were built from
+    
+    Args:
+        maxsize: Documents kept (least recently used dropped first)
+        check_seconds: How long a version read from the database is reused
+    """
+    
+    def __init__(self, maxsize=100, check_seconds=10):
+        self.maxsize = maxsize
+        self.check_seconds = check_seconds
+        self.hits = 0
+        self.misses = 0
+        self._documents = OrderedDict()
+        self._versions = {}
+        self._lock = threading.Lock()
+    
+    def __len__(self):
+        return len(self._documents)
+    
+    def check(self, key, query, fresh=False):
+        """
+        Result of a version query, reused for check_seconds
+        
+        Args:
+            key: What the query describes
+            query: Callable reading it from the database
+            fresh: Query even if a recent result is kept
+        """
+        now = time.monotonic()
+        with self._lock:
+            checked = self._versions.get(key)
+        if checked is not None and not fresh and now - checked[0] < self.check_seconds:
+            return checked[1]
+        value = query()
+        with self._lock:
+            self._versions[key] = (now, value)
+        return value
+    
+    def document(self, key, version, build):
+        """Document body for a version, built on a miss"""
+        with self._lock:
+            entry = self._documents.get(key)
+            if entry is not None and entry[0] == version:
+                self._documents.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        
+        body = build().encode('utf-8')
+        with self._lock:
+            self._documents[key] = (version, body)
+            self._documents.move_to_end(key)
+            while len(self._documents) > self.maxsize:
+                self._documents.popitem(last=False)
+        return body
+    
+    def clear(self):
+        """Drop every document and version"""
+        with self._lock:
+            self._documents.clear()
+            self._versions.clear()
+
+
+def posts_per_shard(config):
+    """Posts one sitemap file can list: each is a URL per language"""
+    locales = config['BABEL_SUPPORTED_LOCALES']
+    urls = config.get('SITEMAP_MAX_URLS', 50000) - len(SITEMAP_PAGES) * len(locales)
+    return max(urls // len(locales), 1)
+
+
+def _published():
+    return (BlogPost.status == 'published', BlogPost.deleted_at.is_(None))
+
+
+def _signature(parts):
+    return hashlib.blake2b(repr(parts).encode(), digest_size=12).hexdigest()
+
+
+def _iso(value):
+    return value.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def _rfc822(value):
+    return format_datetime(value.replace(tzinfo=timezone.utc))
+
+
+def sitemap_shards(per_shard):
+    """
+    Published posts per sitemap shard (post id // per_shard)
+    
+    Returns:
+        Dict of shard -> (post count, newest updated_at)
+    """
+    shard = (BlogPost.id // per_shard).label('shard')
+    rows = db.session.execute(
+        select(shard, func.count(BlogPost.id), func.max(BlogPost.updated_at))
+        .where(*_published())
+        .group_by(shard)
+    )
+    return {number: (count, latest) for number, count, latest in rows}
+
+
+def feed_posts(language, limit):
+    """Newest published posts as rows of the columns a feed shows"""
+    return db.session.execute(
+        select(
+            BlogPost.id, BlogPost.slug,
+            getattr(BlogPost, f'title_{language}').label('title'),
+            getattr(BlogPost, f'excerpt_{language}').label('excerpt'),
+            getattr(BlogPost, f'category_{language}').label('category'),
+            func.coalesce(BlogPost.published_at, BlogPost.created_at).label('published'),
+            BlogPost.updated_at,
+        )
+        .where(*_published())
+        .order_by(BlogPost.published_at.desc())
+        .limit(limit)
+    ).all()
+
+
+def _sitemap_entries(shard, per_shard):
+    """(URLs by language, lastmod) for the pages and posts of a sitemap file"""
+    locales = current_app.config['BABEL_SUPPORTED_LOCALES']
+    entries = []
+    if shard in (None, 0):
+        for endpoint in SITEMAP_PAGES:
+            urls = {code: url_for(endpoint, lang_code=code, _external=True) for code in locales}
+            entries.append((urls, None))
+    
+    query = select(BlogPost.slug, BlogPost.updated_at).where(*_published()).order_by(BlogPost.id)
+    if shard is not None:
+        query = query.where(BlogPost.id >= shard * per_shard, BlogPost.id < (shard + 1) * per_shard)
+    for slug, updated_at in db.session.execute(query):
+        urls = {code: url_for('blog_post', slug=slug, lang_code=code, _external=True) for code in locales}
+        entries.append((urls, _iso(updated_at) if updated_at else None))
+    return entries
+
+
+def _feed_items(rows, language):
+    return [
+        {
+            'title': row.title,
+            'url': url_for('blog_post', slug=row.slug, lang_code=language, _external=True),
+            'summary': row.excerpt,
+            'category': row.category,
+            'published': row.published,
+            'updated': row.updated_at or row.published,
+        }
+        for row in rows
+    ]
+
+
+def send_document(key, version, last_modified, build, mimetype):
+    """
+    Respond with a cached document, or 304 when the client has this version
+    
+    Args:
+        key: Cache key of the document (without the site URL)
+        version: Signature of the data it lists (the ETag)
+        last_modified: Newest updated_at it lists, or None
+        build: Callable rendering the document
+        mimetype: Response type
+    """
+    cache = current_app.extensions['feeds']
+    if last_modified is not None:
+        last_modified = last_modified.replace(tzinfo=timezone.utc, microsecond=0)
+    
+    if not is_resource_modified(request.environ, etag=version, last_modified=last_modified):
+        response = Response(status=304)
+    else:
+        # Absolute URLs depend on the host the document is requested from
+        response = Response(cache.document((request.url_root,) + key, version, build), mimetype=mimetype)
+    response.set_etag(version)
+    response.last_modified = last_modified
+    response.cache_control.public = True
+    response.cache_control.max_age = cache.check_seconds
+    return response
+
+
+def _feeds_collector(cache):
+    """Collector reporting the feed cache statistics"""
+    def collect():
+        labels = {'cache': 'feeds'}
+        return [
+            ('flask_app_cache_entries', labels, len(cache)),
+            ('flask_app_cache_hits_total', labels, cache.hits),
+            ('flask_app_cache_misses_total', labels, cache.misses),
+        ]
+    return collect
+
+
+def register_feed_routes(app):
+    """
+    Register /sitemap.xml, its shards and the per-language blog feeds
+    
+    Args:
+        app: Flask application instance
+    """
+    cache = FeedCache(app.config.get('FEEDS_CACHE_SIZE', 100), app.config.get('FEEDS_CHECK_SECONDS', 10))
+    app.extensions['feeds'] = cache
+    per_shard = posts_per_shard(app.config)
+    
+    registry = app.extensions.get('metrics')
+    if registry is not None:
+        registry.register_collector(_feeds_collector(cache))
+    
+    def shards():
+        # Pre-rendering follows a commit, which the kept version predates
+        return cache.check('sitemap', lambda: sitemap_shards(per_shard), fresh=is_prerendering())
+    
+    @app.route('/sitemap.xml')
+    def sitemap():
+        """Sitemap of every public page, or an index of shards on large sites"""
+        stats = shards()
+        last_modified = max((latest for _, latest in stats.values() if latest), default=None)
+        version = _signature(sorted(stats.items()))
+        
+        if sum(count for count, _ in stats.values()) <= per_shard:
+            return send_document(('sitemap',), version, last_modified, lambda: render_template(
+                'feeds/sitemap.xml', entries=_sitemap_entries(None, per_shard)
+            ), 'application/xml')
+        
+        # Shard 0 also lists the pages that are not posts
+        numbers = sorted(set(stats) | {0})
+        return send_document(('sitemap', 'index'), version, last_modified, lambda: render_template(
+            'feeds/sitemap_index.xml',
+            shards=[(url_for('sitemap_shard', shard=number, _external=True),
+                     _iso(stats[number][1]) if number in stats and stats[number][1] else None)
+                    for number in numbers]
+        ), 'application/xml')
+    
+    @app.route('/sitemap-<int:shard>.xml')
+    def sitemap_shard(shard):
+        """One file of a sharded sitemap"""
+        stats = shards()
+        if sum(count for count, _ in stats.values()) <= per_shard or (shard not in stats and shard != 0):
+            abort(404)
+        count, latest = stats.get(shard, (0, None))
+        return send_document(('sitemap', shard), _signature((shard, count, latest)), latest, lambda: render_template(
+            'feeds/sitemap.xml', entries=_sitemap_entries(shard, per_shard)
+        ), 'application/xml')
+    
+    @app.route(f'{LANGUAGE_PREFIX}/blog/<any(rss, atom):kind>.xml')
+    def blog_feed(kind):
+        """RSS 2.0 or Atom feed of the newest posts in the page's language"""
+        language = g.lang_code
+        rows = cache.check(
+            ('feed', language),
+            lambda: feed_posts(language, current_app.config.get('FEED_POSTS', 20)),
+            fresh=is_prerendering()
+        )
+        version = _signature([(row.id, row.updated_at) for row in rows])
+        last_modified = max((row.updated_at for row in rows if row.updated_at), default=None)
+        
+        def build():
+            items = _feed_items(rows, language)
+            updated = max((item['updated'] for item in items), default=None)
+            return render_template(
+                f'feeds/{kind}.xml',
+                items=items,
+                feed_url=url_for('blog_feed', kind=kind, _external=True),
+                blog_url=url_for('blog', _external=True),
+                updated=updated,
+                iso=_iso,
+                rfc822=_rfc822
+            )
+        
+        return send_document(('feed', language, kind), version, last_modified, build, FEED_MIMETYPES[kind])
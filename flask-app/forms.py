@@ -4,6 +4,7 @@ All form definitions and validators
 """
 
 from flask_wtf import FlaskForm
+from flask_wtf.file import FileField
 from wtforms import StringField, TextAreaField, BooleanField, SelectField, IntegerField
 from wtforms.validators import DataRequired, Email, Optional, Length, NumberRange
 
@@ -217,6 +218,9 @@ class BlogPostForm(FlaskForm):
         validators=[Optional(), Length(max=500)]
     )
     
+    # Checked and stored by images.ImageStore; replaces featured_image
+    featured_image_file = FileField('Upload Featured Image')
+    
     status = SelectField(
         'Status',
         choices=[
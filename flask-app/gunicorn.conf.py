@@ -0,0 +1,91 @@
+"""
+Gunicorn Configuration
+Production server settings, read automatically by gunicorn from this directory
+
+Run with: gunicorn wsgi:app
+
+The application is preloaded in the master process (SERVER_PRELOAD) so
+workers share its memory copy-on-write. Before forking, long-lived
+objects are moved out of the garbage collector's reach with gc.freeze(),
+so collections in the workers do not write to (and thereby copy) the
+shared pages. Each worker then drops the database connections it
+inherited from the master. Server settings come from the SERVER_* values
+of the configuration selected by FLASK_CONFIG.
+
+With METRICS_DIR set, the master starts the metrics from zero and folds
+the snapshot file of each worker that exits into the retired totals.
+"""
+
+import gc
+import multiprocessing
+import os
+# Imported under another name: gunicorn reads every module-level name that
+# matches one of its settings, and 'config' is one
+import config as app_config
+
+settings = app_config.config.get(os.environ.get('FLASK_CONFIG'), app_config.Config)
+
+wsgi_app = 'wsgi:app'
+bind = settings.SERVER_BIND
+workers = settings.SERVER_WORKERS or multiprocessing.cpu_count() * 2 + 1
+threads = settings.SERVER_THREADS
+worker_class = settings.SERVER_WORKER_CLASS or ('gthread' if threads > 1 else 'sync')
+preload_app = settings.SERVER_PRELOAD
+timeout = settings.SERVER_TIMEOUT
+graceful_timeout = settings.SERVER_TIMEOUT
+max_requests = settings.SERVER_MAX_REQUESTS
+max_requests_jitter = settings.SERVER_MAX_REQUESTS_JITTER
+
+
+def _flask_app(server):
+    """The loaded Flask application (only call once it is loaded)"""
+    return server.app.wsgi()
+
+
+def on_starting(server):
+    """Drop the metrics snapshots of a previous server run"""
+    if settings.METRICS_DIR:
+        from metrics import clear_snapshots
+        clear_snapshots(settings.METRICS_DIR)
+
+
+def when_ready(server):
+    """Master is up, with the application loaded when preloading"""
+    if not server.cfg.preload_app:
+        return
+    from models import db
+    
+    # Connections opened while creating the app (schema check) must not be
+    # shared with workers
+    with _flask_app(server).app_context():
+        for engine in db.engines.values():
+            engine.dispose()
+    gc.collect()
+    gc.freeze()
+    server.log.info(f"Preloaded application; {gc.get_freeze_count()} objects frozen")
+
+
+def pre_fork(server, worker):
+    """Freeze whatever the master allocated since the last fork"""
+    if server.cfg.preload_app:
+        gc.freeze()
+
+
+def post_fork(server, worker):
+    """Give each preloaded worker its own connection pool"""
+    if not server.cfg.preload_app:
+        return
+    from models import db
+    
+    # close=False: the master's connections belong to the master; just
+    # forget them here so this worker opens its own
+    with _flask_app(server).app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+
+
+def child_exit(server, worker):
+    """Fold an exited worker's metrics into the retired totals"""
+    if settings.METRICS_DIR:
+        from metrics import retire_snapshots
+        retire_snapshots(settings.METRICS_DIR, worker.pid)
@@ -0,0 +1,147 @@
+"""
+Language URLs
+Public pages live under /<language>/..., so the URL alone selects the language
+
+The same URL always returns the same HTML, whoever asks, which lets a
+reverse proxy or CDN cache public pages without varying on cookies.
+"""
+
+import re
+from urllib.parse import urlsplit
+from flask import g, request, redirect, current_app, has_request_context, session, url_for
+from werkzeug.routing import BaseConverter
+
+# Prefix of every language-specific (public) route
+LANGUAGE_PREFIX = '/<lang:lang_code>'
+
+# Names shown in the language switcher, in their own language
+LANGUAGE_NAMES = {'en': 'English', 'pl': 'Polski'}
+
+
+def preferred_language():
+    """Best Accept-Language match among the supported locales, else the default"""
+    config = current_app.config
+    if has_request_context():
+        match = request.accept_languages.best_match(config['BABEL_SUPPORTED_LOCALES'])
+        if match:
+            return match
+    return config['BABEL_DEFAULT_LOCALE']
+
+
+def current_language():
+    """Language of the current page: its URL prefix, else Accept-Language"""
+    return g.get('lang_code') or preferred_language()
+
+
+def is_localized(endpoint):
+    """Whether an endpoint's URL carries the language prefix"""
+    return endpoint is not None and current_app.url_map.is_endpoint_expecting(endpoint, 'lang_code')
+
+
+def redirect_to_language():
+    """
+    Redirect an unprefixed public URL to its version in the visitor's language
+    
+    The language comes from Accept-Language, so the redirect varies on
+    that header and nothing else.
+    """
+    path = request.full_path if request.query_string else request.path
+    response = redirect(f'{request.script_root}/{preferred_language()}{path}')
+    response.vary.add('Accept-Language')
+    return response
+
+
+def alternate_urls():
+    """
+    The current page in every supported language
+    
+    Pages without a language (admin, errors) link to the homepages.
+    
+    Returns:
+        Dict of language code -> absolute URL, in BABEL_SUPPORTED_LOCALES order
+    """
+    locales = current_app.config['BABEL_SUPPORTED_LOCALES']
+    if not is_localized(request.endpoint):
+        return {code: url_for('index', lang_code=code, _external=True) for code in locales}
+    
+    values = request.args.to_dict(flat=False)
+    values.update(request.view_args or {})
+    return {
+        code: url_for(request.endpoint, _external=True, **dict(values, lang_code=code))
+        for code in locales
+    }
+
+
+def default_url():
+    """Absolute unprefixed URL of the current page (hreflang x-default)"""
+    path = request.path[len(f'/{g.lang_code}'):] or '/'
+    query = f'?{request.query_string.decode()}' if request.query_string else ''
+    return f'{request.host_url.rstrip("/")}{request.script_root}{path}{query}'
+
+
+def switch_language_url(url, language):
+    """
+    Local path of a URL with its language prefix replaced
+    
+    Only the path and query of url are kept, so the result never points
+    to another site.
+    """
+    parts = urlsplit(url or '/')
+    path = parts.path
+    if request.script_root and path.startswith(request.script_root):
+        path = path[len(request.script_root):]
+    path = path.lstrip('/')
+    first, _, rest = path.partition('/')
+    if first not in current_app.config['BABEL_SUPPORTED_LOCALES']:
+        rest = path
+    return f'{request.script_root}/{language}/{rest}' + (f'?{parts.query}' if parts.query else '')
+
+
+def init_language_urls(app):
+    """
+    Route public pages by language prefix
+    
+    Registers the 'lang' URL converter (call before the public routes
+    are added). Views of localized routes do not receive lang_code: it
+    is moved to g.lang_code, and url_for() fills it in from there, so
+    templates keep calling url_for('blog') and stay in the page's
+    language. With PUBLIC_CACHE_MAX_AGE set, localized GET responses
+    that did not use the session are marked publicly cacheable.
+    
+    Args:
+        app: Flask application instance
+    """
+    locales = app.config['BABEL_SUPPORTED_LOCALES']
+    
+    class LanguageConverter(BaseConverter):
+        regex = '|'.join(re.escape(code) for code in locales)
+    
+    app.url_map.converters['lang'] = LanguageConverter
+    max_age = app.config.get('PUBLIC_CACHE_MAX_AGE', 0)
+    
+    @app.url_value_preprocessor
+    def pull_language(endpoint, values):
+        if values and 'lang_code' in values:
+            g.lang_code = values.pop('lang_code')
+    
+    @app.url_defaults
+    def add_language(endpoint, values):
+        if 'lang_code' not in values and is_localized(endpoint):
+            values['lang_code'] = current_language()
+    
+    @app.context_processor
+    def inject_language_urls():
+        return dict(alternate_urls=alternate_urls, default_url=default_url, language_names=LANGUAGE_NAMES)
+    
+    @app.after_request
+    def localized_response_headers(response):
+        lang_code = g.get('lang_code')
+        if lang_code is None:
+            return response
+        response.headers['Content-Language'] = lang_code
+        # session.accessed: the page depended on the visitor's cookie
+        if (max_age and request.method in ('GET', 'HEAD') and response.status_code == 200
+                and not session.accessed and 'Cache-Control' not in response.headers):
+            response.cache_control.public = True
+            response.cache_control.max_age = max_age
+        return response
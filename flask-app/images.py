@@ -0,0 +1,415 @@
+"""
+Images
+Uploaded featured images stored by content hash, with resized variants
+
+An upload is checked (extension, the format its bytes really have, size
+in pixels) and stored once under a hash of its content in UPLOAD_FOLDER,
+so uploading a file twice stores it once and a URL never changes what it
+shows: uploads are served as immutable. Resized WebP and JPEG copies
+(IMAGE_WIDTHS) are then made with Pillow in a process pool, off the
+request; until they exist pages show the original. When they are done,
+the posts showing the image are touched (updated_at), which refreshes
+their cards and pre-rendered pages.
+
+Templates render images with the picture() macro
+(components/picture.html): srcset/sizes per format, width/height against
+layout shift and loading="lazy". Without Pillow, uploads are stored and
+shown at their own size, with no variants.
+"""
+
+import hashlib
+import importlib.util
+import multiprocessing
+import os
+import re
+import struct
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from flask import send_from_directory, url_for
+from sqlalchemy import select, update
+from assets import write_atomic
+from logging_config import get_logger
+from models import db, BlogPost, UploadedImage
+from security import validate_file_upload
+
+logger = get_logger('images')
+
+# File extension and MIME type of each stored format
+EXTENSIONS = {'jpeg': 'jpg', 'png': 'png', 'gif': 'gif', 'webp': 'webp'}
+MIMETYPES = {'jpeg': 'image/jpeg', 'png': 'image/png', 'gif': 'image/gif', 'webp': 'image/webp'}
+
+# Encoder settings of the variant formats (Pillow save() options)
+SAVE_OPTIONS = {
+    'jpeg': {'optimize': True, 'progressive': True},
+    'webp': {'method': 4},
+}
+
+# Uploaded file name in a featured_image URL
+_UPLOAD_URL = re.compile(r'/uploads/([0-9a-f]{20}\.(?:jpg|png|gif|webp))$')
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def pillow_available():
+    """Whether Pillow is installed (imported only by the variant workers)"""
+    return importlib.util.find_spec('PIL') is not None
+
+
+def image_info(data):
+    """
+    Format and size of an image, read from its header
+    
+    Args:
+        data: File contents
+    
+    Returns:
+        (format, width, height), or None when data is not a PNG, JPEG,
+        GIF or WebP image
+    """
+    if data[:8] == b'\x89PNG\r\n\x1a\n' and data[12:16] == b'IHDR':
+        if len(data) < 24:
+            return None
+        width, height = struct.unpack('>II', data[16:24])
+        return 'png', width, height
+    if data[:6] in (b'GIF87a', b'GIF89a'):
+        if len(data) < 10:
+            return None
+        width, height = struct.unpack('<HH', data[6:10])
+        return 'gif', width, height
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        chunk = data[12:16]
+        if chunk == b'VP8 ' and len(data) >= 30:
+            width, height = struct.unpack('<HH', data[26:30])
+            return 'webp', width & 0x3FFF, height & 0x3FFF
+        if chunk == b'VP8L' and len(data) >= 25:
+            bits = int.from_bytes(data[21:25], 'little')
+            return 'webp', (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+        if chunk == b'VP8X' and len(data) >= 30:
+            return 'webp', int.from_bytes(data[24:27], 'little') + 1, int.from_bytes(data[27:30], 'little') + 1
+        return None
+    if data[:2] == b'\xff\xd8':
+        # Walk the segments to the frame header (SOFn) holding the size
+        offset = 2
+        while offset + 9 <= len(data):
+            if data[offset] != 0xFF:
+                return None
+            marker = data[offset + 1]
+            if marker == 0xFF:  # fill byte
+                offset += 1
+                continue
+            if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:  # no length
+                offset += 2
+                continue
+            length = struct.unpack('>H', data[offset + 2:offset + 4])[0]
+            if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+                height, width = struct.unpack('>HH', data[offset + 5:offset + 9])
+                return 'jpeg', width, height
+            offset += 2 + length
+    return None
+
+
+def make_variants(source, directory, key, widths, formats, quality):
+    """
+    Write resized copies of an image (runs in a pool process)
+    
+    Copies are made for each width below the image's own, plus one at
+    its own width when that is under the largest; EXIF rotation is
+    applied first. Animated images get no copies.
+    
+    Args:
+        source: Path of the original
+        directory: Output directory
+        key: Content hash, the prefix of every file name
+        widths: Target widths in pixels
+        formats: Output formats ('webp', 'jpeg')
+        quality: Encoder quality (1-100)
+    
+    Returns:
+        Dict with width and height (after rotation) and variants
+        ([width, height, format, filename] each)
+    """
+    from PIL import Image, ImageOps
+    
+    with Image.open(source) as original:
+        if getattr(original, 'is_animated', False):
+            return {'width': original.width, 'height': original.height, 'variants': []}
+        image = ImageOps.exif_transpose(original)
+        image.load()
+    width, height = image.size
+    
+    targets = sorted({target for target in widths if target < width} | {min(width, max(widths))})
+    variants = []
+    for target in targets:
+        size = (target, max(1, round(height * target / width)))
+        resized = image if size == image.size else image.resize(size, Image.Resampling.LANCZOS)
+        has_alpha = resized.mode in ('RGBA', 'LA') or 'transparency' in resized.info
+        for fmt in formats:
+            frame = resized
+            if fmt == 'jpeg' and has_alpha:
+                # JPEG has no transparency: flatten onto white
+                frame = Image.new('RGB', resized.size, (255, 255, 255))
+                frame.paste(resized.convert('RGBA'), mask=resized.convert('RGBA').getchannel('A'))
+            elif frame.mode not in ('RGB', 'RGBA'):
+                frame = frame.convert('RGBA' if has_alpha and fmt != 'jpeg' else 'RGB')
+            filename = f'{key}-{target}.{EXTENSIONS[fmt]}'
+            path = os.path.join(directory, filename)
+            temporary = f'{path}.{os.getpid()}.tmp'
+            frame.save(temporary, format=fmt.upper(), quality=quality, **SAVE_OPTIONS.get(fmt, {}))
+            os.replace(temporary, path)
+            variants.append([target, size[1], fmt, filename])
+    return {'width': width, 'height': height, 'variants': variants}
+
+
+def _executor(workers):
+    """Process pool shared by the threads of this worker, started on first use"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: forking a threaded server process is not safe
+            _pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn'))
+        return _pool
+
+
+class ResponsiveImage:
+    """
+    What an <img> needs to show an image at the right size
+    
+    Attributes:
+        url: Fallback src (a mid-sized JPEG copy, else the image itself)
+        width, height: Intrinsic size, or None for images not uploaded here
+        srcset: JPEG copies by width for the <img>, or ''
+        sources: (MIME type, srcset) of the other formats, for <source>
+    """
+    
+    __slots__ = ('url', 'width', 'height', 'srcset', 'sources')
+    
+    def __init__(self, url, width=None, height=None, srcset='', sources=()):
+        self.url = url
+        self.width = width
+        self.height = height
+        self.srcset = srcset
+        self.sources = sources
+    
+    def __repr__(self):
+        return f'<ResponsiveImage {self.url}>'
+
+
+class ImageStore:
+    """
+    Stores uploads and makes their variants
+    
+    Args:
+        app: Flask application instance
+    """
+    
+    def __init__(self, app):
+        self.app = app
+        config = app.config
+        self.directory = os.path.join(app.root_path, config.get('UPLOAD_FOLDER', 'static/uploads'))
+        self.allowed_extensions = config.get('ALLOWED_EXTENSIONS', set(EXTENSIONS))
+        self.max_pixels = config.get('IMAGE_MAX_PIXELS', 40_000_000)
+        self.widths = tuple(config.get('IMAGE_WIDTHS', (320, 640, 960, 1280, 1920)))
+        self.formats = tuple(config.get('IMAGE_FORMATS', ('webp', 'jpeg')))
+        self.quality = config.get('IMAGE_QUALITY', 80)
+        self.workers = config.get('IMAGE_WORKERS', 1) or os.cpu_count() or 1
+        self.background = config.get('IMAGES_IN_BACKGROUND', True)
+        self.resize = pillow_available() and bool(self.widths) and bool(self.formats)
+    
+    def save(self, upload):
+        """
+        Validate and store an uploaded file, and start making its variants
+        
+        Call within an app context.
+        
+        Args:
+            upload: werkzeug FileStorage
+        
+        Returns:
+            UploadedImage (the existing one when the same file was uploaded before)
+        
+        Raises:
+            ValueError: The file is not an allowed image
+        """
+        if not validate_file_upload(upload.filename, self.allowed_extensions):
+            raise ValueError(f"Allowed file types: {', '.join(sorted(self.allowed_extensions))}")
+        data = upload.read()
+        info = image_info(data)
+        allowed_formats = {'jpeg' if ext in ('jpg', 'jpeg') else ext for ext in self.allowed_extensions}
+        if info is None or info[0] not in allowed_formats:
+            raise ValueError('The file is not a valid PNG, JPEG, GIF or WebP image')
+        fmt, width, height = info
+        if not width or not height or width * height > self.max_pixels:
+            raise ValueError(f'Images may have at most {self.max_pixels // 1_000_000} megapixels')
+        
+        key = hashlib.blake2b(data, digest_size=10).hexdigest()
+        image = db.session.scalar(select(UploadedImage).filter_by(key=key))
+        if image is not None:
+            if image.status == 'failed':
+                self.process(image)
+            return image
+        
+        filename = f'{key}.{EXTENSIONS[fmt]}'
+        write_atomic(os.path.join(self.directory, filename), data)
+        image = UploadedImage(
+            key=key, filename=filename, format=fmt, width=width, height=height, size=len(data),
+            variants=[], status='processing' if self.resize else 'ready'
+        )
+        db.session.add(image)
+        db.session.commit()
+        logger.info(f"Stored upload {upload.filename!r} as {filename} ({width}x{height}, {len(data)} bytes)")
+        if self.resize:
+            self.process(image)
+        return image
+    
+    def process(self, image, background=None):
+        """
+        Make an image's variants
+        
+        Args:
+            image: UploadedImage
+            background: In the process pool (default: IMAGES_IN_BACKGROUND),
+                else right away in this thread
+        """
+        args = (os.path.join(self.directory, image.filename), self.directory, image.key,
+                self.widths, self.formats, self.quality)
+        if not (self.background if background is None else background):
+            try:
+                result = make_variants(*args)
+            except Exception as e:
+                self._finish(image.key, None, e)
+            else:
+                self._finish(image.key, result)
+            return
+        
+        future = _executor(self.workers).submit(make_variants, *args)
+        future.add_done_callback(lambda done, key=image.key: self._finish_in_context(key, done))
+    
+    def _finish_in_context(self, key, future):
+        with self.app.app_context():
+            try:
+                error = future.exception()
+                self._finish(key, None if error else future.result(), error)
+            except Exception as e:
+                logger.error(f"Recording variants of image {key} failed: {e}")
+            finally:
+                db.session.remove()
+    
+    def _finish(self, key, result, error=None):
+        """Record the variants and touch the posts showing the image"""
+        image = db.session.scalar(select(UploadedImage).filter_by(key=key))
+        if image is None:
+            return
+        if error is not None:
+            image.status = 'failed'
+            logger.error(f"Making variants of {image.filename} failed: {error}")
+        else:
+            image.width, image.height = result['width'], result['height']
+            image.variants = result['variants']
+            image.status = 'ready'
+            # New updated_at: cards and pre-rendered pages are built again
+            db.session.execute(
+                update(BlogPost)
+                .where(BlogPost.featured_image.endswith(f'/uploads/{image.filename}'))
+                .values(updated_at=datetime.utcnow())
+            )
+            logger.info(f"Made {len(image.variants)} variants of {image.filename}")
+        db.session.commit()
+    
+    def url(self, image):
+        """URL of the original, as stored in BlogPost.featured_image"""
+        return url_for('upload', filename=image.filename)
+
+
+def responsive_image(url):
+    """
+    ResponsiveImage for a featured_image URL
+    
+    Uploaded images get their variants and size (one query); other URLs
+    are shown as they are.
+    
+    Args:
+        url: featured_image value (may be empty)
+    
+    Returns:
+        ResponsiveImage, or None without a URL
+    """
+    if not url:
+        return None
+    match = _UPLOAD_URL.search(url)
+    if match is None:
+        return ResponsiveImage(url)
+    image = db.session.scalar(select(UploadedImage).filter_by(filename=match.group(1)))
+    if image is None:
+        return ResponsiveImage(url)
+    
+    by_format = {}
+    for width, _, fmt, filename in image.variants or ():
+        by_format.setdefault(fmt, []).append((width, url_for('upload', filename=filename)))
+    jpeg = by_format.pop('jpeg', [])
+    # Fallback for browsers without srcset: the largest copy up to 960px
+    fallback = [variant_url for width, variant_url in jpeg if width <= 960]
+    return ResponsiveImage(
+        fallback[-1] if fallback else url,
+        image.width,
+        image.height,
+        srcset=', '.join(f'{variant_url} {width}w' for width, variant_url in jpeg),
+        sources=tuple(
+            (MIMETYPES[fmt], ', '.join(f'{variant_url} {width}w' for width, variant_url in variants))
+            for fmt, variants in by_format.items()
+        ),
+    )
+
+
+def process_pending(app, all_images=False):
+    """
+    Make the variants that are missing, in this process
+    
+    For images still 'processing' when their worker stopped, 'failed'
+    ones, or every image (all_images) after IMAGE_WIDTHS or
+    IMAGE_FORMATS changed.
+    
+    Returns:
+        Dict with processed and failed counts
+    """
+    store = app.extensions['images']
+    if not store.resize:
+        raise ValueError('Pillow is not installed, so no variants can be made')
+    query = select(UploadedImage).order_by(UploadedImage.id)
+    if not all_images:
+        query = query.where(UploadedImage.status != 'ready')
+    
+    counts = {'processed': 0, 'failed': 0}
+    for image in db.session.scalars(query).all():
+        store.process(image, background=False)
+        counts['failed' if image.status == 'failed' else 'processed'] += 1
+    return counts
+
+
+def init_images(app):
+    """
+    Serve uploads and keep the image store in app.extensions['images']
+    
+    Files under UPLOAD_FOLDER are served at /static/uploads/ with
+    'Cache-Control: public, max-age=ASSETS_MAX_AGE, immutable': their
+    names are content hashes.
+    
+    Args:
+        app: Flask application instance
+    """
+    store = ImageStore(app)
+    app.extensions['images'] = store
+    max_age = app.config.get('ASSETS_MAX_AGE', 31536000)
+    
+    @app.route(f'{app.static_url_path}/uploads/<path:filename>', endpoint='upload')
+    def upload(filename):
+        response = send_from_directory(store.directory, filename, max_age=max_age)
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        return response
+    
+    app.add_template_global(responsive_image)
+    
+    if not store.resize:
+        logger.debug("Pillow not installed: uploaded images are shown without resized variants")
@@ -0,0 +1,302 @@
+"""
+Bulk Import
+Load blog posts from CSV or NDJSON with chunked multi-row inserts
+"""
+
+import csv
+import gzip
+import json
+import threading
+import time
+from datetime import datetime
+from flask import render_template, request, redirect, url_for, flash
+from sqlalchemy import insert, select
+from models import db, BlogPost, TRANSLATION_PLACEHOLDERS, slugify
+from content import rendered_columns
+from logging_config import get_logger
+
+logger = get_logger('imports')
+
+# Record fields copied into BlogPost columns
+IMPORT_FIELDS = (
+    'title_en', 'title_pl', 'slug', 'content_en', 'content_pl',
+    'excerpt_en', 'excerpt_pl', 'category_en', 'category_pl',
+    'featured_image', 'status', 'published_at', 'created_at'
+)
+
+IMPORT_STATUSES = ('draft', 'published', 'pending', 'archived')
+
+
+def _decoded_lines(stream, errors):
+    """Lines of a binary stream as text, noting the ones that are not UTF-8 in errors"""
+    for number, raw in enumerate(stream, start=1):
+        try:
+            yield raw.decode('utf-8')
+        except UnicodeDecodeError as e:
+            errors.append(ValueError(f"line {number}: not valid UTF-8 ({e.reason})"))
+
+
+def read_records(stream, fmt, compressed=False):
+    """
+    Read post records from a binary stream
+    
+    A line that cannot be decoded or parsed does not stop the import: it
+    is yielded as a ValueError naming the line, and reading goes on.
+    
+    Args:
+        stream: Binary file object
+        fmt: 'csv' or 'ndjson'
+        compressed: Stream is gzip-compressed
+    
+    Yields:
+        Dict per record, or ValueError per unreadable line
+    """
+    if compressed:
+        stream = gzip.GzipFile(fileobj=stream)
+    
+    try:
+        if fmt == 'csv':
+            errors = []
+            for record in csv.DictReader(_decoded_lines(stream, errors)):
+                yield from errors
+                errors.clear()
+                yield record
+            yield from errors
+        else:
+            for number, raw in enumerate(stream, start=1):
+                if not raw.strip():
+                    continue
+                try:
+                    record = json.loads(raw.decode('utf-8'))
+                except ValueError as e:  # UnicodeDecodeError, JSONDecodeError
+                    record = ValueError(f"line {number}: {e}")
+                yield record
+    except (OSError, EOFError, csv.Error) as e:
+        # Corrupt gzip data or a CSV that cannot be split into records
+        yield ValueError(f"file could not be read past this point: {e}")
+
+
+def detect_format(filename):
+    """Guess the import format from a file name"""
+    name = filename.lower()
+    if name.endswith('.gz'):
+        name = name[:-3]
+    return 'csv' if name.endswith('.csv') else 'ndjson'
+
+
+def _parse_datetime(value):
+    """Parse an ISO 8601 timestamp, passing through None and datetimes"""
+    if not value or isinstance(value, datetime):
+        return value or None
+    return datetime.fromisoformat(value)
+
+
+def _unique_slug(base, taken):
+    """Return base, or base-2, base-3, ... whichever is not in taken"""
+    slug = base
+    suffix = 2
+    while slug in taken:
+        slug = f"{base}-{suffix}"
+        suffix += 1
+    taken.add(slug)
+    return slug
+
+
+def build_post_row(record, taken_slugs, default_status='draft', now=None):
+    """
+    Turn an import record into a BlogPost row dict
+    
+    Args:
+        record: Dict read from the import file
+        taken_slugs: Set of slugs already used (updated in place)
+        default_status: Status for records without one
+        now: Timestamp for created/updated/published defaults
+    
+    Returns:
+        Tuple of (row dict, source language needing translation or None)
+    
+    Raises:
+        ValueError: If the record has no title or content in any language
+    """
+    now = now or datetime.utcnow()
+    row = {field: (record.get(field) or None) for field in IMPORT_FIELDS}
+    
+    has_en = bool(row['title_en'] and row['content_en'])
+    has_pl = bool(row['title_pl'] and row['content_pl'])
+    if not (has_en or has_pl):
+        raise ValueError('record needs a title and content in at least one language')
+    
+    # One-language records get placeholders, like customer submissions
+    source_language = None
+    if has_en != has_pl:
+        source_language = 'en' if has_en else 'pl'
+        missing = 'pl' if has_en else 'en'
+        for field in ('title', 'content'):
+            row[f'{field}_{missing}'] = TRANSLATION_PLACEHOLDERS[f'{field}_{missing}']
+    
+    row['status'] = row['status'] if row['status'] in IMPORT_STATUSES else default_status
+    title = row['title_en'] if has_en else row['title_pl']
+    row['slug'] = _unique_slug(slugify(row['slug'] or title), taken_slugs)
+    row['created_at'] = _parse_datetime(row['created_at']) or now
+    row['published_at'] = _parse_datetime(row['published_at'])
+    if row['status'] == 'published' and not row['published_at']:
+        row['published_at'] = now
+    row['updated_at'] = now
+    row['views_count'] = 0
+    row['is_customer_post'] = False
+    row['customer_language'] = source_language
+    # Bulk inserts skip the ORM event that renders content on save
+    row.update(rendered_columns(row))
+    
+    return row, source_language
+
+
+def import_posts(records, chunk_size=500, default_status='draft'):
+    """
+    Insert posts in chunked multi-row INSERTs
+    
+    Existing slugs are loaded once into a set and new slugs are
+    deduplicated against it in memory, so no per-post lookup query runs.
+    Each chunk is a single executemany INSERT in its own short transaction.
+    
+    Args:
+        records: Iterable of record dicts (ValueErrors from
+            read_records are counted as failed records)
+        chunk_size: Rows per INSERT/transaction
+        default_status: Status for records without a valid one
+    
+    Returns:
+        Dict with imported/failed counts, errors, elapsed seconds,
+        posts_per_second and the slugs that need translation
+    """
+    started = time.perf_counter()
+    taken_slugs = set(db.session.scalars(select(BlogPost.slug)))
+    db.session.commit()
+    
+    stats = {'imported': 0, 'failed': 0, 'errors': [], 'needs_translation': []}
+    chunk = []
+    chunk_translations = []
+    
+    def flush():
+        try:
+            db.session.execute(insert(BlogPost), chunk)
+            db.session.commit()
+            stats['imported'] += len(chunk)
+            stats['needs_translation'].extend(chunk_translations)
+        except Exception as e:
+            db.session.rollback()
+            stats['failed'] += len(chunk)
+            stats['errors'].append(f"chunk ending at record {line}: {e}")
+            logger.error(f"Bulk import chunk failed: {e}")
+    
+    line = 0
+    for line, record in enumerate(records, start=1):
+        if isinstance(record, ValueError):
+            stats['failed'] += 1
+            stats['errors'].append(str(record))
+            continue
+        try:
+            row, source_language = build_post_row(record, taken_slugs, default_status)
+        except (ValueError, TypeError, AttributeError) as e:
+            stats['failed'] += 1
+            stats['errors'].append(f"record {line}: {e}")
+            continue
+        
+        chunk.append(row)
+        if source_language:
+            chunk_translations.append(row['slug'])
+        
+        if len(chunk) >= chunk_size:
+            flush()
+            chunk, chunk_translations = [], []
+    
+    if chunk:
+        flush()
+    
+    stats['seconds'] = round(time.perf_counter() - started, 3)
+    stats['posts_per_second'] = (
+        round(stats['imported'] / stats['seconds'], 1) if stats['seconds'] else 0.0
+    )
+    logger.info(
+        f"Imported {stats['imported']} posts in {stats['seconds']}s "
+        f"({stats['posts_per_second']} posts/s), {stats['failed']} failed"
+    )
+    return stats
+
+
+def translate_imported_posts(slugs, chunk_size=50):
+    """
+    Fill in missing languages for imported posts
+    
+    Posts are loaded and translated chunk by chunk with batched API calls,
+    committing after each chunk.
+    
+    Args:
+        slugs: Slugs of posts imported in one language only
+        chunk_size: Posts per translation batch
+    
+    Returns:
+        Number of posts translated
+    """
+    from translation_service import translate_blog_posts
+    
+    translated = 0
+    for start in range(0, len(slugs), chunk_size):
+        posts = BlogPost.query.filter(BlogPost.slug.in_(slugs[start:start + chunk_size])).all()
+        translated += len(translate_blog_posts(posts))
+        db.session.commit()
+    return translated
+
+
+def start_background_translation(app, slugs):
+    """Run translate_imported_posts in a daemon thread"""
+    def run():
+        with app.app_context():
+            try:
+                count = translate_imported_posts(slugs)
+                logger.info(f"Translated {count} imported posts")
+            except Exception as e:
+                logger.error(f"Translating imported posts failed: {e}")
+            finally:
+                db.session.remove()
+    
+    threading.Thread(target=run, name='import-translation', daemon=True).start()
+
+
+def register_import_routes(app):
+    """Register admin bulk import routes"""
+    from admin import admin_required
+    
+    @app.route('/admin/posts/import', methods=['GET', 'POST'])
+    @admin_required
+    def admin_import_posts():
+        """Bulk import blog posts from an uploaded CSV/NDJSON file"""
+        if request.method == 'POST':
+            upload = request.files.get('file')
+            if not upload or not upload.filename:
+                flash('Please choose a file to import!', 'error')
+                return redirect(url_for('admin_import_posts'))
+            
+            fmt = request.form.get('format') or detect_format(upload.filename)
+            compressed = upload.filename.lower().endswith('.gz')
+            stats = import_posts(
+                read_records(upload.stream, fmt, compressed),
+                chunk_size=app.config.get('IMPORT_CHUNK_SIZE', 500),
+                default_status=request.form.get('status', 'draft')
+            )
+            
+            flash(
+                f"Imported {stats['imported']} posts in {stats['seconds']}s "
+                f"({stats['posts_per_second']} posts/s).",
+                'success'
+            )
+            if stats['failed']:
+                flash(f"{stats['failed']} records failed: " + '; '.join(stats['errors'][:5]), 'warning')
+            
+            if request.form.get('translate') and stats['needs_translation']:
+                start_background_translation(app, stats['needs_translation'])
+                flash(f"Translating {len(stats['needs_translation'])} posts in the background.", 'info')
+            
+            return redirect(url_for('admin_posts'))
+        
+        return render_template('admin/import.html', statuses=IMPORT_STATUSES)
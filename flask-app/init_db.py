@@ -5,7 +5,7 @@ Run this to initialize the database and optionally add sample data
 
 import sys
 from app import create_app
-from models import db, seed_sample_data
+from models import db, create_schema, seed_sample_data
 
 
 def init_database():
@@ -30,8 +30,8 @@ def init_database():
         
         # Create all tables
         print("\n📋 Creating database tables...")
-        db.create_all()
-        print("✓ All tables created successfully")
+        tables = create_schema()
+        print(f"✓ Tables ready: {', '.join(tables)}")
         
         # Ask about sample data
         response = input("\nDo you want to add sample blog posts? (Y/n): ").strip().lower()
@@ -0,0 +1,181 @@
+"""
+SQL Instrumentation
+Per-request query counts, DB time, slow query logging and N+1 detection
+"""
+
+import threading
+import time
+from collections import Counter, defaultdict
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from models import db
+from logging_config import get_logger
+
+logger = get_logger('sql')
+
+# Engine -> active QueryRecorders (used by tests and benchmarks)
+_recorders = defaultdict(list)
+_instrumented_engines = set()
+
+
+class QueryStats:
+    """
+    Statements executed during one request (or one recording)
+    
+    Statements are grouped by their SQL text. The same text run with
+    many different parameter sets is the signature of an N+1 pattern:
+    one query per row of an earlier result. Keeping the parameter sets
+    costs a repr() of every statement's parameters (large for bulk
+    inserts), so without track_parameters only executions are counted.
+    """
+    
+    def __init__(self, track_parameters=True):
+        self.count = 0
+        self.total_ms = 0.0
+        self.slow = []
+        self.statements = Counter()
+        self._parameters = defaultdict(set) if track_parameters else None
+        self._lock = threading.Lock()
+    
+    def record(self, statement, parameters, duration_ms, slow_threshold_ms=None):
+        """Add one executed statement"""
+        with self._lock:
+            self.count += 1
+            self.total_ms += duration_ms
+            self.statements[statement] += 1
+            if self._parameters is not None:
+                self._parameters[statement].add(repr(parameters))
+            if slow_threshold_ms is not None and duration_ms >= slow_threshold_ms:
+                self.slow.append((statement, duration_ms))
+    
+    def repeated(self, threshold):
+        """
+        Statements run with at least threshold distinct parameter sets
+        (or at least threshold times, when parameters are not tracked)
+        
+        Returns:
+            List of (statement, executions) tuples, most executed first
+        """
+        return [
+            (statement, executions)
+            for statement, executions in self.statements.most_common()
+            if (executions if self._parameters is None else len(self._parameters[statement])) >= threshold
+        ]
+
+
+def _on_before_execute(conn, cursor, statement, parameters, context, executemany):
+    """Remember when a statement started"""
+    conn.info.setdefault('query_start_time', []).append(time.perf_counter())
+
+
+def _on_after_execute(conn, cursor, statement, parameters, context, executemany):
+    """Attribute a finished statement to the current request and any recorders"""
+    started = conn.info['query_start_time'].pop()
+    duration_ms = (time.perf_counter() - started) * 1000
+    
+    for recorder in list(_recorders.get(conn.engine, ())):
+        recorder.record(statement, parameters, duration_ms)
+    
+    if not has_request_context():
+        return
+    stats = g.get('query_stats')
+    if stats is None:
+        return
+    
+    threshold = g.get('slow_query_threshold_ms')
+    stats.record(statement, parameters, duration_ms, threshold)
+    if threshold is not None and duration_ms >= threshold:
+        logger.warning(
+            f"Slow query ({duration_ms:.1f}ms) on {request.method} {request.path}: "
+            f"{' '.join(statement.split())[:500]}"
+        )
+
+
+def _instrument_engine(engine):
+    """Attach the timing listeners to an engine once"""
+    if engine in _instrumented_engines:
+        return
+    event.listen(engine, 'before_cursor_execute', _on_before_execute)
+    event.listen(engine, 'after_cursor_execute', _on_after_execute)
+    _instrumented_engines.add(engine)
+
+
+class QueryRecorder:
+    """
+    Record every statement run on the given engines while active
+    
+    Usage:
+        with QueryRecorder(*db.engines.values()) as queries:
+            client.get('/blog')
+        assert queries.count <= 4
+    """
+    
+    def __init__(self, *engines):
+        self.engines = engines
+        self.stats = QueryStats()
+    
+    @property
+    def count(self):
+        return self.stats.count
+    
+    def record(self, statement, parameters, duration_ms):
+        self.stats.record(statement, parameters, duration_ms)
+    
+    def __enter__(self):
+        for engine in self.engines:
+            _instrument_engine(engine)
+            _recorders[engine].append(self)
+        return self
+    
+    def __exit__(self, *exc):
+        for engine in self.engines:
+            _recorders[engine].remove(self)
+
+
+def init_query_instrumentation(app):
+    """
+    Count queries and DB time per request
+    
+    Slow statements are logged as they finish. After each request the
+    totals are logged, suspected N+1 patterns are logged as warnings and,
+    when QUERY_DEBUG_HEADERS is set, returned in X-Query-Count,
+    X-Query-Time and Server-Timing headers. Parameter sets are only
+    compared with QUERY_DEBUG_HEADERS; otherwise a statement run
+    N_PLUS_ONE_THRESHOLD times is reported.
+    
+    Args:
+        app: Flask application instance
+    """
+    with app.app_context():
+        for engine in db.engines.values():
+            _instrument_engine(engine)
+    
+    slow_threshold_ms = app.config.get('SLOW_QUERY_THRESHOLD_MS', 100)
+    n_plus_one_threshold = app.config.get('N_PLUS_ONE_THRESHOLD', 5)
+    debug_headers = app.config.get('QUERY_DEBUG_HEADERS', False)
+    
+    @app.before_request
+    def start_query_stats():
+        g.query_stats = QueryStats(track_parameters=debug_headers)
+        g.slow_query_threshold_ms = slow_threshold_ms
+    
+    @app.after_request
+    def report_query_stats(response):
+        stats = g.pop('query_stats', None)
+        if stats is None:
+            return response
+        
+        for statement, executions in stats.repeated(n_plus_one_threshold):
+            logger.warning(
+                f"Possible N+1 on {request.method} {request.path}: {executions} executions of "
+                f"{' '.join(statement.split())[:300]}"
+            )
+        logger.debug(
+            f"{request.method} {request.path}: {stats.count} queries in {stats.total_ms:.1f}ms"
+        )
+        
+        if debug_headers:
+            response.headers['X-Query-Count'] = str(stats.count)
+            response.headers['X-Query-Time'] = f"{stats.total_ms:.2f}ms"
+            response.headers.add('Server-Timing', f'db;dur={stats.total_ms:.2f};desc="{stats.count} queries"')
+        return response
@@ -1,13 +1,156 @@
 """
 Logging Configuration
 Structured logging setup for the application
+
+Records are handed to a QueueHandler on the logging thread and written by
+a QueueListener thread, so requests never block on console or file I/O.
 """
 
+import atexit
+import json
 import logging
+import os
+import queue
 import sys
-from logging.handlers import RotatingFileHandler
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional
+from flask import g, has_request_context, request
+
+# Request attributes copied onto records and into JSON output
+REQUEST_FIELDS = ('request_id', 'method', 'path', 'endpoint', 'language', 'latency_ms')
+
+# Active QueueListener per setup_logging() app_name
+_listeners: Dict[str, QueueListener] = {}
+_listener_lock = threading.Lock()
+
+
+class RequestContextFilter(logging.Filter):
+    """
+    Attach request id, endpoint, language and elapsed time to records
+    
+    Runs on the thread that logs, before the record is queued, because the
+    request context is not available on the listener thread.
+    """
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not has_request_context():
+            return True
+        
+        record.request_id = g.get('request_id')
+        record.method = request.method
+        record.path = request.path
+        record.endpoint = request.endpoint
+        record.language = g.get('lang_code', 'en')
+        started = g.get('request_started')
+        if started is not None and not hasattr(record, 'latency_ms'):
+            record.latency_ms = round((time.perf_counter() - started) * 1000, 2)
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep only a fraction of records below WARNING from noisy loggers
+    
+    Sampling is deterministic: with a rate of 0.1 every tenth record of a
+    logger is kept. Warnings and errors always pass.
+    
+    Args:
+        rates: Mapping of logger name (or prefix) to the fraction to keep
+    """
+    
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        # Longest prefix first so specific loggers override their parents
+        self.rates = sorted(rates.items(), key=lambda item: -len(item[0]))
+        self._seen: Dict[str, int] = {}
+        self._lock = threading.Lock()
+    
+    def _rate(self, name: str) -> float:
+        for prefix, rate in self.rates:
+            if name == prefix or name.startswith(prefix + '.'):
+                return rate
+        return 1.0
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self._rate(record.name)
+        if rate >= 1.0:
+            return True
+        if rate <= 0.0:
+            return False
+        with self._lock:
+            seen = self._seen.get(record.name, 0)
+            self._seen[record.name] = seen + 1
+        return seen % round(1 / rate) == 0
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as one JSON object per line"""
+    
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'module': record.module,
+            'function': record.funcName,
+        }
+        for field in REQUEST_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class StdoutHandler(logging.StreamHandler):
+    """
+    StreamHandler writing to whatever sys.stdout is when a record is emitted
+    
+    The listener thread writes after the fact, so binding the stream at
+    setup would keep writing to a stdout that has since been replaced
+    (and possibly closed), e.g. by a test runner's capture.
+    """
+    
+    def __init__(self):
+        super().__init__(sys.stdout)
+    
+    @property
+    def stream(self):
+        return sys.stdout
+    
+    @stream.setter
+    def stream(self, value):
+        pass
+
+
+class ContextQueueHandler(QueueHandler):
+    """
+    QueueHandler that keeps the record's structure
+    
+    The stock handler copies the record and replaces msg with fully
+    formatted text; this one only resolves the message arguments and the
+    traceback in place (both idempotent for any later handler), so
+    downstream formatters still see the request fields.
+    """
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
 
 
 def setup_logging(
@@ -15,7 +158,10 @@ def setup_logging(
     log_level: str = "INFO",
     log_file: Optional[str] = None,
     max_bytes: int = 10485760,  # 10MB
-    backup_count: int = 5
+    backup_count: int = 5,
+    json_console: bool = False,
+    sampling: Optional[Dict[str, float]] = None,
+    use_queue: bool = True
 ) -> logging.Logger:
     """
     Set up structured logging for the application
@@ -23,9 +169,12 @@ def setup_logging(
     Args:
         app_name: Name of the application
         log_level: Logging level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
-        log_file: Path to log file (optional)
+        log_file: Path to log file, written as JSON lines (optional)
         max_bytes: Maximum size of log file before rotation
         backup_count: Number of backup files to keep
+        json_console: Write JSON instead of text to the console
+        sampling: Logger name -> fraction of sub-WARNING records to keep
+        use_queue: Write through a background QueueListener (default)
     
     Returns:
         Configured logger instance
@@ -34,24 +183,21 @@ def setup_logging(
     logger = logging.getLogger(app_name)
     logger.setLevel(getattr(logging, log_level.upper()))
     
-    # Remove existing handlers
+    # Remove existing handlers and stop the previous listener (flushing it)
+    shutdown_logging(app_name)
     logger.handlers.clear()
     
     # Create formatters
-    detailed_formatter = logging.Formatter(
-        '[%(asctime)s] %(levelname)s in %(module)s.%(funcName)s: %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
-    
     simple_formatter = logging.Formatter(
         '%(levelname)s: %(message)s'
     )
+    json_formatter = JsonFormatter()
     
     # Console handler
-    console_handler = logging.StreamHandler(sys.stdout)
+    console_handler = StdoutHandler()
     console_handler.setLevel(logging.INFO)
-    console_handler.setFormatter(simple_formatter)
-    logger.addHandler(console_handler)
+    console_handler.setFormatter(json_formatter if json_console else simple_formatter)
+    handlers = [console_handler]
     
     # File handler (if log file specified)
     if log_file:
@@ -62,15 +208,118 @@ def setup_logging(
         file_handler = RotatingFileHandler(
             log_file,
             maxBytes=max_bytes,
-            backupCount=backup_count
+            backupCount=backup_count,
+            encoding='utf-8'
         )
         file_handler.setLevel(logging.DEBUG)
-        file_handler.setFormatter(detailed_formatter)
-        logger.addHandler(file_handler)
+        file_handler.setFormatter(json_formatter)
+        handlers.append(file_handler)
+    
+    filters = [RequestContextFilter()]
+    if sampling:
+        filters.insert(0, SamplingFilter(sampling))
+    
+    if use_queue:
+        front = ContextQueueHandler(queue.SimpleQueue())
+        listener = QueueListener(front.queue, *handlers, respect_handler_level=True)
+        _start_listener(app_name, listener)
+        handlers = [front]
+    
+    for handler in handlers:
+        for log_filter in filters:
+            handler.addFilter(log_filter)
+        logger.addHandler(handler)
     
     return logger
 
 
+def _start_listener(app_name: str, listener: QueueListener) -> None:
+    """Start a listener and remember it for shutdown_logging()"""
+    with _listener_lock:
+        listener.start()
+        _listeners[app_name] = listener
+
+
+def shutdown_logging(app_name: Optional[str] = None) -> None:
+    """
+    Flush queued records and stop listener threads
+    
+    Safe to call more than once; registered with atexit and called by
+    setup_logging before replacing handlers.
+    
+    Args:
+        app_name: Logger whose listener to stop (default: all)
+    """
+    with _listener_lock:
+        names = [app_name] if app_name else list(_listeners)
+        listeners = [_listeners.pop(name) for name in names if name in _listeners]
+    for listener in listeners:
+        listener.stop()
+        for handler in listener.handlers:
+            try:
+                handler.flush()
+            except (OSError, ValueError):
+                pass
+
+
+atexit.register(shutdown_logging)
+
+
+def _restart_listeners_after_fork() -> None:
+    """
+    Start new listener threads in a forked child
+    
+    Threads do not survive fork(), so a worker forked from a preloaded
+    master would otherwise queue records that nobody writes.
+    """
+    global _listener_lock
+    _listener_lock = threading.Lock()
+    for app_name, listener in list(_listeners.items()):
+        replacement = QueueListener(
+            listener.queue, *listener.handlers, respect_handler_level=listener.respect_handler_level
+        )
+        replacement.start()
+        _listeners[app_name] = replacement
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_restart_listeners_after_fork)
+
+
+def init_request_logging(app) -> None:
+    """
+    Assign request ids and optionally log one access record per request
+    
+    The id comes from an incoming X-Request-ID header or is generated, and
+    is returned in the response's X-Request-ID header. With LOG_REQUESTS
+    enabled, 'flask_app.access' records carry status and latency; sample
+    them with LOG_SAMPLING like any other logger.
+    
+    Args:
+        app: Flask application instance
+    """
+    access_logger = get_logger('access')
+    log_requests = app.config.get('LOG_REQUESTS', False)
+    
+    @app.before_request
+    def assign_request_id():
+        g.request_id = request.headers.get('X-Request-ID', '')[:64] or uuid.uuid4().hex[:16]
+        g.request_started = time.perf_counter()
+    
+    @app.after_request
+    def log_request(response):
+        request_id = g.get('request_id')
+        if request_id:
+            response.headers['X-Request-ID'] = request_id
+        if log_requests and g.get('request_started') is not None:
+            latency_ms = round((time.perf_counter() - g.request_started) * 1000, 2)
+            access_logger.info(
+                f"{request.method} {request.path} {response.status_code} {latency_ms}ms",
+                extra={'latency_ms': latency_ms}
+            )
+        return response
+
+
 def get_logger(name: str) -> logging.Logger:
     """
     Get a logger instance for a specific module
@@ -85,4 +334,4 @@ def get_logger(name: str) -> logging.Logger:
 
 
 # Application-wide logger
-app_logger = logging.getLogger("flask_app")
\ No newline at end of file
+app_logger = logging.getLogger("flask_app")
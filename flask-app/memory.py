@@ -0,0 +1,495 @@
+"""
+Memory Tracking
+tracemalloc snapshots and diffs, in-process cache sizes and RSS-based worker recycling
+"""
+
+import gc
+import itertools
+import os
+import signal
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import deque
+from datetime import datetime
+from flask import request, render_template, redirect, url_for, flash, abort
+from logging_config import get_logger
+
+logger = get_logger('memory')
+
+SNAPSHOT_KEYS = ('lineno', 'filename', 'traceback')
+
+# Allocations made by tracemalloc itself and the import machinery are noise
+SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    tracemalloc.Filter(False, '<unknown>'),
+)
+
+_app_root = os.path.dirname(os.path.abspath(__file__))
+
+
+def process_rss(pid='self'):
+    """Resident set size of a process in bytes, or 0 if unavailable"""
+    try:
+        with open(f'/proc/{pid}/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def process_memory(pid='self'):
+    """
+    RSS, PSS and USS of a process in bytes (Linux smaps_rollup, else zeros)
+    
+    RSS counts pages shared with other processes in full, PSS splits them
+    between the sharers and USS counts only pages private to the process,
+    i.e. what it would free by exiting. Preloaded workers differ from
+    non-preloaded ones in USS and PSS, not RSS.
+    """
+    fields = {'Rss': 'rss', 'Pss': 'pss', 'Private_Clean': 'uss', 'Private_Dirty': 'uss'}
+    memory = {'rss': 0, 'pss': 0, 'uss': 0}
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as rollup:
+            for line in rollup:
+                name, _, value = line.partition(':')
+                if name in fields:
+                    memory[fields[name]] += int(value.split()[0]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return memory
+
+
+def _site(frame):
+    """file:line of a traceback frame, relative to the app for app code"""
+    filename = frame.filename
+    if filename.startswith(_app_root):
+        filename = os.path.relpath(filename, _app_root)
+    else:
+        filename = '/'.join(filename.replace('\\', '/').split('/')[-2:])
+    return f'{filename}:{frame.lineno}'
+
+
+def _approximate_size(obj, seen=None, depth=0):
+    """
+    Rough deep size of an object graph made of builtin containers
+    
+    Follows dicts, lists, tuples and sets a few levels down; good enough
+    to watch a cache grow, not an exact accounting.
+    """
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if depth >= 4:
+        return size
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            size += _approximate_size(key, seen, depth + 1) + _approximate_size(value, seen, depth + 1)
+    elif isinstance(obj, (list, tuple, set, frozenset, deque)):
+        for item in obj:
+            size += _approximate_size(item, seen, depth + 1)
+    return size
+
+
+def cache_sizes(app=None):
+    """
+    Sizes of the long-lived structures that grow with traffic
+    
+    Args:
+        app: Flask application whose extensions (profiles, compressed
+            pages, post cards, feeds, metrics, snapshots) to include (optional)
+    
+    Returns:
+        List of dicts with name, entries, limit, bytes (None when the
+        contents cannot be inspected) and a short description
+    """
+    from security import rate_limiter
+    from translation_service import TranslationService
+    import translation_service
+    
+    rate_limits = dict(rate_limiter.requests)
+    translations = TranslationService.translate.cache_info()
+    service = translation_service._translation_service
+    
+    sizes = [
+        {
+            'name': 'rate_limiter.requests',
+            'entries': len(rate_limits),
+            'limit': None,
+            'bytes': _approximate_size(rate_limits),
+            'description': f'{sum(len(stamps) for stamps in rate_limits.values())} timestamps, '
+                           f'pruned hourly',
+        },
+        {
+            'name': 'TranslationService.translate',
+            'entries': translations.currsize,
+            'limit': translations.maxsize,
+            # lru_cache does not expose its contents
+            'bytes': None,
+            'description': f'{translations.hits} hits, {translations.misses} misses',
+        },
+        {
+            'name': 'translation_service._translation_service',
+            'entries': int(service is not None),
+            'limit': 1,
+            'bytes': _approximate_size(vars(service)) if service is not None else 0,
+            'description': 'DeepL client singleton',
+        },
+    ]
+    
+    if app is not None:
+        profiles = app.extensions.get('profiler')
+        if profiles is not None:
+            sizes.append({
+                'name': 'profiler',
+                'entries': len(profiles.list()),
+                'limit': profiles.profiles.maxlen,
+                'bytes': None,
+                'description': 'request profiles kept by this worker',
+            })
+        compressed = app.extensions.get('compression')
+        if compressed is not None:
+            sizes.append({
+                'name': 'compression',
+                'entries': len(compressed),
+                'limit': None,
+                'bytes': compressed.bytes,
+                'description': f'{compressed.hits} hits, {compressed.misses} misses '
+                               f'(limit {compressed.max_bytes // (1024 * 1024)}MB)',
+            })
+        cards = app.extensions.get('post_cards')
+        if cards is not None:
+            sizes.append({
+                'name': 'post_cards',
+                'entries': len(cards),
+                'limit': cards.maxsize,
+                'bytes': None,
+                'description': f'{cards.hits} hits, {cards.misses} misses',
+            })
+        feeds = app.extensions.get('feeds')
+        if feeds is not None:
+            sizes.append({
+                'name': 'feeds',
+                'entries': len(feeds),
+                'limit': feeds.maxsize,
+                'bytes': None,
+                'description': f'sitemap and feed documents, {feeds.hits} hits, {feeds.misses} misses',
+            })
+        registry = app.extensions.get('metrics')
+        if registry is not None:
+            series = registry.snapshot()
+            sizes.append({
+                'name': 'metrics',
+                'entries': sum(len(values) for values in series.values()),
+                'limit': None,
+                'bytes': _approximate_size(series),
+                'description': 'label combinations held by the metrics registry',
+            })
+        store = app.extensions.get('memory')
+        if store is not None:
+            sizes.append({
+                'name': 'memory.snapshots',
+                'entries': len(store.list()),
+                'limit': store.snapshots.maxlen,
+                'bytes': None,
+                'description': 'tracemalloc snapshots (each holds every traced block)',
+            })
+    return sizes
+
+
+def top_allocations(snapshot, limit=20, key='lineno'):
+    """
+    Largest allocation sites of a snapshot
+    
+    Returns:
+        List of dicts with site, traceback, size and count
+    """
+    return [
+        {
+            'site': _site(stat.traceback[0]),
+            'traceback': [_site(frame) for frame in stat.traceback],
+            'size': stat.size,
+            'count': stat.count,
+        }
+        for stat in snapshot.statistics(key)[:limit]
+    ]
+
+
+def diff_snapshots(older, newer, limit=20, key='lineno'):
+    """
+    Allocation sites that changed most between two snapshots
+    
+    Returns:
+        List of dicts with site, traceback, size, size_diff, count and
+        count_diff, largest absolute size change first
+    """
+    return [
+        {
+            'site': _site(stat.traceback[0]),
+            'traceback': [_site(frame) for frame in stat.traceback],
+            'size': stat.size,
+            'size_diff': stat.size_diff,
+            'count': stat.count,
+            'count_diff': stat.count_diff,
+        }
+        for stat in newer.compare_to(older, key)[:limit]
+    ]
+
+
+class SnapshotStore:
+    """
+    Keep the last K tracemalloc snapshots of this worker process
+    
+    Args:
+        history: Snapshots to keep
+        frames: Frames stored per allocation once tracing starts
+    """
+    
+    def __init__(self, history=5, frames=10):
+        self.snapshots = deque(maxlen=history)
+        self.frames = frames
+        self._lock = threading.Lock()
+    
+    @property
+    def tracing(self):
+        return tracemalloc.is_tracing()
+    
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            logger.info(f"tracemalloc started ({self.frames} frames) in pid {os.getpid()}")
+    
+    def stop(self):
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+            logger.info(f"tracemalloc stopped in pid {os.getpid()}")
+    
+    def take(self, label='manual', app=None):
+        """
+        Take a snapshot; tracing must be running
+        
+        Raises:
+            RuntimeError: If tracemalloc is not tracing
+        """
+        if not tracemalloc.is_tracing():
+            raise RuntimeError('tracemalloc is not tracing; start tracing first')
+        # Sizes first, so imports they trigger land before the snapshot
+        caches = cache_sizes(app)
+        gc.collect()
+        snapshot = tracemalloc.take_snapshot().filter_traces(SNAPSHOT_FILTERS)
+        traced, peak = tracemalloc.get_traced_memory()
+        entry = {
+            'id': uuid.uuid4().hex[:12],
+            'label': label,
+            'pid': os.getpid(),
+            'taken_at': datetime.utcnow(),
+            'rss': process_rss(),
+            'traced': traced,
+            'traced_peak': peak,
+            'snapshot': snapshot,
+            'caches': caches,
+        }
+        with self._lock:
+            self.snapshots.appendleft(entry)
+        logger.info(
+            f"Memory snapshot {entry['id']} ({label}): RSS {entry['rss'] / 1048576:.1f}MB, "
+            f"traced {traced / 1048576:.1f}MB"
+        )
+        return entry
+    
+    def list(self):
+        with self._lock:
+            return list(self.snapshots)
+    
+    def get(self, snapshot_id):
+        with self._lock:
+            return next((s for s in self.snapshots if s['id'] == snapshot_id), None)
+
+
+class _SnapshotScheduler:
+    """Take a snapshot every interval seconds on a daemon thread"""
+    
+    def __init__(self, app, store, interval):
+        self.app = app
+        self.store = store
+        self.interval = interval
+        self.pid = None
+        self._lock = threading.Lock()
+    
+    def ensure_running(self):
+        # Threads do not survive fork(), so start one per worker process
+        if self.pid == os.getpid():
+            return
+        with self._lock:
+            if self.pid == os.getpid():
+                return
+            self.pid = os.getpid()
+            threading.Thread(target=self._run, name='memory-snapshots', daemon=True).start()
+    
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            if self.store.tracing:
+                try:
+                    self.store.take('scheduled', self.app)
+                except Exception as e:
+                    logger.error(f"Scheduled memory snapshot failed: {e}")
+
+
+def _recycle_worker(rss_mb, limit_mb):
+    """Ask the serving gunicorn worker to exit once the current request is done"""
+    logger.warning(
+        f"Worker {os.getpid()} RSS {rss_mb:.0f}MB exceeds MAX_WORKER_RSS_MB={limit_mb}; recycling"
+    )
+    # SIGTERM makes a gunicorn worker finish in-flight requests and exit;
+    # the arbiter then forks a fresh one
+    os.kill(os.getpid(), signal.SIGTERM)
+
+
+def init_memory_tracking(app):
+    """
+    Set up tracemalloc snapshots and the RSS recycle threshold
+    
+    MEMORY_TRACING starts tracemalloc at startup (it slows allocations
+    and costs memory, so it is off by default; admins can also start it at
+    runtime). With MEMORY_SNAPSHOT_INTERVAL set, snapshots are taken on a
+    schedule while tracing. With MAX_WORKER_RSS_MB set, RSS is checked
+    every MEMORY_CHECK_EVERY requests and a gunicorn worker over the limit
+    is recycled; other servers only log a warning.
+    
+    Args:
+        app: Flask application instance
+    """
+    store = SnapshotStore(
+        app.config.get('MEMORY_SNAPSHOT_HISTORY', 5),
+        app.config.get('MEMORY_TRACE_FRAMES', 10)
+    )
+    app.extensions['memory'] = store
+    if app.config.get('MEMORY_TRACING'):
+        store.start()
+    
+    registry = app.extensions.get('metrics')
+    if registry is not None:
+        registry.register_collector(_memory_collector)
+    
+    interval = app.config.get('MEMORY_SNAPSHOT_INTERVAL', 0)
+    if interval:
+        scheduler = _SnapshotScheduler(app, store, interval)
+        app.before_request(scheduler.ensure_running)
+    
+    limit_mb = app.config.get('MAX_WORKER_RSS_MB', 0)
+    if not limit_mb:
+        return
+    check_every = app.config.get('MEMORY_CHECK_EVERY', 100)
+    request_counter = itertools.count(1)
+    warned = []
+    
+    @app.teardown_request
+    def check_worker_rss(exc):
+        if next(request_counter) % check_every:
+            return
+        rss_mb = process_rss() / 1048576
+        if rss_mb <= limit_mb:
+            return
+        if request.environ.get('SERVER_SOFTWARE', '').startswith('gunicorn'):
+            _recycle_worker(rss_mb, limit_mb)
+        elif not warned:
+            warned.append(True)
+            logger.warning(
+                f"RSS {rss_mb:.0f}MB exceeds MAX_WORKER_RSS_MB={limit_mb}; "
+                f"not recycling outside gunicorn"
+            )
+
+
+def _memory_collector():
+    """Collector reporting RSS and cache entry counts"""
+    from security import rate_limiter
+    from translation_service import TranslationService
+    return [
+        ('flask_app_process_resident_memory_bytes', {}, process_rss()),
+        ('flask_app_cache_entries', {'cache': 'rate_limiter'}, len(rate_limiter.requests)),
+        ('flask_app_cache_entries', {'cache': 'translation'}, TranslationService.translate.cache_info().currsize),
+    ]
+
+
+def register_memory_routes(app):
+    """Register admin routes for memory snapshots"""
+    from admin import admin_required
+    
+    def get_snapshot(snapshot_id):
+        snapshot = app.extensions['memory'].get(snapshot_id)
+        if snapshot is None:
+            abort(404)
+        return snapshot
+    
+    @app.route('/admin/memory')
+    @admin_required
+    def admin_memory():
+        """Process memory, cache sizes, snapshots and the growth between two of them"""
+        store = app.extensions['memory']
+        snapshots = store.list()
+        key = request.args.get('key', 'lineno')
+        if key not in SNAPSHOT_KEYS:
+            key = 'lineno'
+        
+        current = top = base = growth = None
+        if snapshots:
+            current = get_snapshot(request.args['snapshot']) if request.args.get('snapshot') else snapshots[0]
+            top = top_allocations(current['snapshot'], key=key)
+            if request.args.get('base'):
+                base = get_snapshot(request.args['base'])
+            else:
+                older = [s for s in snapshots if s['taken_at'] < current['taken_at']]
+                base = older[0] if older else None
+            if base is not None:
+                growth = diff_snapshots(base['snapshot'], current['snapshot'], key=key)
+        
+        traced, peak = tracemalloc.get_traced_memory()
+        return render_template(
+            'admin/memory.html',
+            tracing=store.tracing,
+            pid=os.getpid(),
+            rss=process_rss(),
+            traced=traced,
+            traced_peak=peak,
+            limit_mb=app.config.get('MAX_WORKER_RSS_MB', 0),
+            caches=cache_sizes(app),
+            snapshots=snapshots,
+            current=current,
+            base=base,
+            top=top,
+            growth=growth,
+            key=key,
+            keys=SNAPSHOT_KEYS
+        )
+    
+    @app.route('/admin/memory/tracing', methods=['POST'])
+    @admin_required
+    def admin_memory_tracing():
+        """Start or stop tracemalloc in this worker"""
+        store = app.extensions['memory']
+        if request.form.get('action') == 'stop':
+            store.stop()
+            flash('Memory tracing stopped.', 'success')
+        else:
+            store.start()
+            flash('Memory tracing started.', 'success')
+        return redirect(url_for('admin_memory'))
+    
+    @app.route('/admin/memory/snapshots', methods=['POST'])
+    @admin_required
+    def admin_memory_snapshot():
+        """Take a snapshot now"""
+        try:
+            entry = app.extensions['memory'].take(request.form.get('label') or 'manual', app)
+        except RuntimeError as e:
+            flash(str(e), 'error')
+            return redirect(url_for('admin_memory'))
+        flash(f"Snapshot {entry['id']} taken.", 'success')
+        return redirect(url_for('admin_memory', snapshot=entry['id']))
@@ -0,0 +1,482 @@
+"""
+Request Metrics
+Per-endpoint latency histograms, status counters and gauges in Prometheus text format
+"""
+
+import atexit
+import glob
+import hmac
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from flask import current_app, g, has_app_context, request, session, abort, Response
+from logging_config import get_logger
+
+logger = get_logger('metrics')
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+# name -> (type, help, histogram buckets)
+METRICS = {
+    'flask_app_requests_total': ('counter', 'Requests by endpoint, method and status', None),
+    'flask_app_request_duration_seconds': ('histogram', 'Request latency by endpoint', LATENCY_BUCKETS),
+    'flask_app_response_size_bytes': ('histogram', 'Response body size by endpoint', SIZE_BUCKETS),
+    'flask_app_requests_in_flight': ('gauge', 'Requests currently being handled', None),
+    'flask_app_db_pool_checked_out': ('gauge', 'Database connections checked out of the pool', None),
+    'flask_app_db_pool_size': ('gauge', 'Database connection pool size', None),
+    'flask_app_cache_hits_total': ('counter', 'Cache hits by cache', None),
+    'flask_app_cache_misses_total': ('counter', 'Cache misses by cache', None),
+    'flask_app_cache_hit_ratio': ('gauge', 'Cache hit ratio by cache', None),
+    'flask_app_translation_calls_total': ('counter', 'DeepL API calls by kind and outcome', None),
+    'flask_app_process_resident_memory_bytes': ('gauge', 'Resident set size, summed over worker processes', None),
+    'flask_app_cache_entries': ('gauge', 'Entries held by in-process caches, summed over worker processes', None),
+}
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Counters and histograms of exited workers, folded into one file
+RETIRED_FILE = 'retired.json'
+
+
+class MetricsRegistry:
+    """
+    Thread-safe in-process metric store
+    
+    Values are keyed by (metric name, sorted label pairs). Collectors are
+    callables evaluated at snapshot time for values that are read rather
+    than counted, such as pool usage and cache statistics.
+    """
+    
+    def __init__(self):
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+        self.collectors = []
+        self._lock = threading.Lock()
+    
+    def inc(self, name, labels=None, amount=1):
+        """Increment a counter"""
+        key = (name, tuple(sorted((labels or {}).items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+    
+    def add(self, name, amount, labels=None):
+        """Add to (or subtract from) a gauge"""
+        key = (name, tuple(sorted((labels or {}).items())))
+        with self._lock:
+            self.gauges[key] = self.gauges.get(key, 0) + amount
+    
+    def observe(self, name, value, labels=None):
+        """Record a histogram observation"""
+        buckets = METRICS[name][2]
+        key = (name, tuple(sorted((labels or {}).items())))
+        with self._lock:
+            entry = self.histograms.get(key)
+            if entry is None:
+                # One slot per bucket plus +Inf, then the running sum
+                entry = self.histograms[key] = [0] * (len(buckets) + 1) + [0.0]
+            entry[bisect_left(buckets, value)] += 1
+            entry[-1] += value
+    
+    def register_collector(self, collector):
+        """Add a callable returning (name, labels dict, value) tuples"""
+        self.collectors.append(collector)
+    
+    def snapshot(self):
+        """
+        JSON-serialisable copy of all values, including collector output
+        
+        Returns:
+            Dict with 'counters', 'gauges' and 'histograms' lists
+        """
+        with self._lock:
+            counters = [[name, list(labels), value] for (name, labels), value in self.counters.items()]
+            gauges = [[name, list(labels), value] for (name, labels), value in self.gauges.items()]
+            histograms = [
+                [name, list(labels), list(entry)] for (name, labels), entry in self.histograms.items()
+            ]
+        
+        for collector in self.collectors:
+            try:
+                for name, labels, value in collector():
+                    target = counters if METRICS[name][0] == 'counter' else gauges
+                    target.append([name, sorted(labels.items()), value])
+            except Exception as e:
+                logger.warning(f"Metrics collector failed: {e}")
+        
+        return {'counters': counters, 'gauges': gauges, 'histograms': histograms}
+
+
+class MultiprocessStore:
+    """
+    File-backed aggregation across gunicorn workers
+    
+    Each process writes its snapshot to its own JSON file in the metrics
+    directory, at most once per flush interval and from the request that
+    crosses it, so the hot path never waits on disk. A scrape merges every
+    file: counters and histograms from all files (values of exited
+    workers are kept, so totals stay monotonic), gauges only from live
+    processes. Under gunicorn the master folds each exited worker's file
+    into RETIRED_FILE (see retire_snapshots), so the directory holds one
+    file per live worker rather than one per worker ever started.
+    """
+    
+    def __init__(self, directory, interval=1.0):
+        self.directory = directory
+        self.interval = interval
+        self.pid = os.getpid()
+        self.started = int(time.time() * 1000)
+        self._last_flush = 0.0
+        self._flush_lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+    
+    @property
+    def path(self):
+        # Includes the start time so a recycled pid never overwrites a dead worker's totals
+        return os.path.join(self.directory, f'{self.pid}-{self.started}.json')
+    
+    def flush(self, registry, force=False):
+        """Write this process's snapshot if the interval has passed"""
+        now = time.monotonic()
+        if not force and now - self._last_flush < self.interval:
+            return
+        if not self._flush_lock.acquire(blocking=force):
+            return
+        try:
+            if os.getpid() != self.pid:
+                # Forked after creation (gunicorn --preload): start a fresh file
+                self.pid = os.getpid()
+                self.started = int(time.time() * 1000)
+            self._last_flush = now
+            partial = self.path + '.partial'
+            with open(partial, 'w', encoding='utf-8') as snapshot_file:
+                json.dump(registry.snapshot(), snapshot_file)
+            os.replace(partial, self.path)
+        except OSError as e:
+            logger.warning(f"Writing metrics snapshot failed: {e}")
+        finally:
+            self._flush_lock.release()
+    
+    def read_all(self):
+        """
+        Load every process snapshot
+        
+        Returns:
+            List of (pid, alive, snapshot dict) tuples
+        """
+        snapshots = {}
+        for path in _worker_files(self.directory):
+            snapshot = _read_snapshot(path)
+            if snapshot is not None:
+                snapshots[os.path.basename(path)] = snapshot
+        
+        # Read last: a worker file gone by now was folded into this one,
+        # and one read before being folded is listed in it
+        retired = _read_snapshot(os.path.join(self.directory, RETIRED_FILE)) or {}
+        for name in retired.get('folded', []):
+            snapshots.pop(name, None)
+        
+        result = []
+        for name, snapshot in snapshots.items():
+            pid = _file_pid(name)
+            result.append((pid, _pid_alive(pid), snapshot))
+        if retired:
+            result.append((None, False, retired))
+        return result
+
+
+def _worker_files(directory):
+    """Snapshot files of worker processes, '<pid>-<started>.json'"""
+    return [path for path in glob.glob(os.path.join(directory, '*.json'))
+            if os.path.basename(path) != RETIRED_FILE]
+
+
+def _file_pid(name):
+    return int(name.split('-', 1)[0])
+
+
+def _read_snapshot(path):
+    """A snapshot file's contents, or None when missing or half-written"""
+    try:
+        with open(path, encoding='utf-8') as snapshot_file:
+            return json.load(snapshot_file)
+    except (OSError, ValueError):
+        return None
+
+
+def retire_snapshots(directory, pid=None):
+    """
+    Fold the snapshot files of exited workers into RETIRED_FILE
+    
+    Their counters and histograms are added to the retired totals (gauges
+    are dropped) and the files removed. Run from one process only, the
+    gunicorn master (see gunicorn.conf.py).
+    
+    Args:
+        directory: Metrics directory
+        pid: The worker that exited (default: every worker no longer running)
+    
+    Returns:
+        Number of files folded
+    """
+    retired_path = os.path.join(directory, RETIRED_FILE)
+    retired = _read_snapshot(retired_path) or {}
+    # Names folded earlier whose file is still there (removal failed)
+    folded = [name for name in retired.get('folded', []) if os.path.exists(os.path.join(directory, name))]
+    
+    snapshots = [(None, False, retired)]
+    names = []
+    for path in _worker_files(directory):
+        name = os.path.basename(path)
+        file_pid = _file_pid(name)
+        if name in folded or (file_pid != pid if pid is not None else _pid_alive(file_pid)):
+            continue
+        snapshot = _read_snapshot(path)
+        if snapshot is not None:
+            snapshots.append((file_pid, False, snapshot))
+            names.append(name)
+    if not names and not folded:
+        return 0
+    
+    merged = {'counters': [], 'gauges': [], 'histograms': [], 'folded': folded + names}
+    for (kind, name, labels), value in merge_snapshots(snapshots).items():
+        merged[kind].append([name, [list(pair) for pair in labels], value])
+    try:
+        with open(retired_path + '.partial', 'w', encoding='utf-8') as snapshot_file:
+            json.dump(merged, snapshot_file)
+        os.replace(retired_path + '.partial', retired_path)
+    except OSError as e:
+        logger.warning(f"Retiring metrics snapshots failed: {e}")
+        return 0
+    # Removed only now: until then a scrape reads each worker's own file
+    for name in merged['folded']:
+        try:
+            os.remove(os.path.join(directory, name))
+        except OSError:  # listed as folded, so tried again next time
+            pass
+    return len(names)
+
+
+def clear_snapshots(directory):
+    """Remove every snapshot, so a restarted server counts from zero"""
+    for path in glob.glob(os.path.join(directory, '*.json')) + glob.glob(os.path.join(directory, '*.partial')):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _pid_alive(pid):
+    """Whether a process with this pid exists"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def merge_snapshots(snapshots):
+    """
+    Merge process snapshots into one set of values
+    
+    Args:
+        snapshots: Iterable of (pid, alive, snapshot dict)
+    
+    Returns:
+        Dict mapping (kind, name, labels tuple) to a value or histogram list
+    """
+    merged = {}
+    for _, alive, snapshot in snapshots:
+        for kind in ('counters', 'gauges'):
+            if kind == 'gauges' and not alive:
+                continue
+            for name, labels, value in snapshot.get(kind, []):
+                key = (kind, name, tuple(tuple(pair) for pair in labels))
+                merged[key] = merged.get(key, 0) + value
+        for name, labels, entry in snapshot.get('histograms', []):
+            key = ('histograms', name, tuple(tuple(pair) for pair in labels))
+            if key in merged:
+                merged[key] = [a + b for a, b in zip(merged[key], entry)]
+            else:
+                merged[key] = list(entry)
+    return merged
+
+
+def _escape(value):
+    """Escape a label value for the exposition format"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels, extra=None):
+    pairs = list(labels) + (list(extra) if extra else [])
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in pairs) + '}'
+
+
+def _format_value(value):
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def render_prometheus(merged):
+    """
+    Render merged values in Prometheus text exposition format
+    
+    Cache hit ratios are derived from the merged hit/miss counters so
+    they are correct across processes.
+    """
+    hits = {labels: value for (kind, name, labels), value in merged.items()
+            if name == 'flask_app_cache_hits_total'}
+    for labels, hit_count in hits.items():
+        total = hit_count + merged.get(('counters', 'flask_app_cache_misses_total', labels), 0)
+        merged[('gauges', 'flask_app_cache_hit_ratio', labels)] = round(hit_count / total, 4) if total else 0.0
+    
+    by_name = {}
+    for (kind, name, labels), value in sorted(merged.items()):
+        by_name.setdefault(name, []).append((labels, value))
+    
+    lines = []
+    for name, (metric_type, help_text, buckets) in METRICS.items():
+        if name not in by_name:
+            continue
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {metric_type}')
+        for labels, value in by_name[name]:
+            if metric_type != 'histogram':
+                lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+                continue
+            cumulative = 0
+            for bound, count in zip(list(buckets) + ['+Inf'], value[:-1]):
+                cumulative += count
+                lines.append(
+                    f'{name}_bucket{_format_labels(labels, [("le", bound)])} {cumulative}'
+                )
+            lines.append(f'{name}_sum{_format_labels(labels)} {_format_value(round(value[-1], 6))}')
+            lines.append(f'{name}_count{_format_labels(labels)} {cumulative}')
+    return '\n'.join(lines) + '\n'
+
+
+def get_registry():
+    """Registry of the current app, or None outside an app or with metrics disabled"""
+    if not has_app_context():
+        return None
+    return current_app.extensions.get('metrics')
+
+
+def count_translation_call(kind, outcome):
+    """Count a DeepL API call (kind: text, html, batch; outcome: ok, error)"""
+    registry = get_registry()
+    if registry is not None:
+        registry.inc('flask_app_translation_calls_total', {'kind': kind, 'outcome': outcome})
+
+
+def _db_pool_collector(app):
+    """Collector reporting connection pool usage"""
+    def collect():
+        from models import db
+        with app.app_context():
+            pool = db.engine.pool
+        checked_out = getattr(pool, 'checkedout', None)
+        size = getattr(pool, 'size', None)
+        return [
+            (name, {}, value())
+            for name, value in (
+                ('flask_app_db_pool_checked_out', checked_out),
+                ('flask_app_db_pool_size', size),
+            )
+            if callable(value)
+        ]
+    return collect
+
+
+def _translation_cache_collector():
+    """Collector reporting the translation lru_cache statistics"""
+    from translation_service import TranslationService
+    info = TranslationService.translate.cache_info()
+    labels = {'cache': 'translation'}
+    return [
+        ('flask_app_cache_hits_total', labels, info.hits),
+        ('flask_app_cache_misses_total', labels, info.misses),
+    ]
+
+
+def init_metrics(app):
+    """
+    Record request metrics and expose them at /metrics
+    
+    /metrics is available to a logged-in admin, or to a scraper sending
+    'Authorization: Bearer <METRICS_TOKEN>'. With METRICS_DIR set, every
+    worker process writes snapshots there and a scrape aggregates them.
+    
+    Args:
+        app: Flask application instance
+    """
+    registry = MetricsRegistry()
+    registry.register_collector(_db_pool_collector(app))
+    registry.register_collector(_translation_cache_collector)
+    app.extensions['metrics'] = registry
+    
+    store = None
+    if app.config.get('METRICS_DIR'):
+        store = MultiprocessStore(
+            app.config['METRICS_DIR'], app.config.get('METRICS_FLUSH_INTERVAL', 1.0)
+        )
+        atexit.register(store.flush, registry, True)
+    
+    @app.before_request
+    def start_request_metrics():
+        g.metrics_start = time.perf_counter()
+        registry.add('flask_app_requests_in_flight', 1)
+    
+    @app.after_request
+    def record_request_metrics(response):
+        started = g.pop('metrics_start', None)
+        if started is None:
+            return response
+        
+        endpoint = request.endpoint or 'none'
+        registry.inc('flask_app_requests_total', {
+            'endpoint': endpoint, 'method': request.method, 'status': str(response.status_code)
+        })
+        registry.observe(
+            'flask_app_request_duration_seconds',
+            time.perf_counter() - started,
+            {'endpoint': endpoint, 'method': request.method}
+        )
+        if response.content_length is not None:
+            registry.observe('flask_app_response_size_bytes', response.content_length, {'endpoint': endpoint})
+        return response
+    
+    @app.teardown_request
+    def finish_request_metrics(exc):
+        registry.add('flask_app_requests_in_flight', -1)
+        if store is not None:
+            store.flush(registry)
+    
+    @app.route('/metrics')
+    def metrics():
+        """Prometheus scrape endpoint"""
+        token = app.config.get('METRICS_TOKEN')
+        authorization = request.headers.get('Authorization', '')
+        # Compared as bytes: compare_digest refuses non-ASCII str values
+        if not session.get('is_admin') and not (
+            token and hmac.compare_digest(authorization.encode('latin-1', 'replace'), f'Bearer {token}'.encode())
+        ):
+            abort(403)
+        
+        if store is not None:
+            store.flush(registry, force=True)
+            snapshots = store.read_all()
+        else:
+            snapshots = [(os.getpid(), True, registry.snapshot())]
+        
+        return Response(
+            render_prometheus(merge_snapshots(snapshots)), content_type=PROMETHEUS_CONTENT_TYPE
+        )
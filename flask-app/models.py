@@ -4,18 +4,133 @@ All SQLAlchemy models and database initialization
 """
 
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import update, delete, select, event
 from datetime import datetime
 import os
+import threading
+from logging_config import get_logger
+from database import RoutingSession, configure_engines, init_engines
 
-# Initialize SQLAlchemy
-db = SQLAlchemy()
+# Initialize SQLAlchemy (reads in requests may use a separate engine, see database.py)
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 
 # ============================================================================
 # DATABASE MODELS - Define BEFORE init_db function
 # ============================================================================
 
-class BlogPost(db.Model):
+def slugify(title):
+    """Create a URL-friendly slug from a title"""
+    slug = title.lower().replace(' ', '-')
+    return ''.join(c for c in slug if c.isalnum() or c == '-')
+
+
+# Stored for the language a customer submission or one-language import
+# lacks, until the post is translated
+TRANSLATION_PLACEHOLDERS = {
+    'title_en': 'Pending Translation',
+    'title_pl': 'Oczekuje na tłumaczenie',
+    'content_en': 'Content pending translation',
+    'content_pl': 'Treść oczekuje na tłumaczenie',
+}
+
+
+def needs_translation(field, value):
+    """Whether a title or content value is empty or still a placeholder (in either language)"""
+    if not value:
+        return True
+    return value.strip() in (TRANSLATION_PLACEHOLDERS[f'{field}_en'], TRANSLATION_PLACEHOLDERS[f'{field}_pl'])
+
+
+class BulkActionsMixin:
+    """
+    Set-based status changes and deletes for moderated models
+    
+    Statements run per batch of ids (``UPDATE ... WHERE id IN (...)``)
+    or once for a list of filter criteria, all in a single transaction.
+    """
+    
+    @classmethod
+    def bulk_set_status(cls, status, ids=None, criteria=None, batch_size=500, **values):
+        """
+        Set status for many rows with set-based UPDATEs
+        
+        Either an explicit list of ids (updated in batches of
+        ``batch_size``) or a list of SQLAlchemy filter criteria (updated
+        with a single statement) can be given.
+        
+        Args:
+            status: New status value
+            ids: Iterable of primary keys
+            criteria: List of filter expressions on the model's columns
+            batch_size: Maximum number of ids per UPDATE statement
+            **values: Additional column values to set
+        
+        Returns:
+            Number of rows updated
+        """
+        values.update(status=status, updated_at=datetime.utcnow())
+        return cls._bulk_execute(
+            lambda where: update(cls).where(*where).values(**values),
+            ids=ids,
+            criteria=criteria,
+            batch_size=batch_size
+        )
+    
+    @classmethod
+    def bulk_delete(cls, ids=None, criteria=None, batch_size=500):
+        """
+        Delete many rows with set-based DELETEs
+        
+        Args:
+            ids: Iterable of primary keys
+            criteria: List of filter expressions on the model's columns
+            batch_size: Maximum number of ids per DELETE statement
+        
+        Returns:
+            Number of rows deleted
+        """
+        return cls._bulk_execute(
+            lambda where: delete(cls).where(*where),
+            ids=ids,
+            criteria=criteria,
+            batch_size=batch_size
+        )
+    
+    @classmethod
+    def _bulk_execute(cls, make_statement, ids=None, criteria=None, batch_size=500):
+        """Run a bulk statement per id batch or once per criteria, then commit"""
+        if ids is None and not criteria:
+            raise ValueError('Either ids or criteria must be given')
+        
+        affected = 0
+        try:
+            if ids is not None:
+                ids = sorted({int(row_id) for row_id in ids})
+                for start in range(0, len(ids), batch_size):
+                    batch = ids[start:start + batch_size]
+                    where = [cls.id.in_(batch)] + list(criteria or [])
+                    result = db.session.execute(
+                        make_statement(where),
+                        execution_options={'synchronize_session': False}
+                    )
+                    affected += result.rowcount
+            else:
+                result = db.session.execute(
+                    make_statement(list(criteria)),
+                    execution_options={'synchronize_session': False}
+                )
+                affected = result.rowcount
+            
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        
+        return affected
+
+
+class BlogPost(BulkActionsMixin, db.Model):
     """
     Blog Post Model - Bilingual support for English and Polish
     """
@@ -34,6 +149,15 @@ class BlogPost(db.Model):
     content_en = db.Column(db.Text, nullable=False)
     content_pl = db.Column(db.Text, nullable=False)
     
+    # Rendered content (content.py): sanitized HTML and reading statistics,
+    # made when the content is saved so views only output it
+    content_html_en = db.Column(db.Text)
+    content_html_pl = db.Column(db.Text)
+    word_count_en = db.Column(db.Integer)
+    word_count_pl = db.Column(db.Integer)
+    reading_time_en = db.Column(db.Integer)  # minutes
+    reading_time_pl = db.Column(db.Integer)
+    
     # Bilingual excerpt/summary
     excerpt_en = db.Column(db.String(500))
     excerpt_pl = db.Column(db.String(500))
@@ -70,12 +194,18 @@ class BlogPost(db.Model):
     )
     published_at = db.Column(db.DateTime)
     
+    # Soft-delete tombstone - row and comments are removed by purge_deleted_posts
+    deleted_at = db.Column(db.DateTime, index=True)
+    
     # Relationship with comments
+    # Comments are removed by the database (ON DELETE CASCADE), so the ORM
+    # never loads them just to delete them one by one
     comments = db.relationship(
         'Comment', 
         backref='post', 
         lazy=True,
-        cascade='all, delete-orphan'
+        cascade='all, delete-orphan',
+        passive_deletes=True
     )
     
     def __repr__(self):
@@ -89,6 +219,15 @@ class BlogPost(db.Model):
         """Get content in specified language"""
         return self.content_pl if language == 'pl' else self.content_en
     
+    def get_content_html(self, language='en'):
+        """Get sanitized content HTML in specified language, ready to output"""
+        from content import content_html
+        return content_html(self, 'pl' if language == 'pl' else 'en')
+    
+    def get_reading_time(self, language='en'):
+        """Get reading time in minutes in specified language"""
+        return self.reading_time_pl if language == 'pl' else self.reading_time_en
+    
     def get_excerpt(self, language='en'):
         """Get excerpt in specified language"""
         return self.excerpt_pl if language == 'pl' else self.excerpt_en
@@ -98,12 +237,29 @@ class BlogPost(db.Model):
         return self.category_pl if language == 'pl' else self.category_en
     
     def increment_views(self):
-        """Increment view counter"""
-        self.views_count += 1
+        """
+        Increment view counter
+        
+        A view is not an edit, so updated_at (which keys cached post
+        cards) is left unchanged and pre-rendered pages are not refreshed.
+        """
+        db.session.execute(
+            update(BlogPost).where(BlogPost.id == self.id).values(
+                views_count=BlogPost.views_count + 1,
+                updated_at=BlogPost.updated_at
+            ),
+            execution_options={'prerender': False}
+        )
+        db.session.commit()
+    
+    def soft_delete(self):
+        """Hide post immediately; the row is purged later in the background"""
+        self.status = 'deleted'
+        self.deleted_at = datetime.utcnow()
         db.session.commit()
 
 
-class Comment(db.Model):
+class Comment(BulkActionsMixin, db.Model):
     """
     Comment Model - Anonymous commenting support
     """
@@ -114,8 +270,9 @@ class Comment(db.Model):
     # Foreign key to blog post
     post_id = db.Column(
         db.Integer, 
-        db.ForeignKey('blog_posts.id'), 
-        nullable=False
+        db.ForeignKey('blog_posts.id', ondelete='CASCADE'), 
+        nullable=False,
+        index=True
     )
     
     # Commenter information (optional for anonymous)
@@ -233,6 +390,63 @@ class ContactInquiry(db.Model):
         db.session.commit()
 
 
+class UploadedImage(db.Model):
+    """
+    Uploaded Image Model - An original stored by content hash and its resized variants
+    
+    See images.py for the upload pipeline.
+    """
+    __tablename__ = 'uploaded_images'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    
+    # Content hash of the original, and its file name ('<key>.<extension>')
+    key = db.Column(db.String(32), unique=True, nullable=False)
+    filename = db.Column(db.String(64), unique=True, nullable=False)
+    
+    # The original as stored
+    format = db.Column(db.String(10), nullable=False)  # jpeg, png, gif, webp
+    width = db.Column(db.Integer, nullable=False)
+    height = db.Column(db.Integer, nullable=False)
+    size = db.Column(db.Integer, nullable=False)  # bytes
+    
+    # Resized copies: [[width, height, format, filename], ...]
+    variants = db.Column(db.JSON, default=list, nullable=False)
+    
+    # Status
+    status = db.Column(
+        db.String(20),
+        default='processing',
+        nullable=False
+    )  # processing, ready, failed
+    
+    # Timestamps
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(
+        db.DateTime,
+        default=datetime.utcnow,
+        onupdate=datetime.utcnow
+    )
+    
+    def __repr__(self):
+        return f'<UploadedImage {self.filename}>'
+
+
+class SchemaVersion(db.Model):
+    """
+    Single-row table recording which schema the database was built for
+    
+    Stamped by create_schema() and update_db.py, read at startup.
+    """
+    __tablename__ = 'schema_version'
+    
+    version = db.Column(db.Integer, primary_key=True)
+
+
+# Bump whenever models change; update_db.py migrates and stamps existing databases
+SCHEMA_VERSION = 3
+
+
 # ============================================================================
 # DATABASE INITIALIZATION - After models are defined
 # ============================================================================
@@ -240,37 +454,199 @@ class ContactInquiry(db.Model):
 def init_db(app):
     """
     Initialize database with the Flask app
-    Creates all tables if they don't exist
     
-    IMPORTANT: This function is called AFTER all models are defined above
+    Tables are not created here: run 'flask init-db' once per database.
+    Startup only compares the stamped schema version with SCHEMA_VERSION
+    (SCHEMA_CHECK), creating a missing schema when AUTO_CREATE_SCHEMA is
+    set (development).
+    
+    SQLite file databases are tuned from the SQLITE_* settings (WAL,
+    pragmas, read/write split); see database.py.
     """
-    # Ensure instance directory exists
-    instance_path = os.path.join(os.path.dirname(__file__), 'instance')
-    os.makedirs(instance_path, exist_ok=True)
+    # Ensure the directory of a SQLite database file exists
+    db_uri = app.config.get('SQLALCHEMY_DATABASE_URI') or ''
+    if db_uri.startswith('sqlite:///') and db_uri != 'sqlite:///:memory:':
+        os.makedirs(os.path.dirname(os.path.abspath(db_uri[len('sqlite:///'):])), exist_ok=True)
     
     # Initialize SQLAlchemy with the app
+    configure_engines(app)
     db.init_app(app)
     
-    # Create all tables within app context
     with app.app_context():
-        # This will create tables for ALL models defined above
-        db.create_all()
+        # SQLite only enforces foreign keys (and ON DELETE CASCADE) when asked
+        if db.engine.dialect.name == 'sqlite':
+            event.listen(db.engine, 'connect', _enable_sqlite_foreign_keys)
+        init_engines(app, db)
         
-        # Verify tables were created
-        from sqlalchemy import inspect
-        inspector = inspect(db.engine)
-        tables = inspector.get_table_names()
+        if app.config.get('SCHEMA_CHECK', True):
+            check_schema(auto_create=app.config.get('AUTO_CREATE_SCHEMA', False))
+
+
+def get_schema_version():
+    """
+    Schema version stamped in the database
+    
+    Returns:
+        Version number, or None for a database without a stamp
+    """
+    from sqlalchemy.exc import SQLAlchemyError
+    try:
+        return db.session.execute(select(db.func.max(SchemaVersion.version))).scalar()
+    except SQLAlchemyError:
+        # No schema_version table: never initialised, or older than stamping
+        return None
+    finally:
+        db.session.remove()
+
+
+def create_schema(drop=False):
+    """
+    Create all tables and stamp SCHEMA_VERSION
+    
+    Call within an app context. Existing tables are left as they are, so
+    run update_db.py to migrate an older database.
+    
+    Args:
+        drop: Drop all tables first
+    
+    Returns:
+        Names of the tables in the database
+    """
+    if drop:
+        db.drop_all()
+    db.create_all()
+    db.session.execute(delete(SchemaVersion))
+    db.session.add(SchemaVersion(version=SCHEMA_VERSION))
+    db.session.commit()
+    
+    from sqlalchemy import inspect
+    return inspect(db.engine).get_table_names()
+
+
+def check_schema(auto_create=False):
+    """
+    Warn when the database schema does not match the models
+    
+    One single-row query; the full table inspection only happens in
+    create_schema().
+    
+    Args:
+        auto_create: Create the schema when the database has none
+    
+    Returns:
+        True if the database is at SCHEMA_VERSION
+    """
+    logger = get_logger('database')
+    version = get_schema_version()
+    if version == SCHEMA_VERSION:
+        return True
+    
+    if version is None and auto_create:
+        create_schema()
+        logger.info(f"Database schema created (version {SCHEMA_VERSION})")
+        return True
+    
+    if version is None:
+        logger.warning(
+            "Database schema not initialised: run 'flask --app app init-db' "
+            "(or 'python update_db.py' for a database created before schema versions)"
+        )
+    else:
+        logger.warning(
+            f"Database schema version {version} does not match {SCHEMA_VERSION}: "
+            f"run 'python update_db.py'"
+        )
+    return False
+
+
+def _enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    """Turn on foreign key enforcement for every new SQLite connection"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA foreign_keys=ON')
+    cursor.close()
+
+
+# ============================================================================
+# MAINTENANCE - Purging soft-deleted posts
+# ============================================================================
+
+_purge_lock = threading.Lock()
+
+
+def purge_deleted_posts(chunk_size=500, limit=None):
+    """
+    Permanently remove soft-deleted posts and their comments
+    
+    Comments are deleted in chunks of ``chunk_size``, each in its own short
+    transaction, so the SQLite write lock is never held for long and other
+    requests can commit in between.
+    
+    Call this function within an app context.
+    
+    Args:
+        chunk_size: Maximum number of comments deleted per transaction
+        limit: Maximum number of posts to purge (optional)
+    
+    Returns:
+        Dict with the number of purged posts and comments
+    """
+    post_ids = db.session.scalars(
+        select(BlogPost.id)
+        .where(BlogPost.deleted_at.isnot(None))
+        .order_by(BlogPost.deleted_at)
+        .limit(limit)
+    ).all()
+    
+    purged = {'posts': 0, 'comments': 0}
+    for post_id in post_ids:
+        while True:
+            batch = select(Comment.id).where(Comment.post_id == post_id).limit(chunk_size)
+            result = db.session.execute(
+                delete(Comment).where(Comment.id.in_(batch)),
+                execution_options={'synchronize_session': False}
+            )
+            db.session.commit()
+            purged['comments'] += result.rowcount
+            if result.rowcount < chunk_size:
+                break
         
-        # Get database path for display
-        db_uri = app.config['SQLALCHEMY_DATABASE_URI']
-        if db_uri.startswith('sqlite:///'):
-            db_path = db_uri.replace('sqlite:///', '')
-            print(f"✓ Database initialized successfully")
-            print(f"  Location: {db_path}")
-            print(f"  Tables created: {', '.join(tables)}")
-        else:
-            print(f"✓ Database initialized successfully")
-            print(f"  Tables created: {', '.join(tables)}")
+        db.session.execute(
+            delete(BlogPost).where(BlogPost.id == post_id),
+            execution_options={'synchronize_session': False}
+        )
+        db.session.commit()
+        purged['posts'] += 1
+    
+    return purged
+
+
+def start_background_purge(app):
+    """
+    Run purge_deleted_posts in a daemon thread
+    
+    Only one purge runs per process at a time; if one is already running
+    it will pick up newly deleted posts on its next pass.
+    
+    Args:
+        app: Flask application instance
+    """
+    def run():
+        if not _purge_lock.acquire(blocking=False):
+            return
+        try:
+            with app.app_context():
+                chunk_size = app.config.get('POST_PURGE_CHUNK_SIZE', 500)
+                try:
+                    while purge_deleted_posts(chunk_size=chunk_size, limit=10)['posts']:
+                        pass
+                finally:
+                    db.session.remove()
+        except Exception as e:
+            get_logger('maintenance').error(f"Background purge failed: {e}")
+        finally:
+            _purge_lock.release()
+    
+    threading.Thread(target=run, name='post-purge', daemon=True).start()
 
 
 # ============================================================================
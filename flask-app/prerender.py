@@ -0,0 +1,515 @@
+"""
+Pre-rendering
+Published pages written as static HTML for the web server to serve directly
+
+'flask prerender' renders the homepage, services page, blog listing,
+feeds and every published post, in each language, and the sitemap into
+PRERENDER_DIR (for example <dir>/en/blog/<slug>/index.html or
+<dir>/en/blog/rss.xml, next to .gz/.br siblings). The web server
+answers GET requests without a query string or session cookie from there
+and passes everything else (comments, contact, search, admin) to Flask.
+
+Each page is recorded with a signature of what it shows (post
+updated_at, approved comments, the posts on a listing), so a run renders
+only the pages whose signature changed and removes the pages of posts
+that are no longer published. A change of templates, translations or
+assets renders everything. With PRERENDER_DIR set, commits that change
+posts or comments start such a run; full rebuilds are spread over several
+processes.
+
+The signatures are made from a record of every post kept in the state
+file, so a run after a commit reads only the posts that commit touched
+(and their comments) rather than the whole site. 'flask prerender' reads
+every post again. Further listing pages (/blog?page=N) and searches have
+a query string and are always answered by Flask.
+"""
+
+import glob
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from flask import current_app, has_app_context, has_request_context, request
+from sqlalchemy import event, func, inspect
+from sqlalchemy.pool import StaticPool
+from assets import write_atomic, write_precompressed
+from database import RoutingSession
+from logging_config import get_logger
+from models import db, BlogPost, Comment
+from template_cache import template_names
+
+try:
+    import fcntl
+except ImportError:  # Windows: runs are then serialized per process only
+    fcntl = None
+
+logger = get_logger('prerender')
+
+# WSGI environ key marking the renderer's requests (clients cannot set it)
+PRERENDER_ENVIRON = 'flask_app.prerender'
+
+# Page signatures of the last run, and the lock serializing runs
+STATE_FILE = '.prerender.json'
+LOCK_FILE = '.prerender.lock'
+
+# Paths written as files of their own rather than <path>/index.html
+FILE_SUFFIXES = ('.xml',)
+
+# Posts shown on the homepage and the first blog listing page (see routes)
+INDEX_POSTS = 3
+LISTING_POSTS = 10
+
+_sync_lock = threading.Lock()
+_sync_pending = threading.Event()
+
+# Posts changed since the last background run started (None: any post)
+_sync_posts = set()
+_sync_posts_lock = threading.Lock()
+
+# App and output directory inherited by forked render workers
+_worker = {}
+
+
+def is_prerendering():
+    """Whether the current request renders a page for PRERENDER_DIR"""
+    return has_request_context() and bool(request.environ.get(PRERENDER_ENVIRON))
+
+
+def page_file(directory, path):
+    """'/en/blog/<slug>' -> '<directory>/en/blog/<slug>/index.html', '/sitemap.xml' -> '<directory>/sitemap.xml'"""
+    parts = path.strip('/').split('/')
+    if path.endswith(FILE_SUFFIXES):
+        return os.path.join(directory, *parts)
+    return os.path.join(directory, *parts, 'index.html')
+
+
+def _signature(parts):
+    return hashlib.blake2b('\n'.join(map(str, parts)).encode(), digest_size=12).hexdigest()
+
+
+def site_version(app):
+    """
+    Signature of everything besides the data that shapes the pages
+    
+    Templates, compiled translations, the asset manifest and SITE_URL:
+    when it changes, every page is rendered again.
+    """
+    parts = [app.config.get('SITE_URL')]
+    for name in template_names(app):
+        source, _, _ = app.jinja_env.loader.get_source(app.jinja_env, name)
+        parts += [name, source]
+    for path in sorted(glob.glob(os.path.join(app.root_path, 'translations', '*', 'LC_MESSAGES', '*.mo'))):
+        with open(path, 'rb') as f:
+            parts.append(hashlib.blake2b(f.read(), digest_size=12).hexdigest())
+    assets = app.extensions.get('assets')
+    if assets is not None:
+        parts += [json.dumps(assets.manifest, sort_keys=True), sorted(assets.missing)]
+    return _signature(parts)
+
+
+def post_records(app, post_ids=None):
+    """
+    What the pages show of each post, as kept in the state file
+    
+    Call within an app context. Every post is recorded (drafts too: the
+    blog listing offers the categories of all posts).
+    
+    Args:
+        app: Flask application instance
+        post_ids: Read only these posts (default: all)
+    
+    Returns:
+        Dict of post id (as a string) -> record; posts that no longer
+        exist are left out
+    """
+    languages = app.config['BABEL_SUPPORTED_LOCALES']
+    posts = db.select(
+        BlogPost.id, BlogPost.slug, BlogPost.status, BlogPost.deleted_at,
+        BlogPost.updated_at, BlogPost.published_at,
+        *(getattr(BlogPost, f'category_{language}') for language in languages)
+    )
+    comments = (
+        db.select(Comment.post_id, func.count(Comment.id), func.max(Comment.updated_at))
+        .where(Comment.status == 'approved')
+        .group_by(Comment.post_id)
+    )
+    if post_ids is not None:
+        posts = posts.where(BlogPost.id.in_(post_ids))
+        comments = comments.where(Comment.post_id.in_(post_ids))
+    
+    comment_signatures = {
+        post_id: f'{count}@{latest}' for post_id, count, latest in db.session.execute(comments)
+    }
+    records = {}
+    for post_id, slug, status, deleted_at, updated_at, published_at, *categories in db.session.execute(posts):
+        records[str(post_id)] = {
+            'slug': slug,
+            'published': status == 'published' and deleted_at is None,
+            'updated_at': str(updated_at),
+            'published_at': str(published_at or ''),
+            'categories': dict(zip(languages, categories)),
+            'comments': comment_signatures.get(post_id, 0),
+        }
+    return records
+
+
+def site_pages(app, records):
+    """
+    Every page to pre-render, with the signature of what it shows
+    
+    A sitemap too large for one file is written as an index and its
+    shards (see feeds).
+    
+    Args:
+        app: Flask application instance
+        records: Post records from post_records()
+    
+    Returns:
+        Dict of URL path -> signature
+    """
+    from feeds import posts_per_shard
+    
+    # Newest first, like the listing
+    posts = sorted(
+        ((int(post_id), record) for post_id, record in records.items() if record['published']),
+        key=lambda item: (item[1]['published_at'], item[0]),
+        reverse=True
+    )
+    cards = [f"{post_id}@{record['updated_at']}" for post_id, record in posts]
+    feed_cards = cards[:app.config.get('FEED_POSTS', 20)]
+    
+    pages = {}
+    for language in app.config['BABEL_SUPPORTED_LOCALES']:
+        categories = {record['categories'].get(language) for record in records.values()}
+        pages[f'/{language}/'] = _signature(cards[:INDEX_POSTS])
+        pages[f'/{language}/services'] = ''
+        pages[f'/{language}/blog'] = _signature(
+            [len(posts)] + cards[:LISTING_POSTS] + sorted(filter(None, categories))
+        )
+        pages[f'/{language}/blog/rss.xml'] = pages[f'/{language}/blog/atom.xml'] = _signature(feed_cards)
+        for _, record in posts:
+            pages[f"/{language}/blog/{record['slug']}"] = f"{record['updated_at']}|{record['comments']}"
+    
+    pages['/sitemap.xml'] = _signature(sorted(cards))
+    per_shard = posts_per_shard(app.config)
+    if len(posts) > per_shard:
+        shards = {0: []}
+        for post_id, record in posts:
+            shards.setdefault(post_id // per_shard, []).append(f"{post_id}@{record['updated_at']}")
+        for number, shard_cards in shards.items():
+            pages[f'/sitemap-{number}.xml'] = _signature(sorted(shard_cards))
+    return pages
+
+
+def remove_page(directory, path):
+    """Delete a pre-rendered page and its compressed siblings"""
+    filename = page_file(directory, path)
+    for name in (filename, filename + '.gz', filename + '.br'):
+        if os.path.exists(name):
+            os.remove(name)
+    try:
+        os.rmdir(os.path.dirname(filename))
+    except OSError:  # not empty, or already gone
+        pass
+
+
+def render_pages(app, directory, paths):
+    """
+    Render pages through the app and write them to the output directory
+    
+    Pages are requested like a first-time visitor would (no cookies, no
+    Accept-Encoding) from SITE_URL. A page that fails, or that would set
+    a cookie, is not written and any earlier copy is removed.
+    
+    Args:
+        app: Flask application instance
+        directory: Output directory
+        paths: URL paths to render
+    
+    Returns:
+        Dict with written (paths) and errors (path -> message)
+    """
+    client = app.test_client(use_cookies=False)
+    base_url = app.config.get('SITE_URL') or 'http://localhost'
+    written, errors = [], {}
+    for path in paths:
+        # A fresh app context per page: a request reuses the current one,
+        # whose session (and g) may belong to a commit in progress
+        with app.app_context():
+            response = client.get(path, base_url=base_url, environ_overrides={PRERENDER_ENVIRON: True})
+        if response.status_code != 200:
+            errors[path] = f'HTTP {response.status_code}'
+        elif 'Set-Cookie' in response.headers:
+            errors[path] = 'sets a cookie, so it depends on the visitor'
+        else:
+            body = response.get_data()
+            filename = page_file(directory, path)
+            write_atomic(filename, body)
+            write_precompressed(filename, body)
+            written.append(path)
+            continue
+        remove_page(directory, path)
+    return {'written': written, 'errors': errors}
+
+
+def _init_worker():
+    """Drop database connections inherited from the parent process"""
+    with _worker['app'].app_context():
+        for engine in db.engines.values():
+            # An in-memory SQLite database lives in its one connection
+            if not isinstance(engine.pool, StaticPool):
+                engine.dispose(close=False)
+
+
+def _render_in_worker(paths):
+    return render_pages(_worker['app'], _worker['directory'], paths)
+
+
+def _render(app, directory, paths, jobs):
+    """render_pages(), split over forked processes when worthwhile"""
+    if jobs <= 1 or len(paths) < 2 * jobs or 'fork' not in multiprocessing.get_all_start_methods():
+        return render_pages(app, directory, paths), 1
+    
+    # Forked workers inherit the app (templates compiled, config loaded)
+    chunks = [paths[start::jobs * 4] for start in range(jobs * 4)]
+    result = {'written': [], 'errors': {}}
+    _worker.update(app=app, directory=directory)
+    try:
+        with ProcessPoolExecutor(jobs, mp_context=multiprocessing.get_context('fork'),
+                                 initializer=_init_worker) as pool:
+            for part in pool.map(_render_in_worker, [chunk for chunk in chunks if chunk]):
+                result['written'] += part['written']
+                result['errors'].update(part['errors'])
+    finally:
+        _worker.clear()
+    return result, jobs
+
+
+@contextmanager
+def _directory_lock(directory):
+    """Serialize runs over one directory, across processes where supported"""
+    with open(os.path.join(directory, LOCK_FILE), 'a') as handle:
+        if fcntl is not None:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+        yield
+
+
+def _load_state(directory):
+    try:
+        with open(os.path.join(directory, STATE_FILE)) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def prerender_site(app, directory=None, full=False, jobs=None, post_ids=None):
+    """
+    Bring the pre-rendered pages up to date
+    
+    Args:
+        app: Flask application instance
+        directory: Output directory (default: PRERENDER_DIR)
+        full: Render every page, not only those whose signature changed
+        jobs: Render processes (default: PRERENDER_JOBS, 0 = one per CPU)
+        post_ids: Posts changed since the last run, the only ones read
+            again (default: read every post)
+    
+    Returns:
+        Dict with pages, rendered, unchanged, removed, errors (path ->
+        message), full, jobs and seconds
+    """
+    directory = directory or app.config.get('PRERENDER_DIR')
+    if not directory:
+        raise ValueError('Set PRERENDER_DIR or pass a directory')
+    if jobs is None:
+        jobs = app.config.get('PRERENDER_JOBS', 0)
+    jobs = jobs or os.cpu_count() or 1
+    started = time.perf_counter()
+    os.makedirs(directory, exist_ok=True)
+    
+    with _directory_lock(directory):
+        state = _load_state(directory)
+        version = site_version(app)
+        full = full or state.get('version') != version
+        previous = state.get('pages', {})
+        
+        # A context of its own: the caller's session may be mid-commit
+        with app.app_context():
+            try:
+                if full or post_ids is None or 'posts' not in state:
+                    records = post_records(app)
+                else:
+                    records = state['posts']
+                    for post_id in post_ids:
+                        records.pop(str(post_id), None)
+                    records.update(post_records(app, post_ids))
+            finally:
+                db.session.remove()
+        pages = site_pages(app, records)
+        
+        changed = [path for path, signature in pages.items() if full or previous.get(path) != signature]
+        removed = [path for path in previous if path not in pages]
+        result, used_jobs = _render(app, directory, changed, jobs)
+        for path in removed:
+            remove_page(directory, path)
+        
+        # Failed pages are left out, so the next run tries them again
+        state = {
+            'version': version,
+            'pages': {path: signature for path, signature in pages.items() if path not in result['errors']},
+            'posts': records,
+        }
+        write_atomic(os.path.join(directory, STATE_FILE), json.dumps(state, indent=1, sort_keys=True).encode())
+    
+    for path, error in result['errors'].items():
+        logger.error(f"Pre-rendering {path} failed: {error}")
+    seconds = round(time.perf_counter() - started, 3)
+    logger.info(f"Pre-rendered {len(result['written'])} of {len(pages)} pages "
+                f"({len(removed)} removed) in {seconds}s")
+    return {
+        'pages': len(pages),
+        'rendered': len(result['written']),
+        'unchanged': len(pages) - len(changed),
+        'removed': len(removed),
+        'errors': result['errors'],
+        'full': full,
+        'jobs': used_jobs,
+        'seconds': seconds,
+    }
+
+
+def _note_changed_posts(post_ids):
+    """Add posts for the next background run to read (None: any post)"""
+    global _sync_posts
+    with _sync_posts_lock:
+        if post_ids is None or _sync_posts is None:
+            _sync_posts = None
+        else:
+            _sync_posts |= set(post_ids)
+
+
+def _take_changed_posts():
+    global _sync_posts
+    with _sync_posts_lock:
+        post_ids, _sync_posts = _sync_posts, set()
+    return post_ids
+
+
+def start_background_prerender(app, post_ids=None):
+    """
+    Run prerender_site in a daemon thread
+    
+    One run at a time per process: commits arriving during a run are
+    covered by one more run when it finishes, which reads the posts of
+    all of them.
+    
+    Args:
+        app: Flask application instance
+        post_ids: Posts the commit changed (default: any post)
+    """
+    _note_changed_posts(post_ids)
+    _sync_pending.set()
+    
+    def run():
+        while _sync_pending.is_set() and _sync_lock.acquire(blocking=False):
+            try:
+                while _sync_pending.is_set():
+                    _sync_pending.clear()
+                    prerender_site(app, jobs=1, post_ids=_take_changed_posts())
+            except Exception as e:
+                # The posts of the failed run are unknown now: read them all next time
+                _note_changed_posts(None)
+                logger.error(f"Background pre-rendering failed: {e}")
+            finally:
+                _sync_lock.release()
+    
+    threading.Thread(target=run, name='prerender', daemon=True).start()
+
+
+# Commits that change what pages show refresh PRERENDER_DIR. The listeners
+# are registered once for every session; apps without PRERENDER_DIR
+# return from them straight away. session.info['stale_posts'] holds the ids of the posts
+# changed in the transaction, or None when any post may have changed.
+
+def _prerender_enabled():
+    return has_app_context() and bool(current_app.config.get('PRERENDER_DIR'))
+
+
+def _mark_stale(session, post_ids):
+    stale = session.info.get('stale_posts', set())
+    session.info['stale_posts'] = None if post_ids is None or stale is None else stale | set(post_ids)
+
+
+def _post_ids(obj):
+    """The post a flushed post or comment belongs to, before and after the flush"""
+    if isinstance(obj, BlogPost):
+        return {obj.id}
+    history = inspect(obj).attrs.post_id.history
+    return {obj.post_id, *history.deleted} - {None}
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _track_changed_objects(session, flush_context):
+    """Note the posts of flushed posts and comments that pages may show"""
+    if not _prerender_enabled():
+        return
+    changed = set()
+    for obj in session.new:
+        if isinstance(obj, BlogPost) or (isinstance(obj, Comment) and obj.status == 'approved'):
+            changed |= _post_ids(obj)
+    for obj in session.deleted:
+        if isinstance(obj, (BlogPost, Comment)):
+            changed |= _post_ids(obj)
+    for obj in session.dirty:
+        if isinstance(obj, (BlogPost, Comment)) and session.is_modified(obj):
+            changed |= _post_ids(obj)
+    if changed:
+        _mark_stale(session, changed)
+
+
+@event.listens_for(RoutingSession, 'do_orm_execute')
+def _track_bulk_statements(orm_execute_state):
+    """Note the posts of rows a bulk UPDATE/DELETE on posts or comments is about to change"""
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete) or not _prerender_enabled():
+        return
+    mapper = orm_execute_state.bind_mapper
+    if (mapper is None or mapper.class_ not in (BlogPost, Comment)
+            or not orm_execute_state.execution_options.get('prerender', True)):
+        return
+    session = orm_execute_state.session
+    if session.info.get('stale_posts', set()) is None:
+        return
+    where = orm_execute_state.statement.whereclause
+    if where is None:
+        _mark_stale(session, None)
+        return
+    column = BlogPost.id if mapper.class_ is BlogPost else Comment.post_id
+    # On the connection the statement will use (not a lagging read replica)
+    bind = session.get_bind(mapper, clause=orm_execute_state.statement)
+    _mark_stale(session, session.scalars(
+        db.select(column).where(where).distinct(), bind_arguments={'bind': bind}
+    ).all())
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _refresh_after_commit(session):
+    """Refresh the pre-rendered pages once the changes are committed"""
+    if 'stale_posts' not in session.info:
+        return
+    post_ids = session.info.pop('stale_posts')
+    if not _prerender_enabled():
+        return
+    app = current_app._get_current_object()
+    if app.config.get('PRERENDER_IN_BACKGROUND', True):
+        start_background_prerender(app, post_ids)
+    else:
+        prerender_site(app, jobs=1, post_ids=post_ids)
+
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _forget_changes(session):
+    session.info.pop('stale_posts', None)
@@ -0,0 +1,288 @@
+"""
+Request Profiler
+Statistical wall/CPU stack sampling of selected requests, browsable by admins
+"""
+
+import itertools
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from datetime import datetime
+from flask import g, request, session, render_template, abort, Response
+from logging_config import get_logger
+
+logger = get_logger('profiler')
+
+PROFILE_KINDS = ('wall', 'cpu')
+
+_app_root = os.path.dirname(os.path.abspath(__file__))
+
+
+def _frame_label(code):
+    """Readable frame name without ';' (the collapsed-stack separator)"""
+    filename = code.co_filename
+    if filename.startswith(_app_root):
+        filename = os.path.relpath(filename, _app_root)
+    else:
+        # Library frames: keep the package-relative tail of the path
+        parts = filename.replace('\\', '/').split('/')
+        filename = '/'.join(parts[-2:])
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})".replace(';', ':')
+
+
+def _thread_cpu_clock(thread_id):
+    """CPU clock id of another thread, or None where unsupported"""
+    try:
+        return time.pthread_getcpuclockid(thread_id)
+    except (AttributeError, OSError):
+        return None
+
+
+class StackSampler:
+    """
+    Sample one thread's stack from a background thread
+    
+    Every interval the target thread's current frame is walked and the
+    stack counted. A sample also counts as CPU when the thread's CPU
+    clock advanced since the previous sample, so the CPU profile leaves
+    out time spent waiting on the database, network or locks.
+    
+    Args:
+        thread_id: threading.get_ident() of the thread to sample
+        interval: Seconds between samples
+    """
+    
+    def __init__(self, thread_id, interval=0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.wall = Counter()
+        self.cpu = Counter()
+        self.samples = 0
+        self._clock = _thread_cpu_clock(thread_id)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+    
+    def _stack(self):
+        frame = sys._current_frames().get(self.thread_id)
+        labels = []
+        while frame is not None:
+            labels.append(_frame_label(frame.f_code))
+            frame = frame.f_back
+        return ';'.join(reversed(labels))
+    
+    def _run(self):
+        last_cpu = time.clock_gettime(self._clock) if self._clock is not None else None
+        while not self._stop.wait(self.interval):
+            stack = self._stack()
+            if not stack:
+                continue
+            self.samples += 1
+            self.wall[stack] += 1
+            if last_cpu is not None:
+                try:
+                    cpu = time.clock_gettime(self._clock)
+                except OSError:
+                    # The thread finished; nothing left to attribute
+                    break
+                if cpu - last_cpu >= self.interval / 2:
+                    self.cpu[stack] += 1
+                last_cpu = cpu
+    
+    def start(self):
+        self._thread.start()
+    
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+
+class ProfileStore:
+    """Keep the last K profiles of this worker process"""
+    
+    def __init__(self, history=20):
+        self.profiles = deque(maxlen=history)
+        self._lock = threading.Lock()
+    
+    def add(self, profile):
+        with self._lock:
+            self.profiles.appendleft(profile)
+    
+    def list(self):
+        with self._lock:
+            return list(self.profiles)
+    
+    def get(self, profile_id):
+        with self._lock:
+            return next((p for p in self.profiles if p['id'] == profile_id), None)
+
+
+def collapsed_stacks(stacks):
+    """Render a stack Counter in collapsed format (flamegraph.pl, speedscope)"""
+    return ''.join(f'{stack} {count}\n' for stack, count in stacks.most_common())
+
+
+def top_functions(stacks, limit=25):
+    """
+    Summarise a profile by function
+    
+    Returns:
+        List of (label, self samples, total samples), by self time
+    """
+    own = Counter()
+    total = Counter()
+    for stack, count in stacks.items():
+        frames = stack.split(';')
+        own[frames[-1]] += count
+        for frame in set(frames):
+            total[frame] += count
+    return [(label, count, total[label]) for label, count in own.most_common(limit)]
+
+
+def _should_profile(app, request_counter):
+    """
+    Profile on an admin's explicit request or for 1 in PROFILE_SAMPLE_EVERY requests
+    
+    Returns:
+        'requested', 'sampled' or None (not profiled)
+    """
+    if request.endpoint in ('static', 'admin_profiles', 'admin_profile', 'admin_profile_download'):
+        return None
+    # The session is only read when profiling is asked for: reading it adds
+    # "Vary: Cookie", which would stop public pages from being cached
+    if (
+        request.args.get('_profile') == '1' or request.headers.get('X-Profile') == '1'
+    ) and session.get('is_admin'):
+        return 'requested'
+    every = app.config.get('PROFILE_SAMPLE_EVERY', 0)
+    # next() on itertools.count is atomic, so no lock is needed
+    if every and next(request_counter) % every == 0:
+        return 'sampled'
+    return None
+
+
+def init_profiler(app):
+    """
+    Profile selected requests and keep the results in memory
+    
+    An admin profiles a request by adding ?_profile=1 or sending
+    'X-Profile: 1'; PROFILE_SAMPLE_EVERY=N also profiles every Nth request
+    automatically. The id of a requested profile is returned in
+    X-Profile-Id (sampled ones are only listed, as those responses go to
+    anyone and may be cached). Profiles live per worker process, so with
+    several workers use the id to find the worker that served it.
+    
+    Args:
+        app: Flask application instance
+    """
+    store = ProfileStore(app.config.get('PROFILE_HISTORY', 20))
+    interval = app.config.get('PROFILE_INTERVAL_MS', 5) / 1000
+    app.extensions['profiler'] = store
+    request_counter = itertools.count(1)
+    
+    @app.before_request
+    def start_profile():
+        reason = _should_profile(app, request_counter)
+        if reason is None:
+            return
+        sampler = StackSampler(threading.get_ident(), interval)
+        g.profile = {
+            'sampler': sampler,
+            'started': time.perf_counter(),
+            'cpu_started': time.thread_time(),
+            'started_at': datetime.utcnow(),
+            'requested': reason == 'requested',
+        }
+        sampler.start()
+    
+    @app.after_request
+    def finish_profile(response):
+        profile = g.pop('profile', None)
+        if profile is None:
+            return response
+        
+        profile['sampler'].stop()
+        sampler = profile['sampler']
+        entry = {
+            'id': uuid.uuid4().hex[:12],
+            'endpoint': request.endpoint,
+            'method': request.method,
+            'path': request.full_path.rstrip('?'),
+            'status': response.status_code,
+            'started_at': profile['started_at'],
+            'duration_ms': round((time.perf_counter() - profile['started']) * 1000, 1),
+            'cpu_ms': round((time.thread_time() - profile['cpu_started']) * 1000, 1),
+            'interval_ms': interval * 1000,
+            'samples': sampler.samples,
+            'wall': sampler.wall,
+            'cpu': sampler.cpu,
+        }
+        store.add(entry)
+        if profile['requested']:
+            response.headers['X-Profile-Id'] = entry['id']
+        logger.info(
+            f"Profiled {entry['method']} {entry['path']}: {entry['duration_ms']}ms wall, "
+            f"{entry['cpu_ms']}ms CPU, {entry['samples']} samples"
+        )
+        return response
+    
+    @app.teardown_request
+    def stop_abandoned_profile(exc):
+        # after_request does not run when the response could not be built
+        profile = g.pop('profile', None)
+        if profile is not None:
+            profile['sampler'].stop()
+
+
+def register_profiler_routes(app):
+    """Register admin routes for browsing profiles"""
+    from admin import admin_required
+    
+    def get_profile(profile_id):
+        profile = app.extensions['profiler'].get(profile_id)
+        if profile is None:
+            abort(404)
+        return profile
+    
+    @app.route('/admin/profiles')
+    @admin_required
+    def admin_profiles():
+        """List recent request profiles of this worker"""
+        return render_template(
+            'admin/profiles.html',
+            profiles=app.extensions['profiler'].list(),
+            sample_every=app.config.get('PROFILE_SAMPLE_EVERY', 0)
+        )
+    
+    @app.route('/admin/profiles/<profile_id>')
+    @admin_required
+    def admin_profile(profile_id):
+        """Show the hottest functions of one profile"""
+        profile = get_profile(profile_id)
+        kind = request.args.get('kind', 'wall')
+        if kind not in PROFILE_KINDS:
+            kind = 'wall'
+        return render_template(
+            'admin/profile.html',
+            profile=profile,
+            kind=kind,
+            functions=top_functions(profile[kind]),
+            total=sum(profile[kind].values())
+        )
+    
+    @app.route('/admin/profiles/<profile_id>/<kind>.collapsed')
+    @admin_required
+    def admin_profile_download(profile_id, kind):
+        """Download a profile in collapsed-stack format"""
+        if kind not in PROFILE_KINDS:
+            abort(404)
+        profile = get_profile(profile_id)
+        return Response(
+            collapsed_stacks(profile[kind]),
+            mimetype='text/plain',
+            headers={
+                'Content-Disposition': f'attachment; filename=profile-{profile_id}-{kind}.collapsed'
+            }
+        )
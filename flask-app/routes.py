@@ -3,19 +3,36 @@ Application Routes
 All view functions and URL routing
 """
 
-from flask import render_template, request, redirect, url_for, flash, session
+from flask import render_template, request, redirect, url_for, flash, session, g, make_response
 from flask_babel import gettext
 from models import db, BlogPost, Comment, ContactInquiry
 from forms import CommentForm, ContactForm, BlogSearchForm
+from cards import post_cards
+from extensions import csrf
+from i18n import LANGUAGE_PREFIX, redirect_to_language, switch_language_url
+from prerender import is_prerendering
 from sqlalchemy import or_
 
 
 def register_routes(app):
     """
     Register all application routes
+    
+    Public pages are registered under LANGUAGE_PREFIX; their views read
+    the language from g.lang_code.
     """
     
     @app.route('/')
+    @app.route('/services')
+    @app.route('/blog')
+    @app.route('/blog/<slug>')
+    @app.route('/contact')
+    def language_redirect(slug=None):
+        """Send unprefixed public URLs to the visitor's language"""
+        return redirect_to_language()
+    
+    
+    @app.route(f'{LANGUAGE_PREFIX}/')
     def index():
         """Homepage"""
         # Get latest 3 published blog posts
@@ -25,20 +42,18 @@ def register_routes(app):
             BlogPost.published_at.desc()
         ).limit(3).all()
         
-        return render_template('index.html', latest_posts=latest_posts)
+        return render_template('index.html', latest_posts=post_cards(latest_posts))
     
     
-    @app.route('/services')
+    @app.route(f'{LANGUAGE_PREFIX}/services')
     def services():
         """Services page"""
         return render_template('services.html')
     
     
-    @app.route('/blog')
+    @app.route(f'{LANGUAGE_PREFIX}/blog')
     def blog():
         """Blog listing page with pagination and search"""
-        from forms import CustomerBlogPostForm
-        
         page = request.args.get('page', 1, type=int)
         per_page = 10
         
@@ -51,8 +66,7 @@ def register_routes(app):
         
         # Apply search filter
         if search_query:
-            lang = session.get('language', 'en')
-            if lang == 'pl':
+            if g.lang_code == 'pl':
                 query = query.filter(
                     or_(
                         BlogPost.title_pl.contains(search_query),
@@ -71,8 +85,7 @@ def register_routes(app):
         
         # Apply category filter
         if category:
-            lang = session.get('language', 'en')
-            if lang == 'pl':
+            if g.lang_code == 'pl':
                 query = query.filter_by(category_pl=category)
             else:
                 query = query.filter_by(category_en=category)
@@ -87,38 +100,50 @@ def register_routes(app):
             error_out=False
         )
         
-        posts = pagination.items
+        posts = post_cards(pagination.items)
+        # View counts change without updated_at, so they are not part of a card
+        views = {post.id: post.views_count for post in pagination.items}
         
         # Get all categories for filter
-        lang = session.get('language', 'en')
-        if lang == 'pl':
+        if g.lang_code == 'pl':
             categories = db.session.query(BlogPost.category_pl).distinct().all()
             categories = [cat[0] for cat in categories if cat[0]]
         else:
             categories = db.session.query(BlogPost.category_en).distinct().all()
             categories = [cat[0] for cat in categories if cat[0]]
         
-        # Create customer blog submission form
-        form = CustomerBlogPostForm()
-        
+        # The submission form is fetched from submit_blog_post when opened:
+        # rendering its CSRF token here would tie the page to a session
         return render_template(
             'blog.html',
             posts=posts,
+            views=views,
             pagination=pagination,
             search_query=search_query,
             selected_category=category,
-            categories=categories,
-            form=form
+            categories=categories
         )
     
     
-    @app.route('/blog/<slug>', methods=['GET', 'POST'])
+    @app.route(f'{LANGUAGE_PREFIX}/blog/<slug>', methods=['GET', 'POST'])
     def blog_post(slug):
-        """Individual blog post page with comments"""
-        post = BlogPost.query.filter_by(slug=slug).first_or_404()
+        """
+        Individual blog post page with comments
+        
+        The page carries no comment form: its CSRF token would tie the
+        page to a session, so it is fetched from comment_form when opened
+        and the page stays cookie-free and cacheable. A submission that
+        fails validation is shown again with the form inline. Pre-rendered
+        copies count views from the browser instead.
+        """
+        post = BlogPost.query.filter_by(slug=slug).filter(
+            BlogPost.deleted_at.is_(None)
+        ).first_or_404()
+        prerendering = is_prerendering()
         
         # Increment view counter
-        post.increment_views()
+        if not prerendering:
+            post.increment_views()
         
         # Get approved comments
         comments = Comment.query.filter_by(
@@ -126,10 +151,10 @@ def register_routes(app):
             status='approved'
         ).order_by(Comment.created_at.desc()).all()
         
-        # Comment form
-        form = CommentForm()
+        # Comment form (only for a submission)
+        form = CommentForm() if request.method == 'POST' else None
         
-        if form.validate_on_submit():
+        if form is not None and form.validate_on_submit():
             # Create new comment
             comment = Comment(
                 post_id=post.id,
@@ -151,16 +176,47 @@ def register_routes(app):
             'blog_post.html',
             post=post,
             comments=comments,
-            form=form
+            form=form,
+            count_view_url=url_for('count_post_view', slug=slug) if prerendering else None
         )
     
     
-    @app.route('/contact', methods=['GET', 'POST'])
+    @app.route(f'{LANGUAGE_PREFIX}/blog/<slug>/comment-form')
+    def comment_form(slug):
+        """Comment form fragment, loaded into the post page when opened"""
+        post = BlogPost.query.filter_by(slug=slug).filter(
+            BlogPost.deleted_at.is_(None)
+        ).first_or_404()
+        
+        response = make_response(render_template('components/comment_form.html', post=post, form=CommentForm()))
+        # Holds this visitor's CSRF token
+        response.cache_control.no_store = True
+        return response
+    
+    
+    @app.route(f'{LANGUAGE_PREFIX}/blog/<slug>/view', methods=['POST'])
+    @csrf.exempt
+    def count_post_view(slug):
+        """Count a view of a pre-rendered post page (sent by the browser)"""
+        post = BlogPost.query.filter_by(slug=slug, status='published').filter(
+            BlogPost.deleted_at.is_(None)
+        ).first_or_404()
+        post.increment_views()
+        return '', 204
+    
+    
+    @app.route(f'{LANGUAGE_PREFIX}/contact', methods=['GET', 'POST'])
     def contact():
-        """Contact form page"""
-        form = ContactForm()
+        """
+        Contact form page
+        
+        Like the post page, GET renders no form (and no CSRF token): it is
+        loaded from contact_form, and only an invalid submission is shown
+        with the form inline.
+        """
+        form = ContactForm() if request.method == 'POST' else None
         
-        if form.validate_on_submit():
+        if form is not None and form.validate_on_submit():
             # Create new contact inquiry
             inquiry = ContactInquiry(
                 name=form.name.data,
@@ -182,14 +238,21 @@ def register_routes(app):
         return render_template('contact.html', form=form)
     
     
+    @app.route(f'{LANGUAGE_PREFIX}/contact/form')
+    def contact_form():
+        """Contact form fragment, loaded into the contact page"""
+        response = make_response(render_template('components/contact_form.html', form=ContactForm()))
+        # Holds this visitor's CSRF token
+        response.cache_control.no_store = True
+        return response
+    
+    
     @app.route('/set-language/<language>')
     def set_language(language):
-        """Set user's preferred language"""
-        if language in app.config['BABEL_SUPPORTED_LOCALES']:
-            session['language'] = language
-        
-        # Redirect back to the previous page
-        return redirect(request.referrer or url_for('index'))
+        """Show the previous page in another language (for links predating language URLs)"""
+        if language not in app.config['BABEL_SUPPORTED_LOCALES']:
+            return redirect(url_for('index'))
+        return redirect(switch_language_url(request.referrer, language))
     
     
     @app.route('/api/translate', methods=['POST'])
@@ -126,9 +126,21 @@ class AdminAuth:
     """
     
     # In production, store this in database
-    ADMIN_CREDENTIALS = {
-        'admin': generate_password_hash('admin123')
+    DEFAULT_PASSWORDS = {
+        'admin': 'admin123'
     }
+    # Hashed on first use: hashing at import cost every worker ~0.1s at startup
+    ADMIN_CREDENTIALS = {}
+    
+    @staticmethod
+    def _credentials() -> dict:
+        """Hashed admin credentials, computed on first use"""
+        if not AdminAuth.ADMIN_CREDENTIALS:
+            AdminAuth.ADMIN_CREDENTIALS = {
+                username: generate_password_hash(password)
+                for username, password in AdminAuth.DEFAULT_PASSWORDS.items()
+            }
+        return AdminAuth.ADMIN_CREDENTIALS
     
     @staticmethod
     def verify_password(username: str, password: str) -> bool:
@@ -142,10 +154,11 @@ class AdminAuth:
         Returns:
             True if credentials are valid
         """
-        if username not in AdminAuth.ADMIN_CREDENTIALS:
+        credentials = AdminAuth._credentials()
+        if username not in credentials:
             return False
         
-        stored_hash = AdminAuth.ADMIN_CREDENTIALS[username]
+        stored_hash = credentials[username]
         return check_password_hash(stored_hash, password)
     
     @staticmethod
@@ -204,6 +217,33 @@ def admin_required(f: Callable) -> Callable:
     return decorated_function
 
 
+def content_security_policy(external_sources=()):
+    """
+    Content-Security-Policy value
+    
+    Scripts, styles and fonts load from the site itself only: pages carry
+    no inline <script>, <style> or style/on* attributes. Images may also
+    come from any HTTPS host (featured images are external URLs).
+    
+    Args:
+        external_sources: Extra origins for scripts, styles and fonts
+            (CDNs of libraries that are not vendored yet)
+    """
+    sources = ' '.join(("'self'",) + tuple(external_sources))
+    return (
+        "default-src 'self'; "
+        f"script-src {sources}; "
+        f"style-src {sources}; "
+        f"font-src {sources}; "
+        "img-src 'self' data: https:; "
+        "connect-src 'self'; "
+        "object-src 'none'; "
+        "base-uri 'self'; "
+        "form-action 'self'; "
+        "frame-ancestors 'self'"
+    )
+
+
 def add_security_headers(response):
     """
     Add security headers to response
@@ -213,7 +253,7 @@ def add_security_headers(response):
     - X-Frame-Options: SAMEORIGIN
     - X-XSS-Protection: 1; mode=block
     - Strict-Transport-Security: max-age=31536000; includeSubDomains
-    - Content-Security-Policy: default-src 'self'
+    - Content-Security-Policy: content_security_policy()
     """
     response.headers['X-Content-Type-Options'] = 'nosniff'
     response.headers['X-Frame-Options'] = 'SAMEORIGIN'
@@ -223,13 +263,9 @@ def add_security_headers(response):
     if not current_app.debug:
         response.headers['Strict-Transport-Security'] = 'max-age=31536000; includeSubDomains'
     
-    # Basic CSP - adjust based on your needs
-    response.headers['Content-Security-Policy'] = (
-        "default-src 'self'; "
-        "script-src 'self' 'unsafe-inline' https://cdn.jsdelivr.net https://cdnjs.cloudflare.com; "
-        "style-src 'self' 'unsafe-inline' https://cdn.jsdelivr.net https://cdnjs.cloudflare.com; "
-        "img-src 'self' data: https:; "
-        "font-src 'self' https://cdn.jsdelivr.net https://cdnjs.cloudflare.com;"
+    assets = current_app.extensions.get('assets')
+    response.headers['Content-Security-Policy'] = content_security_policy(
+        assets.external_origins if assets is not None else ()
     )
     
     return response
@@ -0,0 +1,38 @@
+/*
+ * Admin panel scripts
+ * Built into static/dist by 'flask build-assets'
+ */
+
+document.addEventListener('DOMContentLoaded', function() {
+    // Buttons and forms that ask before going ahead
+    document.querySelectorAll('button[data-confirm]').forEach(function(button) {
+        button.addEventListener('click', function(event) {
+            if (!window.confirm(button.dataset.confirm)) {
+                event.preventDefault();
+            }
+        });
+    });
+    document.querySelectorAll('form[data-confirm]').forEach(function(form) {
+        form.addEventListener('submit', function(event) {
+            if (!window.confirm(form.dataset.confirm)) {
+                event.preventDefault();
+            }
+        });
+    });
+
+    // Buttons that submit another form (data-submit="<form id>")
+    document.querySelectorAll('button[data-submit]').forEach(function(button) {
+        button.addEventListener('click', function() {
+            document.getElementById(button.dataset.submit).submit();
+        });
+    });
+
+    // "Select all" checkbox of bulk action tables (data-select-all="<row checkbox class>")
+    document.querySelectorAll('input[data-select-all]').forEach(function(selectAll) {
+        selectAll.addEventListener('change', function() {
+            document.querySelectorAll('.' + selectAll.dataset.selectAll).forEach(function(box) {
+                box.checked = selectAll.checked;
+            });
+        });
+    });
+});
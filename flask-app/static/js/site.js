@@ -0,0 +1,107 @@
+/*
+ * Site scripts (public pages)
+ * Behaviour is attached through data attributes, so pages need no inline
+ * script and the Content-Security-Policy can stay at script-src 'self'.
+ * Built into static/dist by 'flask build-assets'
+ */
+
+document.addEventListener('DOMContentLoaded', function() {
+    // Selects that navigate to the chosen option's URL (blog categories)
+    document.querySelectorAll('select[data-navigate]').forEach(function(select) {
+        select.addEventListener('change', function() {
+            window.location.href = select.value;
+        });
+    });
+
+    // Load forms (and their CSRF tokens) from their fragment URL, so the
+    // pages showing them stay cookie-free and cacheable
+    function loadFragment(body) {
+        if (body.dataset.loaded) {
+            return;
+        }
+        body.dataset.loaded = 'true';
+        fetch(body.dataset.src, {credentials: 'same-origin'})
+            .then(function(response) {
+                if (!response.ok) {
+                    throw new Error(response.statusText);
+                }
+                return response.text();
+            })
+            .then(function(html) {
+                body.innerHTML = html;
+                initCommentForm(body);
+            })
+            .catch(function() {
+                delete body.dataset.loaded;
+                const alert = document.createElement('div');
+                alert.className = 'alert alert-danger';
+                alert.textContent = body.dataset.error;
+                body.replaceChildren(alert);
+            });
+    }
+
+    // Collapsed forms (comments, blog submissions) load when opened
+    document.querySelectorAll('.collapse').forEach(function(collapse) {
+        const body = collapse.querySelector('[data-src]');
+        if (!body) {
+            return;
+        }
+        collapse.addEventListener('show.bs.collapse', function() {
+            loadFragment(body);
+        });
+    });
+
+    // Forms shown on the page (contact) load straight away
+    document.querySelectorAll('[data-src][data-autoload]').forEach(loadFragment);
+
+    // Pre-rendered posts are served without Flask: count the view here
+    const counted = document.querySelector('[data-count-view]');
+    if (counted && navigator.sendBeacon) {
+        navigator.sendBeacon(counted.dataset.countView);
+    }
+
+    // Toggle user info fields based on the anonymous comment checkbox
+    function initCommentForm(root) {
+        const anonymousCheckbox = root.querySelector('#isAnonymous');
+        const userInfoFields = root.querySelector('#userInfoFields');
+        if (!anonymousCheckbox || !userInfoFields) {
+            return;
+        }
+        const nameField = root.querySelector('#author_name');
+        const emailField = root.querySelector('#author_email');
+
+        function toggleUserFields() {
+            if (anonymousCheckbox.checked) {
+                userInfoFields.style.display = 'none';
+                nameField.removeAttribute('required');
+                emailField.removeAttribute('required');
+            } else {
+                userInfoFields.style.display = 'block';
+                nameField.setAttribute('required', 'required');
+                emailField.setAttribute('required', 'required');
+            }
+        }
+
+        anonymousCheckbox.addEventListener('change', toggleUserFields);
+        toggleUserFields(); // Initial state
+    }
+
+    // The form is on the page itself after a failed submission
+    initCommentForm(document);
+
+    // Language switcher component: go to this page in the other language
+    document.querySelectorAll('input[data-language-toggle]').forEach(function(toggle) {
+        toggle.addEventListener('change', function() {
+            let loader = document.getElementById('language-loading');
+            if (!loader) {
+                loader = document.createElement('div');
+                loader.id = 'language-loading';
+                loader.className = 'language-loading';
+                loader.innerHTML = '<i class="bi bi-translate"></i> Switching language...';
+                document.body.appendChild(loader);
+            }
+            loader.classList.add('show');
+            window.location.href = toggle.checked ? toggle.dataset.pl : toggle.dataset.en;
+        });
+    });
+});
@@ -0,0 +1,108 @@
+"""
+Template Cache
+Shared Jinja bytecode on disk, build-time precompilation and startup warm-up
+"""
+
+import os
+import time
+from jinja2 import FileSystemBytecodeCache, TemplateError
+from logging_config import get_logger
+
+logger = get_logger('templates')
+
+
+def template_names(app):
+    """Names of all HTML and XML templates of the app and its blueprints, sorted"""
+    return app.jinja_env.list_templates(filter_func=lambda name: name.endswith(('.html', '.xml')))
+
+
+def use_bytecode_cache(app, directory):
+    """
+    Store compiled templates in a directory shared by all workers
+    
+    Jinja keys each file by template name and source checksum, so an
+    edited template is recompiled rather than served stale.
+    
+    Args:
+        app: Flask application instance
+        directory: Cache directory (created if missing)
+    """
+    os.makedirs(directory, exist_ok=True)
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache(directory)
+
+
+def compile_templates(app):
+    """
+    Load every template into the app's Jinja environment
+    
+    Templates come from the bytecode cache when it has them and are
+    compiled (and written to it) otherwise. Either way they stay in the
+    environment's in-memory cache, so later renders skip loading.
+    
+    Args:
+        app: Flask application instance
+    
+    Returns:
+        Dict with templates (count), errors (name -> message) and ms
+    """
+    started = time.perf_counter()
+    errors = {}
+    names = template_names(app)
+    for name in names:
+        try:
+            app.jinja_env.get_template(name)
+        except TemplateError as e:
+            errors[name] = str(e)
+    return {
+        'templates': len(names),
+        'errors': errors,
+        'ms': round((time.perf_counter() - started) * 1000, 1),
+    }
+
+
+def precompile_templates(app, directory, clear=False):
+    """
+    Compile every template into a bytecode cache directory (build step)
+    
+    Args:
+        app: Flask application instance
+        directory: Cache directory the servers will use
+        clear: Remove the directory's existing bytecode first
+    
+    Returns:
+        compile_templates() result
+    """
+    use_bytecode_cache(app, directory)
+    if clear:
+        app.jinja_env.bytecode_cache.clear()
+    # Templates loaded by a warm-up would be served from memory, not written
+    if app.jinja_env.cache is not None:
+        app.jinja_env.cache.clear()
+    return compile_templates(app)
+
+
+def init_template_cache(app):
+    """
+    Set up the bytecode cache and optionally warm the templates
+    
+    With TEMPLATE_CACHE_DIR set, compiled templates are shared through
+    that directory ('flask precompile-templates' fills it at build time).
+    With TEMPLATE_WARMUP, every template is loaded while the app is
+    created, so the first requests after a deploy or worker recycle do
+    not compile; with a preloading server this happens once in the
+    master and the workers inherit the templates.
+    
+    Call once template filters and globals are registered.
+    
+    Args:
+        app: Flask application instance
+    """
+    directory = app.config.get('TEMPLATE_CACHE_DIR')
+    if directory:
+        use_bytecode_cache(app, directory)
+    
+    if app.config.get('TEMPLATE_WARMUP'):
+        result = compile_templates(app)
+        for name, error in result['errors'].items():
+            logger.error(f"Template {name} failed to compile: {error}")
+        logger.info(f"Warmed {result['templates']} templates in {result['ms']}ms")
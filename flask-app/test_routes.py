@@ -23,10 +23,10 @@ def test_routes():
         
         # Test routes
         routes_to_test = [
-            ('/', 'Homepage'),
-            ('/services', 'Services'),
-            ('/blog', 'Blog Listing'),
-            ('/contact', 'Contact Form'),
+            ('/en/', 'Homepage'),
+            ('/en/services', 'Services'),
+            ('/en/blog', 'Blog Listing'),
+            ('/en/contact', 'Contact Form'),
         ]
         
         print("\n🔍 Testing Routes:")
@@ -49,11 +49,11 @@ def test_routes():
         posts = BlogPost.query.filter_by(status='published').first()
         if posts:
             try:
-                response = client.get(f'/blog/{posts.slug}')
+                response = client.get(f'/en/blog/{posts.slug}')
                 if response.status_code == 200:
-                    print(f"  ✓ Blog Post Detail (/blog/{posts.slug}) - Status: {response.status_code}")
+                    print(f"  ✓ Blog Post Detail (/en/blog/{posts.slug}) - Status: {response.status_code}")
                 else:
-                    print(f"  ✗ Blog Post Detail (/blog/{posts.slug}) - Status: {response.status_code}")
+                    print(f"  ✗ Blog Post Detail (/en/blog/{posts.slug}) - Status: {response.status_code}")
                     all_passed = False
             except Exception as e:
                 print(f"  ✗ Blog Post Detail - Error: {e}")
@@ -0,0 +1,53 @@
+"""
+Shared pytest fixtures
+"""
+
+from contextlib import contextmanager
+import pytest
+from app import create_app
+from config import TestingConfig
+from models import db
+from instrumentation import QueryRecorder
+
+
+@pytest.fixture
+def app():
+    """Application with an empty in-memory database"""
+    app = create_app(TestingConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    """Test client for the app fixture"""
+    return app.test_client()
+
+
+@pytest.fixture
+def query_budget(app):
+    """
+    Fail the test if a block runs more SQL statements than allowed
+    
+    Usage:
+        with query_budget(3):
+            client.get('/en/blog')
+    
+    The failure message lists every statement with its execution count,
+    so an N+1 pattern shows up as one statement run many times.
+    """
+    @contextmanager
+    def budget(max_queries):
+        with QueryRecorder(*db.engines.values()) as queries:
+            yield queries
+        if queries.count > max_queries:
+            listing = '\n'.join(
+                f"  {executions}x {' '.join(statement.split())[:200]}"
+                for statement, executions in queries.stats.statements.most_common()
+            )
+            pytest.fail(f"{queries.count} queries exceed the budget of {max_queries}:\n{listing}")
+    
+    return budget
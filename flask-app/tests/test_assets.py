@@ -0,0 +1,163 @@
+"""
+Unit Tests for Static Assets
+"""
+
+import gzip
+import os
+import re
+import shutil
+import tempfile
+import unittest
+from app import create_app
+from config import TestingConfig
+from assets import VENDOR_ASSETS, build_assets, minify_css
+from models import db
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'static')
+
+ICONS_CSS = (
+    '@font-face {\n'
+    '    font-family: "bootstrap-icons";\n'
+    '    src: url("./fonts/bootstrap-icons.woff2?1fa40e") format("woff2"),\n'
+    '         url("./fonts/bootstrap-icons.woff?1fa40e") format("woff");\n'
+    '}\n'
+)
+
+
+class TestAssets(unittest.TestCase):
+    """Test the asset build, static_url() and immutable serving"""
+    
+    def setUp(self):
+        """Set up test fixtures: the project's sources plus stand-in vendored files"""
+        self.directory = tempfile.TemporaryDirectory()
+        self.static_dir = self.directory.name
+        shutil.copytree(STATIC_DIR, self.static_dir, dirs_exist_ok=True,
+                        ignore=shutil.ignore_patterns('dist', 'vendor', 'uploads'))
+        for name in VENDOR_ASSETS:
+            path = os.path.join(self.static_dir, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w') as f:
+                f.write(ICONS_CSS if name == 'vendor/bootstrap-icons.css' else f'/* {name} */ ' * 100)
+    
+    def tearDown(self):
+        """Clean up after tests"""
+        self.directory.cleanup()
+    
+    def create_app(self):
+        app = create_app(type('AssetConfig', (TestingConfig,), {'ASSETS_STATIC_DIR': self.static_dir}))
+        with app.app_context():
+            db.create_all()
+        return app
+    
+    def test_build_fingerprints_and_precompresses(self):
+        """Test every asset gets a content-hashed name, a manifest entry and a .gz sibling"""
+        result = build_assets(self.static_dir)
+        
+        manifest = result['manifest']
+        self.assertRegex(manifest['css/site.css'], r'^css/site\.[0-9a-f]{12}\.css$')
+        self.assertIn('vendor/fonts/bootstrap-icons.woff2', manifest)
+        dist = os.path.join(self.static_dir, 'dist')
+        self.assertTrue(os.path.isfile(os.path.join(dist, 'manifest.json')))
+        with open(os.path.join(dist, manifest['js/site.js']), 'rb') as f:
+            script = f.read()
+        with open(os.path.join(dist, manifest['js/site.js'] + '.gz'), 'rb') as f:
+            self.assertEqual(gzip.decompress(f.read()), script)
+        self.assertLess(result['bytes']['output'], result['bytes']['source'])
+    
+    def test_build_rewrites_stylesheet_urls(self):
+        """Test stylesheets point at the fingerprinted fonts"""
+        manifest = build_assets(self.static_dir)['manifest']
+        
+        with open(os.path.join(self.static_dir, 'dist', manifest['vendor/bootstrap-icons.css'])) as f:
+            css = f.read()
+        font = os.path.basename(manifest['vendor/fonts/bootstrap-icons.woff2'])
+        self.assertIn(f'url("fonts/{font}")', css)
+    
+    def test_fingerprint_follows_content(self):
+        """Test an edited file gets a new name and an unchanged one keeps its name"""
+        first = build_assets(self.static_dir)['manifest']
+        with open(os.path.join(self.static_dir, 'css', 'site.css'), 'a') as f:
+            f.write('.new-rule { color: red; }\n')
+        second = build_assets(self.static_dir)['manifest']
+        
+        self.assertNotEqual(first['css/site.css'], second['css/site.css'])
+        self.assertEqual(first['js/site.js'], second['js/site.js'])
+    
+    def test_minify_css(self):
+        """Test comments and insignificant whitespace are removed"""
+        css = '/* note */\n.a > .b,\n.c {\n    color: red;\n    margin: 0 auto;\n}\n'
+        
+        self.assertEqual(minify_css(css), '.a>.b,.c{color:red;margin:0 auto}\n')
+    
+    def test_pages_link_fingerprinted_assets(self):
+        """Test static_url() resolves through the manifest once built"""
+        build_assets(self.static_dir)
+        app = self.create_app()
+        
+        html = app.test_client().get('/en/').get_data(as_text=True)
+        
+        urls = re.findall(r'(?:href|src)="(/static/[^"]+)"', html)
+        self.assertIn(app.extensions['assets'].manifest['css/site.css'], ' '.join(urls))
+        self.assertTrue(all(url.startswith('/static/dist/') for url in urls), urls)
+        self.assertNotIn('cdn.jsdelivr.net', html)
+    
+    def test_assets_are_immutable_and_precompressed(self):
+        """Test fingerprinted files are cached forever and sent gzipped when accepted"""
+        manifest = build_assets(self.static_dir)['manifest']
+        client = self.create_app().test_client()
+        url = f"/static/dist/{manifest['css/site.css']}"
+        
+        response = client.get(url, headers={'Accept-Encoding': 'gzip'})
+        plain = client.get(url)
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('immutable', response.headers['Cache-Control'])
+        self.assertIn('max-age=31536000', response.headers['Cache-Control'])
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(response.mimetype, 'text/css')
+        self.assertIn('Accept-Encoding', response.headers['Vary'])
+        self.assertEqual(gzip.decompress(response.data), plain.data)
+        self.assertNotIn('Content-Encoding', plain.headers)
+    
+    def test_csp_is_self_only_when_vendored(self):
+        """Test the policy allows no inline code and no CDN once libraries are vendored"""
+        response = self.create_app().test_client().get('/en/')
+        
+        policy = response.headers['Content-Security-Policy']
+        self.assertIn("script-src 'self';", policy)
+        self.assertIn("style-src 'self';", policy)
+        self.assertNotIn('unsafe-inline', policy)
+        self.assertNotIn('cdn.jsdelivr.net', policy)
+    
+    def test_cdn_fallback_until_vendored(self):
+        """Test missing libraries load from their CDN, which the policy then allows"""
+        shutil.rmtree(os.path.join(self.static_dir, 'vendor'))
+        response = self.create_app().test_client().get('/en/')
+        
+        html = response.get_data(as_text=True)
+        self.assertIn(VENDOR_ASSETS['vendor/bootstrap.min.css'], html)
+        self.assertIn('/static/css/site.css', html)
+        self.assertIn("script-src 'self' https://cdn.jsdelivr.net;", response.headers['Content-Security-Policy'])
+    
+    def test_build_cli(self):
+        """Test 'flask build-assets' builds and reloads the manifest"""
+        app = self.create_app()
+        
+        result = app.test_cli_runner().invoke(args=['build-assets'])
+        
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn('css/site.css', app.extensions['assets'].manifest)
+    
+    def test_pages_have_no_inline_code(self):
+        """Test pages carry no inline scripts, styles or event handlers the CSP would block"""
+        client = self.create_app().test_client()
+        
+        for path in ('/en/', '/en/blog', '/en/services', '/en/contact', '/admin/login', '/en/missing'):
+            html = client.get(path).get_data(as_text=True)
+            self.assertNotIn('<style', html, path)
+            self.assertNotIn('<script>', html, path)
+            self.assertNotRegex(html, r'\s(style|on[a-z]+)="', path)
+
+
+if __name__ == '__main__':
+    unittest.main()
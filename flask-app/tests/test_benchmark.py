@@ -0,0 +1,114 @@
+"""
+Unit Tests for HTTP Benchmarks
+"""
+
+import os
+import tempfile
+import unittest
+from benchmark import percentile, compare_results, run_benchmark, lock_contention, card_rendering, \
+    first_request_latency, compression_cost, feed_polling
+
+
+class TestBenchmark(unittest.TestCase):
+    """Test benchmark measurements and run comparison"""
+    
+    def test_percentile_nearest_rank(self):
+        """Test nearest-rank percentiles"""
+        values = list(range(1, 101))
+        
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 95), 95)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertIsNone(percentile([], 50))
+    
+    def test_compare_flags_regressions(self):
+        """Test slower latency and extra queries are flagged, noise is not"""
+        baseline = {'endpoints': {'blog': {'p95_ms': 100.0, 'queries_per_request': 3.0,
+                                           'requests_per_second': 50.0}}}
+        current = {'endpoints': {'blog': {'p95_ms': 105.0, 'queries_per_request': 4.0,
+                                          'requests_per_second': 40.0}}}
+        
+        rows = {row['metric']: row for row in compare_results(baseline, current, threshold=0.10)}
+        
+        self.assertFalse(rows['p95_ms']['regression'])
+        self.assertTrue(rows['queries_per_request']['regression'])
+        self.assertTrue(rows['requests_per_second']['regression'])
+    
+    def test_inprocess_run_records_metrics(self):
+        """Test an in-process run measures every requested endpoint"""
+        with tempfile.TemporaryDirectory() as directory:
+            results = run_benchmark(
+                dataset={'posts': 5, 'comments': 20, 'inquiries': 3, 'seed': 1},
+                scenarios=['blog_post', 'comment_post', 'admin_dashboard'],
+                requests=4,
+                concurrency=2,
+                warmup=1,
+                work_dir=directory
+            )
+        
+        self.assertEqual(set(results['endpoints']), {'blog_post', 'comment_post', 'admin_dashboard'})
+        for entry in results['endpoints'].values():
+            self.assertEqual((entry['requests'], entry['errors']), (4, 0))
+            self.assertGreater(entry['queries_per_request'], 0)
+            self.assertIsNotNone(entry['p99_ms'])
+        self.assertEqual(results['meta']['mode'], 'inprocess')
+    
+    def test_lock_contention_runs_both_setups(self):
+        """Test the mixed read/write benchmark measures readers and writers per setup"""
+        with tempfile.TemporaryDirectory() as directory:
+            results = lock_contention(
+                readers=1, writers=1, duration=0.3,
+                dataset={'posts': 5, 'comments': 20, 'inquiries': 3, 'seed': 1},
+                work_dir=directory
+            )
+            leftovers = [name for name in os.listdir(directory) if name.startswith('contention-')]
+        
+        self.assertEqual(set(results), {'default', 'tuned'})
+        for roles in results.values():
+            for entry in roles.values():
+                self.assertGreater(entry['requests'], 0)
+                self.assertEqual(entry['errors'], 0)
+        self.assertEqual(leftovers, [])
+    
+    def test_card_rendering_variants(self):
+        """Test the render microbenchmark times ORM, cold and cached cards"""
+        results = card_rendering(posts=3, rounds=5)
+        
+        self.assertEqual(list(results), ['orm', 'cards_cold', 'cards'])
+        for entry in results.values():
+            self.assertGreater(entry['us_per_page'], 0)
+    
+    def test_first_request_latency_setups(self):
+        """Test each template setup times app creation and every first request"""
+        results = first_request_latency(paths=('/en/', '/admin/login'), runs=1)
+        
+        self.assertEqual(list(results), ['cold', 'bytecode', 'warmed'])
+        for entry in results.values():
+            self.assertEqual(list(entry['per_path_ms']), ['/en/', '/admin/login'])
+            self.assertGreater(entry['first_requests_ms'], 0)
+    
+    def test_compression_cost_per_page(self):
+        """Test each page reports identity and gzip sizes, cached only when shared"""
+        results = compression_cost(rounds=2, dataset={'posts': 5})
+        
+        pages = list(results.values())
+        self.assertEqual(len(pages), 3)
+        for variants in pages:
+            self.assertLess(variants['gzip']['bytes'], variants['identity']['bytes'])
+        self.assertIn('gzip_cached', pages[0])
+        self.assertNotIn('gzip_cached', pages[2])
+    
+    def test_feed_polling_variants(self):
+        """Test rebuilt and cached documents match and unchanged ones get 304 with no body"""
+        results = feed_polling(rounds=2, dataset={'posts': 5})
+        
+        for path in ('/sitemap.xml', '/en/blog/rss.xml'):
+            variants = results[path]
+            self.assertEqual(variants['rebuild']['bytes'], variants['cached']['bytes'])
+            self.assertEqual((variants['not_modified']['status'], variants['not_modified']['bytes']), (304, 0))
+            self.assertEqual(variants['not_modified_unchecked']['status'], 304)
+        self.assertEqual(results['/en/blog']['listing']['status'], 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
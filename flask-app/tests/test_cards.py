@@ -0,0 +1,106 @@
+"""
+Unit Tests for Post Cards
+"""
+
+import unittest
+from datetime import datetime
+from flask import g
+from app import create_app
+from config import TestingConfig
+from cards import PostCard, PostCardCache, post_cards
+from models import db, BlogPost
+
+
+class TestPostCards(unittest.TestCase):
+    """Test localized card view models and their cache"""
+    
+    def setUp(self):
+        """Set up test fixtures"""
+        self.app = create_app(TestingConfig)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.post = BlogPost(
+            title_en='Study tips', title_pl='Porady naukowe', slug='study-tips',
+            content_en='Content', content_pl='Treść', excerpt_en='Short', excerpt_pl='Krótko',
+            category_en='Tips', category_pl='Porady', status='published',
+            created_at=datetime(2024, 3, 1), published_at=None
+        )
+        db.session.add(self.post)
+        db.session.commit()
+        self.client = self.app.test_client()
+    
+    def tearDown(self):
+        """Clean up after tests"""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+    
+    def test_card_is_localized(self):
+        """Test a card holds the text, date and URL for its language"""
+        with self.app.test_request_context('/pl/blog'):
+            card = PostCard(self.post, 'pl')
+        
+        self.assertEqual((card.title, card.excerpt, card.category), ('Porady naukowe', 'Krótko', 'Porady'))
+        self.assertEqual(card.url, '/pl/blog/study-tips')
+        self.assertEqual(card.date, 'March 01, 2024')
+        self.assertFalse(hasattr(card, '__dict__'))
+    
+    def test_cache_reuses_cards_until_edited(self):
+        """Test cards are reused per language and rebuilt after an edit"""
+        cache = PostCardCache(maxsize=10)
+        with self.app.test_request_context('/en/blog'):
+            first = cache.get(self.post, 'en')
+            self.assertIs(cache.get(self.post, 'en'), first)
+            self.assertIsNot(cache.get(self.post, 'pl'), first)
+            
+            self.post.title_en = 'Better study tips'
+            db.session.commit()
+            edited = cache.get(self.post, 'en')
+        
+        self.assertEqual(edited.title, 'Better study tips')
+        self.assertEqual((cache.hits, cache.misses), (1, 3))
+    
+    def test_cache_is_bounded(self):
+        """Test the least recently used cards are evicted, and size 0 keeps none"""
+        cache = PostCardCache(maxsize=1)
+        with self.app.test_request_context('/en/blog'):
+            cache.get(self.post, 'en')
+            cache.get(self.post, 'pl')
+            self.assertEqual(len(cache), 1)
+            
+            disabled = PostCardCache(maxsize=0)
+            disabled.get(self.post, 'en')
+            self.assertEqual(len(disabled), 0)
+    
+    def test_views_do_not_invalidate_cards(self):
+        """Test counting a view leaves updated_at, and so the cached card, alone"""
+        updated_at = self.post.updated_at
+        
+        self.post.increment_views()
+        
+        self.assertEqual(self.post.views_count, 1)
+        self.assertEqual(self.post.updated_at, updated_at)
+    
+    def test_post_cards_use_page_language(self):
+        """Test post_cards() defaults to the page's language and shares the app cache"""
+        with self.app.test_request_context('/pl/blog'):
+            g.lang_code = 'pl'
+            cards = post_cards([self.post])
+        
+        self.assertEqual(cards[0].title, 'Porady naukowe')
+        self.assertEqual(len(self.app.extensions['post_cards']), 1)
+    
+    def test_listing_renders_cards(self):
+        """Test the listing shows card fields and the live view count"""
+        self.post.increment_views()
+        
+        html = self.client.get('/pl/blog').get_data(as_text=True)
+        
+        self.assertIn('Porady naukowe', html)
+        self.assertIn('href="/pl/blog/study-tips"', html)
+        self.assertIn('<i class="bi bi-eye"></i> 1', html)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,148 @@
+"""
+Unit Tests for Response Compression
+"""
+
+import gzip
+import unittest
+from flask import Response, session
+from werkzeug.datastructures import Accept
+from app import create_app
+from config import TestingConfig
+from compression import choose_encoding
+from models import db
+
+LONG_TEXT = '<p>Compressible paragraph of a long bilingual post.</p>' * 100
+
+
+class TestEncodingNegotiation(unittest.TestCase):
+    """Test choosing an encoding from Accept-Encoding"""
+    
+    def test_quality_values(self):
+        """Test the client's preferences, then the server's order, decide"""
+        both = ('br', 'gzip')
+        
+        self.assertEqual(choose_encoding(Accept([('gzip', 1), ('br', 1)]), both), 'br')
+        self.assertEqual(choose_encoding(Accept([('gzip', 1), ('br', 0.5)]), both), 'gzip')
+        self.assertEqual(choose_encoding(Accept([('*', 1)]), ('gzip',)), 'gzip')
+        self.assertIsNone(choose_encoding(Accept([('gzip', 0)]), ('gzip',)))
+        self.assertIsNone(choose_encoding(Accept([('deflate', 1)]), both))
+
+
+class TestCompression(unittest.TestCase):
+    """Test response encoding, skipping rules and the compressed page cache"""
+    
+    def setUp(self):
+        """Set up test fixtures"""
+        self.app = create_app(TestingConfig)
+        
+        @self.app.route('/test/long')
+        def long_page():
+            return LONG_TEXT
+        
+        @self.app.route('/test/short')
+        def short_page():
+            return '<p>Short</p>'
+        
+        @self.app.route('/test/private')
+        def private_page():
+            return f"{session.get('name', 'guest')}{LONG_TEXT}"
+        
+        @self.app.route('/test/binary')
+        def binary():
+            return Response(b'\0' * 4096, mimetype='image/png')
+        
+        @self.app.route('/test/stream')
+        def stream():
+            return Response((LONG_TEXT for _ in range(5)), mimetype='text/html')
+        
+        @self.app.route('/test/etag')
+        def tagged():
+            response = Response(LONG_TEXT)
+            response.set_etag('v1')
+            return response
+        
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+        self.cache = self.app.extensions['compression']
+    
+    def tearDown(self):
+        """Clean up after tests"""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+    
+    def get(self, path, encoding='gzip'):
+        return self.client.get(path, headers={'Accept-Encoding': encoding})
+    
+    def test_gzip_when_accepted(self):
+        """Test a page is gzipped for clients that accept it and varies on the header"""
+        response = self.get('/test/long')
+        
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response.headers['Vary'])
+        self.assertEqual(int(response.headers['Content-Length']), len(response.data))
+        self.assertEqual(gzip.decompress(response.data).decode(), LONG_TEXT)
+    
+    def test_identity_without_accept_encoding(self):
+        """Test clients that do not accept gzip get the plain page, still with Vary"""
+        response = self.client.get('/test/long')
+        
+        self.assertNotIn('Content-Encoding', response.headers)
+        self.assertIn('Accept-Encoding', response.headers['Vary'])
+        self.assertEqual(response.get_data(as_text=True), LONG_TEXT)
+    
+    def test_small_and_binary_responses_are_skipped(self):
+        """Test bodies under the threshold and types outside the allowlist are left alone"""
+        self.assertNotIn('Content-Encoding', self.get('/test/short').headers)
+        self.assertNotIn('Content-Encoding', self.get('/test/binary').headers)
+    
+    def test_shared_pages_are_compressed_once(self):
+        """Test pages that are the same for everyone reuse their compressed body"""
+        first = self.get('/test/long').data
+        second = self.get('/test/long').data
+        
+        self.assertEqual(first, second)
+        self.assertEqual((self.cache.misses, self.cache.hits), (1, 1))
+    
+    def test_per_visitor_pages_are_not_cached(self):
+        """Test pages that used the session are compressed but not cached"""
+        response = self.get('/test/private')
+        
+        self.assertEqual(gzip.decompress(response.data).decode(), f'guest{LONG_TEXT}')
+        self.assertEqual(len(self.cache), 0)
+    
+    def test_streamed_responses_are_compressed_as_they_stream(self):
+        """Test streamed bodies are compressed chunk by chunk without a Content-Length"""
+        response = self.get('/test/stream')
+        
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertNotIn('Content-Length', response.headers)
+        self.assertEqual(gzip.decompress(response.data).decode(), LONG_TEXT * 5)
+    
+    def test_strong_etag_becomes_weak(self):
+        """Test the ETag of an encoded response is marked weak"""
+        self.assertEqual(self.get('/test/etag').headers['ETag'], 'W/"v1"')
+        self.assertEqual(self.client.get('/test/etag').headers['ETag'], '"v1"')
+    
+    def test_public_page_compressed(self):
+        """Test a real page is compressed to a fraction of its size"""
+        plain = self.client.get('/en/services').data
+        response = self.get('/en/services')
+        
+        self.assertEqual(gzip.decompress(response.data), plain)
+        self.assertLess(len(response.data), len(plain) / 3)
+    
+    def test_disabled(self):
+        """Test COMPRESSION_ENABLED=False sends every response as it is"""
+        app = create_app(type('PlainConfig', (TestingConfig,), {'COMPRESSION_ENABLED': False}))
+        
+        response = app.test_client().get('/en/services', headers={'Accept-Encoding': 'gzip'})
+        
+        self.assertNotIn('Content-Encoding', response.headers)
+        self.assertNotIn('compression', app.extensions)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,141 @@
+"""
+Unit Tests for Post Content Rendering
+"""
+
+import unittest
+from sqlalchemy import insert, update
+from app import create_app
+from config import TestingConfig
+from models import db, BlogPost
+from content import render_content, render_pending, sanitize_html
+from imports import import_posts
+
+
+class TestSanitizer(unittest.TestCase):
+    """Test the allowlist, heading anchors and word counts"""
+    
+    def test_scripts_and_handlers_are_removed(self):
+        """Test dangerous tags, attributes and URLs are dropped"""
+        html, _ = sanitize_html(
+            '<p onclick="steal()">Hi<script>alert(1)</script><style>p{}</style></p>'
+            '<a href="javascript:alert(1)">a</a><a href=" java\tscript:x">b</a>'
+            '<img src="x" onerror="alert(1)"><iframe src="https://evil.example"></iframe>'
+        )
+        
+        self.assertEqual(html, '<p>Hi</p><a>a</a><a>b</a><img src="x">')
+    
+    def test_allowed_markup_is_kept(self):
+        """Test formatting, safe links and escaped text survive"""
+        html, words = sanitize_html('<p><strong>Bold</strong> <a href="https://example.com" title="x">link</a> 1 &lt; 2</p>')
+        
+        self.assertEqual(html, '<p><strong>Bold</strong> <a href="https://example.com" title="x">link</a> 1 &lt; 2</p>')
+        self.assertEqual(words, 4)
+    
+    def test_unclosed_tags_are_closed(self):
+        """Test a submission cannot leave tags open into the page"""
+        html, _ = sanitize_html('<div><blockquote><em>quote')
+        
+        self.assertEqual(html, '<div><blockquote><em>quote</em></blockquote></div>')
+    
+    def test_headings_get_unique_anchors(self):
+        """Test headings get ids and self-links, and h1 becomes h2"""
+        html, _ = sanitize_html('<h1>Getting started</h1><h2 id="comments">Getting <em>started</em></h2>')
+        
+        self.assertIn('<h2 id="getting-started">Getting started<a class="heading-anchor" href="#getting-started"', html)
+        self.assertIn('<h2 id="getting-started-2">Getting <em>started</em><a', html)
+        self.assertNotIn('comments', html)
+    
+    def test_plain_text_becomes_paragraphs(self):
+        """Test text without HTML gets paragraphs, line breaks and lists"""
+        html, words = render_content('First line\nsecond line\n\n- one\n- two', markdown=False)
+        
+        self.assertEqual(html, '<p>First line<br>second line</p>\n<ul><li>one</li><li>two</li></ul>')
+        self.assertEqual(words, 6)
+    
+    def test_plain_text_is_escaped(self):
+        """Test '<' and '&' in plain text are kept as text, not parsed as markup"""
+        html, words = render_content('Use x<y & z\n\n- item <one>', markdown=False)
+        
+        self.assertEqual(html, '<p>Use x&lt;y &amp; z</p>\n<ul><li>item &lt;one&gt;</li></ul>')
+        self.assertEqual(words, 6)
+
+
+class TestRenderedColumns(unittest.TestCase):
+    """Test posts are rendered when saved and the page outputs the stored HTML"""
+    
+    def setUp(self):
+        """Set up test fixtures"""
+        self.app = create_app(TestingConfig)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.post = BlogPost(
+            title_en='Test Post', title_pl='Wpis', slug='test-post',
+            content_en='<p>' + 'word ' * 450 + '</p><script>alert(1)</script>',
+            content_pl='<p>Treść wpisu</p>', status='published'
+        )
+        db.session.add(self.post)
+        db.session.commit()
+    
+    def tearDown(self):
+        """Clean up after tests"""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+    
+    def test_saved_post_is_rendered(self):
+        """Test creating a post fills the rendered columns of both languages"""
+        self.assertNotIn('<script', self.post.content_html_en)
+        self.assertEqual((self.post.word_count_en, self.post.reading_time_en), (450, 3))
+        self.assertEqual((self.post.word_count_pl, self.post.reading_time_pl), (2, 1))
+    
+    def test_changed_content_is_rendered_again(self):
+        """Test an edit or translation re-renders only the language that changed"""
+        db.session.execute(update(BlogPost).values(content_html_pl='<p>kept</p>'))
+        db.session.commit()
+        
+        self.post.content_en = '<p>Translated <b>text</b></p>'
+        db.session.commit()
+        
+        self.assertEqual(self.post.content_html_en, '<p>Translated <b>text</b></p>')
+        self.assertEqual(self.post.word_count_en, 2)
+        self.assertEqual(self.post.content_html_pl, '<p>kept</p>')
+    
+    def test_page_outputs_stored_html(self):
+        """Test the post page outputs the rendered column as it is"""
+        db.session.execute(update(BlogPost).values(content_html_en='<p>Stored rendering</p>', reading_time_en=7))
+        db.session.commit()
+        
+        html = self.app.test_client().get('/en/blog/test-post').get_data(as_text=True)
+        
+        self.assertIn('<p>Stored rendering</p>', html)
+        self.assertIn('7 min read', html)
+        self.assertNotIn('alert(1)', html)
+    
+    def test_bulk_inserts_are_rendered(self):
+        """Test imported rows carry rendered columns and older rows are rendered by the command"""
+        import_posts([{'title_en': 'Imported post', 'title_pl': 'Zaimportowany',
+                       'content_en': '<p>Imported<img src=x onerror=alert(1)></p>', 'content_pl': 'Treść'}])
+        db.session.execute(insert(BlogPost), [{
+            'title_en': 'Legacy', 'title_pl': 'Stary', 'slug': 'legacy',
+            'content_en': '<p>Old <script>x</script>post</p>', 'content_pl': 'Stary wpis',
+        }])
+        db.session.commit()
+        
+        imported = BlogPost.query.filter_by(slug='imported-post').one()
+        self.assertEqual(imported.content_html_en, '<p>Imported<img src="x"></p>')
+        self.assertEqual(render_pending(), 1)
+        legacy = BlogPost.query.filter_by(slug='legacy').one()
+        self.assertEqual((legacy.content_html_en, legacy.word_count_pl), ('<p>Old post</p>', 2))
+        self.assertEqual(render_pending(), 0)
+    
+    def test_cli(self):
+        """Test 'flask render-content --all'"""
+        result = self.app.test_cli_runner().invoke(args=['render-content', '--all'])
+        
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn('Rendered the content of 1 post(s)', result.output)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+"""
+Unit Tests for Customer Blog Submissions
+"""
+
+import re
+import unittest
+from app import create_app
+from config import TestingConfig
+from models import db, BlogPost
+
+
+class TestCustomerBlogSubmission(unittest.TestCase):
+    """Test the lazily loaded submission form and its CSRF protection"""
+    
+    def setUp(self):
+        """Set up test fixtures"""
+        config = type('SubmissionConfig', (TestingConfig,), {
+            'WTF_CSRF_ENABLED': True,
+            'PUBLIC_CACHE_MAX_AGE': 300,
+        })
+        self.app = create_app(config)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+    
+    def tearDown(self):
+        """Clean up after tests"""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+    
+    def submission(self, **data):
+        values = {
+            'language': 'en',
+            'title': 'My first post',
+            'content': 'A customer post that is comfortably longer than fifty characters.',
+        }
+        values.update(data)
+        return values
+    
+    def test_blog_listing_has_no_token_or_cookie(self):
+        """Test the listing renders no CSRF token and stays publicly cacheable"""
+        response = self.client.get('/en/blog')
+        html = response.get_data(as_text=True)
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('csrf_token', html)
+        self.assertIn('data-src="/en/blog/submit"', html)
+        self.assertNotIn('Set-Cookie', response.headers)
+        self.assertEqual(response.headers['Cache-Control'], 'public, max-age=300')
+    
+    def test_form_fragment_carries_token(self):
+        """Test GET on the submit URL returns the form with a fresh, uncacheable token"""
+        response = self.client.get('/en/blog/submit')
+        html = response.get_data(as_text=True)
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('<html', html)
+        self.assertIn('name="csrf_token"', html)
+        self.assertIn('action="/en/blog/submit"', html)
+        self.assertIn('Set-Cookie', response.headers)
+        self.assertTrue(response.cache_control.no_store)
+    
+    def test_submit_with_fetched_token(self):
+        """Test a submission using the fetched token creates a pending post"""
+        html = self.client.get('/pl/blog/submit').get_data(as_text=True)
+        token = re.search(r'name="csrf_token" type="hidden" value="([^"]+)"', html).group(1)
+        
+        response = self.client.post('/pl/blog/submit', data=self.submission(csrf_token=token, language='pl'))
+        
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response.headers['Location'], '/pl/blog')
+        post = BlogPost.query.one()
+        self.assertEqual((post.status, post.customer_language, post.title_pl), ('pending', 'pl', 'My first post'))
+    
+    def test_submit_without_token_is_rejected(self):
+        """Test CSRF protection still applies to submissions"""
+        self.client.get('/en/blog')
+        
+        response = self.client.post('/en/blog/submit', data=self.submission())
+        
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(BlogPost.query.count(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+"""
+Unit Tests for Database Engine Configuration
+"""
+
+import os
+import tempfile
+import unittest
+from sqlalchemy.exc import OperationalError
+from app import create_app
+from config import TestingConfig
+from database import READ_BIND
+from instrumentation import QueryRecorder
+from models import db, create_schema, BlogPost
+
+
+class TestSqliteEngines(unittest.TestCase):
+    """Test pragmas and the read/write split on a SQLite file"""
+    
+    def setUp(self):
+        """Set up test fixtures"""
+        self.directory = tempfile.TemporaryDirectory()
+        config = type('FileConfig', (TestingConfig,), {
+            'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + os.path.join(self.directory.name, 'test.db')
+        })
+        self.app = create_app(config)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        create_schema()
+        db.session.add(BlogPost(
+            title_en='Study tips', title_pl='Porady', slug='study-tips',
+            content_en='Content', content_pl='Treść', status='published'
+        ))
+        db.session.commit()
+        self.client = self.app.test_client()
+    
+    def tearDown(self):
+        """Clean up after tests"""
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+        self.app_context.pop()
+        self.directory.cleanup()
+    
+    def pragma(self, bind, name):
+        with db.engines[bind].connect() as conn:
+            return conn.exec_driver_sql(f'PRAGMA {name}').scalar()
+    
+    def test_pragmas_applied(self):
+        """Test WAL, NORMAL sync and busy timeout on both engines; query_only on reads"""
+        for bind in (None, READ_BIND):
+            self.assertEqual(self.pragma(bind, 'journal_mode'), 'wal')
+            self.assertEqual(self.pragma(bind, 'synchronous'), 1)
+            self.assertEqual(self.pragma(bind, 'busy_timeout'), 5000)
+        self.assertEqual(self.pragma(READ_BIND, 'query_only'), 1)
+        self.assertEqual(self.pragma(None, 'query_only'), 0)
+    
+    def test_read_engine_rejects_writes(self):
+        """Test a write that reached the read engine fails instead of taking the write lock"""
+        with db.engines[READ_BIND].connect() as conn:
+            with self.assertRaises(OperationalError):
+                conn.exec_driver_sql("UPDATE blog_posts SET views_count = 1")
+    
+    def test_request_reads_use_read_engine(self):
+        """Test a page's reads go to the read engine and its view count to the writer"""
+        with QueryRecorder(db.engines[READ_BIND]) as reads, QueryRecorder(db.engine) as writes:
+            response = self.client.get('/en/blog/study-tips')
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(reads.count, 0)
+        self.assertTrue(all(s.startswith('SELECT') for s in reads.stats.statements))
+        self.assertTrue(any(s.startswith('UPDATE blog_posts') for s in writes.stats.statements))
+        self.assertEqual(db.session.scalar(db.select(BlogPost.views_count)), 1)
+    
+    def test_reads_outside_requests_use_writer(self):
+        """Test CLI and background code keep using the default engine"""
+        with QueryRecorder(db.engines[READ_BIND]) as reads:
+            db.session.get(BlogPost, 1)
+        
+        self.assertEqual(reads.count, 0)
+    
+    def test_memory_database_has_no_read_engine(self):
+        """Test in-memory databases (one per connection) are not split"""
+        app = create_app(TestingConfig)
+        with app.app_context():
+            self.assertEqual(list(db.engines), [None])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+"""
+Unit Tests for Synthetic Data Generator
+"""
+
+import os
+import random
+import sqlite3
+import tempfile
+import unittest
+from app import create_app
+from config import TestingConfig
+from models import db, BlogPost, Comment, ContactInquiry
+from datagen import generate_dataset, generate_comments, ensure_fixture_database
+
+
+class TestDataGenerator(unittest.TestCase):
+    """Test deterministic dataset generation"""
+    
+    def setUp(self):
+        """Set up test fixtures"""
+        self.app = create_app(TestingConfig)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+    
+    def tearDown(self):
+        """Clean up after tests"""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+    
+    def test_same_seed_same_rows(self):
+        """Test generation is deterministic for a seed"""
+        first = list(generate_comments(random.Random(7), 50, 10))
+        second = list(generate_comments(random.Random(7), 50, 10))
+        
+        self.assertEqual(first, second)
+        self.assertTrue(all(1 <= row['post_id'] <= 10 for row in first))
+    
+    def test_generate_dataset_counts(self):
+        """Test requested volumes are inserted with every comment status"""
+        stats = generate_dataset(posts=20, comments=500, inquiries=10, chunk_size=64)
+        
+        self.assertEqual((stats['posts'], stats['comments'], stats['inquiries']), (20, 500, 10))
+        self.assertEqual(BlogPost.query.count(), 20)
+        self.assertEqual(ContactInquiry.query.count(), 10)
+        statuses = {status for (status,) in db.session.query(Comment.status).distinct()}
+        self.assertEqual(statuses, {'approved', 'pending', 'rejected', 'spam'})
+    
+    def test_refuses_non_empty_database(self):
+        """Test generating into a populated database is refused"""
+        generate_dataset(posts=1, comments=0, inquiries=0)
+        with self.assertRaises(ValueError):
+            generate_dataset(posts=1, comments=0, inquiries=0)
+    
+    def test_fixture_database_is_cached(self):
+        """Test fixture databases are generated once and reused"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = ensure_fixture_database(5, 20, 3, directory=directory)
+            mtime = os.path.getmtime(path)
+            
+            self.assertEqual(ensure_fixture_database(5, 20, 3, directory=directory), path)
+            self.assertEqual(os.path.getmtime(path), mtime)
+            
+            conn = sqlite3.connect(path)
+            self.assertEqual(conn.execute('SELECT COUNT(*) FROM comments').fetchone()[0], 20)
+            conn.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
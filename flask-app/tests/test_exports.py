@@ -0,0 +1,81 @@
+"""
+Unit Tests for Data Export
+"""
+
+import csv
+import gzip
+import io
+import json
+import unittest
+from app import create_app
+from config import TestingConfig
+from models import db, ContactInquiry
+from exports import export_criteria, generate_export
+
+
+class TestExports(unittest.TestCase):
+    """Test streaming CSV/NDJSON export"""
+    
+    def setUp(self):
+        """Set up test fixtures"""
+        self.app = create_app(TestingConfig)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        
+        for i in range(7):
+            db.session.add(ContactInquiry(
+                name=f"Person {i}",
+                email=f"person{i}@example.com",
+                subject="Question",
+                message="Zażółć gęślą jaźń, a question",
+                subscribe_newsletter=i % 2 == 0,
+                status="new" if i < 5 else "resolved"
+            ))
+        db.session.commit()
+    
+    def tearDown(self):
+        """Clean up after tests"""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+    
+    def test_csv_export_across_chunks(self):
+        """Test keyset chunks produce every matching row exactly once"""
+        criteria = export_criteria('inquiries', 'new', newsletter=True)
+        data = b''.join(generate_export('inquiries', 'csv', criteria, chunk_size=2))
+        
+        rows = list(csv.DictReader(io.StringIO(data.decode('utf-8'))))
+        
+        self.assertEqual([row['name'] for row in rows], ['Person 0', 'Person 2', 'Person 4'])
+        self.assertEqual(rows[0]['message'], 'Zażółć gęślą jaźń, a question')
+    
+    def test_gzipped_ndjson_export(self):
+        """Test gzip output decompresses to one JSON object per line"""
+        data = b''.join(generate_export('inquiries', 'ndjson', compress=True, chunk_size=3))
+        
+        lines = gzip.decompress(data).decode('utf-8').splitlines()
+        
+        self.assertEqual(len(lines), 7)
+        self.assertEqual(json.loads(lines[-1])['status'], 'resolved')
+    
+    def test_admin_export_requires_login(self):
+        """Test export endpoint redirects anonymous users"""
+        response = self.app.test_client().get('/admin/export/inquiries.csv')
+        self.assertEqual(response.status_code, 302)
+    
+    def test_admin_export_streams_attachment(self):
+        """Test export endpoint applies the status filter"""
+        client = self.app.test_client()
+        with client.session_transaction() as sess:
+            sess['is_admin'] = True
+        
+        response = client.get('/admin/export/inquiries.csv?status=resolved')
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('attachment', response.headers['Content-Disposition'])
+        self.assertEqual(len(response.get_data(as_text=True).strip().splitlines()), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,176 @@
+"""
+Unit Tests for the Sitemap and Feeds
+"""
+
+import unittest
+import xml.etree.ElementTree as ET
+from datetime import datetime
+from app import create_app
+from config import TestingConfig
+from models import db, BlogPost
+from instrumentation import QueryRecorder
+
+SITEMAP = '{http://www.sitemaps.org/schemas/sitemap/0.9}'
+ATOM = '{http://www.w3.org/2005/Atom}'
+
+
+class TestFeeds(unittest.TestCase):
+    """Test sitemap sharding, feed contents, conditional requests and rebuilds"""
+    
+    def setUp(self):
+        """Set up test fixtures"""
+        self.app = create_app(type('FeedConfig', (TestingConfig,), {
+            'FEEDS_CHECK_SECONDS': 0,
+            'FEED_POSTS': 3,
+        }))
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        self.create_posts()
+        self.client = self.app.test_client()
+        self.cache = self.app.extensions['feeds']
+    
+    def create_posts(self):
+        db.create_all()
+        for i in range(5):
+            db.session.add(BlogPost(
+                title_en=f'Post {i} & more', title_pl=f'Wpis {i}', slug=f'post-{i}',
+                content_en='Content', content_pl='Treść', excerpt_en=f'Excerpt {i}',
+                status='published', published_at=datetime(2024, 1, i + 1)
+            ))
+        db.session.add(BlogPost(
+            title_en='Draft', title_pl='Szkic', slug='draft',
+            content_en='Content', content_pl='Treść', status='draft'
+        ))
+        db.session.commit()
+    
+    def tearDown(self):
+        """Clean up after tests"""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+    
+    def locs(self, response):
+        self.assertEqual(response.status_code, 200)
+        return [loc.text for loc in ET.fromstring(response.data).iter(f'{SITEMAP}loc')]
+    
+    def test_sitemap_lists_published_pages_in_every_language(self):
+        """Test the sitemap has each page and published post once per language"""
+        response = self.client.get('/sitemap.xml')
+        
+        urls = self.locs(response)
+        self.assertEqual(response.mimetype, 'application/xml')
+        self.assertEqual(len(urls), 2 * (4 + 5))
+        self.assertIn('http://localhost/pl/blog/post-3', urls)
+        self.assertNotIn('http://localhost/en/blog/draft', urls)
+        self.assertIn('hreflang="pl"', response.get_data(as_text=True))
+    
+    def test_large_sitemap_becomes_an_index(self):
+        """Test a sitemap over SITEMAP_MAX_URLS is split into shards listed by an index"""
+        app = create_app(type('ShardConfig', (TestingConfig,), {'SITEMAP_MAX_URLS': 12}))
+        client = app.test_client()
+        with app.app_context():
+            self.create_posts()
+            
+            index = ET.fromstring(client.get('/sitemap.xml').data)
+            
+            self.assertEqual(index.tag, f'{SITEMAP}sitemapindex')
+            shards = [loc.text.replace('http://localhost', '') for loc in index.iter(f'{SITEMAP}loc')]
+            # (12 URLs - 8 pages) // 2 languages = 2 posts per shard: ids 1, 2-3, 4-5
+            self.assertEqual(shards, ['/sitemap-0.xml', '/sitemap-1.xml', '/sitemap-2.xml'])
+            urls = [self.locs(client.get(shard)) for shard in shards]
+            self.assertEqual(sum(len(shard) for shard in urls), 2 * (4 + 5))
+            self.assertTrue(all(len(shard) <= 12 for shard in urls))
+            self.assertEqual(client.get('/sitemap-7.xml').status_code, 404)
+            db.drop_all()
+    
+    def test_feeds(self):
+        """Test RSS and Atom list the newest FEED_POSTS posts in the URL's language"""
+        rss = self.client.get('/en/blog/rss.xml')
+        atom = self.client.get('/pl/blog/atom.xml')
+        
+        self.assertEqual(rss.mimetype, 'application/rss+xml')
+        titles = [title.text for title in ET.fromstring(rss.data).iter('title')]
+        self.assertEqual(titles[1:], ['Post 4 & more', 'Post 3 & more', 'Post 2 & more'])
+        self.assertEqual(atom.mimetype, 'application/atom+xml')
+        entries = ET.fromstring(atom.data).findall(f'{ATOM}entry')
+        self.assertEqual(entries[0].find(f'{ATOM}id').text, 'http://localhost/pl/blog/post-4')
+        self.assertEqual(entries[0].find(f'{ATOM}title').text, 'Wpis 4')
+    
+    def test_conditional_requests(self):
+        """Test a client holding the current ETag or date gets 304 with no body"""
+        first = self.client.get('/en/blog/rss.xml')
+        
+        by_etag = self.client.get('/en/blog/rss.xml', headers={'If-None-Match': first.headers['ETag']})
+        by_date = self.client.get('/en/blog/rss.xml', headers={'If-Modified-Since': first.headers['Last-Modified']})
+        
+        self.assertEqual((by_etag.status_code, by_etag.data), (304, b''))
+        self.assertEqual(by_date.status_code, 304)
+        self.assertEqual(by_etag.headers['ETag'], first.headers['ETag'])
+    
+    def test_weak_etag_of_compressed_feed_matches(self):
+        """Test the weak ETag a gzipped response carries still gets a 304"""
+        headers = {'Accept-Encoding': 'gzip'}
+        first = self.client.get('/en/blog/rss.xml', headers=headers)
+        
+        again = self.client.get('/en/blog/rss.xml', headers=dict(headers, **{'If-None-Match': first.headers['ETag']}))
+        
+        self.assertTrue(first.headers['ETag'].startswith('W/'))
+        self.assertEqual(again.status_code, 304)
+    
+    def test_documents_are_built_once_per_version(self):
+        """Test unchanged posts reuse the document and a 304 costs one small query"""
+        etag = self.client.get('/en/blog/rss.xml').headers['ETag']
+        self.client.get('/en/blog/rss.xml')
+        
+        with QueryRecorder(*db.engines.values()) as queries:
+            self.client.get('/en/blog/rss.xml', headers={'If-None-Match': etag})
+        
+        self.assertEqual((self.cache.misses, self.cache.hits), (1, 1))
+        self.assertEqual(queries.count, 1)
+    
+    def test_edit_rebuilds_the_feed(self):
+        """Test editing a listed post changes the ETag and the feed"""
+        etag = self.client.get('/en/blog/rss.xml').headers['ETag']
+        post = BlogPost.query.filter_by(slug='post-4').first()
+        post.title_en = 'Edited title'
+        db.session.commit()
+        
+        response = self.client.get('/en/blog/rss.xml', headers={'If-None-Match': etag})
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Edited title', response.get_data(as_text=True))
+        self.assertNotEqual(response.headers['ETag'], etag)
+    
+    def test_publish_rebuilds_the_sitemap(self):
+        """Test a newly published post appears in the sitemap"""
+        self.client.get('/sitemap.xml')
+        post = BlogPost.query.filter_by(slug='draft').first()
+        post.status = 'published'
+        post.published_at = datetime(2024, 2, 1)
+        db.session.commit()
+        
+        self.assertIn('http://localhost/en/blog/draft', self.locs(self.client.get('/sitemap.xml')))
+        self.assertIn('Draft', self.client.get('/en/blog/rss.xml').get_data(as_text=True))
+    
+    def test_versions_are_reused_between_checks(self):
+        """Test FEEDS_CHECK_SECONDS lets a worker answer polls without querying"""
+        self.cache.check_seconds = 60
+        etag = self.client.get('/en/blog/atom.xml').headers['ETag']
+        
+        with QueryRecorder(*db.engines.values()) as queries:
+            response = self.client.get('/en/blog/atom.xml', headers={'If-None-Match': etag})
+        
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(queries.count, 0)
+        self.assertEqual(response.headers['Cache-Control'], 'public, max-age=60')
+    
+    def test_pages_link_feeds(self):
+        """Test pages advertise the feeds of their language"""
+        html = self.client.get('/pl/blog').get_data(as_text=True)
+        
+        self.assertIn('type="application/rss+xml"', html)
+        self.assertIn('href="/pl/blog/atom.xml"', html)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+"""
+Unit Tests for Language URLs
+"""
+
+import re
+import unittest
+from app import create_app
+from config import TestingConfig
+from models import db, BlogPost
+
+
+class TestLanguageUrls(unittest.TestCase):
+    """Test language prefixes, redirects, alternates and cacheability"""
+    
+    def setUp(self):
+        """Set up test fixtures"""
+        config = type('LanguageConfig', (TestingConfig,), {
+            'WTF_CSRF_ENABLED': True,
+            'PUBLIC_CACHE_MAX_AGE': 300,
+        })
+        self.app = create_app(config)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        db.session.add(BlogPost(
+            title_en='Study tips', title_pl='Porady naukowe', slug='study-tips',
+            content_en='Content', content_pl='Treść', status='published'
+        ))
+        db.session.commit()
+        self.client = self.app.test_client()
+    
+    def tearDown(self):
+        """Clean up after tests"""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+    
+    def test_root_redirects_by_accept_language(self):
+        """Test / redirects to the best Accept-Language match and varies on it"""
+        response = self.client.get('/', headers={'Accept-Language': 'pl-PL,pl;q=0.9,en;q=0.8'})
+        
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response.headers['Location'], '/pl/')
+        self.assertIn('Accept-Language', response.headers['Vary'])
+        self.assertNotIn('Set-Cookie', response.headers)
+        
+        response = self.client.get('/', headers={'Accept-Language': 'de'})
+        self.assertEqual(response.headers['Location'], '/en/')
+    
+    def test_old_links_keep_path_and_query(self):
+        """Test unprefixed post and listing URLs redirect to their prefixed versions"""
+        response = self.client.get('/blog/study-tips', headers={'Accept-Language': 'pl'})
+        self.assertEqual(response.headers['Location'], '/pl/blog/study-tips')
+        
+        response = self.client.get('/blog?page=2&q=exam')
+        self.assertEqual(response.headers['Location'], '/en/blog?page=2&q=exam')
+    
+    def test_language_comes_from_the_path(self):
+        """Test the prefix selects the content language, whatever the visitor prefers"""
+        response = self.client.get('/pl/blog/study-tips', headers={'Accept-Language': 'en'})
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['Content-Language'], 'pl')
+        self.assertIn('Porady naukowe', response.get_data(as_text=True))
+        self.assertIn('<html lang="pl">', response.get_data(as_text=True))
+        
+        self.assertEqual(self.client.get('/de/blog').status_code, 404)
+    
+    def test_hreflang_alternates(self):
+        """Test pages link to their translations and an x-default"""
+        html = self.client.get('/en/blog?page=1').get_data(as_text=True)
+        
+        self.assertIn('<link rel="alternate" hreflang="en" href="http://localhost/en/blog?page=1">', html)
+        self.assertIn('<link rel="alternate" hreflang="pl" href="http://localhost/pl/blog?page=1">', html)
+        self.assertIn('<link rel="alternate" hreflang="x-default" href="http://localhost/blog?page=1">', html)
+    
+    def test_links_stay_in_page_language(self):
+        """Test url_for() in a Polish page builds Polish URLs"""
+        html = self.client.get('/pl/services').get_data(as_text=True)
+        
+        self.assertIn('href="/pl/blog"', html)
+        self.assertIn('href="/pl/contact"', html)
+        self.assertNotIn('href="/en/blog"', html)
+    
+    def test_anonymous_pages_are_cacheable(self):
+        """Test pages without forms set no cookie and do not vary on cookies"""
+        for path in ('/en/', '/pl/services'):
+            response = self.client.get(path)
+            
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('Set-Cookie', response.headers)
+            self.assertNotIn('Cookie', response.headers.get('Vary', ''))
+            self.assertEqual(response.headers['Cache-Control'], 'public, max-age=300')
+    
+    def test_form_pages_are_cacheable(self):
+        """Test the post and contact pages load their forms and set no session cookie"""
+        for path, fragment in (('/en/blog/study-tips', '/en/blog/study-tips/comment-form'),
+                               ('/en/contact', '/en/contact/form')):
+            response = self.client.get(path)
+            
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('Set-Cookie', response.headers)
+            self.assertNotIn('csrf_token', response.get_data(as_text=True))
+            self.assertIn(f'data-src="{fragment}"', response.get_data(as_text=True))
+            self.assertEqual(response.headers['Cache-Control'], 'public, max-age=300')
+            
+            response = self.client.get(fragment)
+            
+            self.assertIn('name="csrf_token"', response.get_data(as_text=True))
+            self.assertIn('no-store', response.headers['Cache-Control'])
+    
+    def test_invalid_contact_submission_shows_the_form(self):
+        """Test a failed submission re-shows the form with its errors"""
+        html = self.client.get('/en/contact/form').get_data(as_text=True)
+        token = re.search(r'name="csrf_token" type="hidden" value="([^"]+)"', html).group(1)
+        
+        response = self.client.post('/en/contact', data={'csrf_token': token, 'name': 'Anna'})
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('<form', response.get_data(as_text=True))
+        self.assertIn('is-invalid', response.get_data(as_text=True))
+    
+    def test_admin_session_pages_are_not_public(self):
+        """Test a page that read the session is not marked publicly cacheable"""
+        @self.app.route('/en/whoami')
+        def whoami():
+            from flask import session
+            return str(session.get('is_admin', False))
+        
+        response = self.client.get('/en/whoami')
+        
+        self.assertNotIn('Cache-Control', response.headers)
+    
+    def test_old_language_switch_links(self):
+        """Test /set-language swaps the prefix of the previous page without a cookie"""
+        response = self.client.get(
+            '/set-language/pl', headers={'Referer': 'http://localhost/en/blog/study-tips?x=1'}
+        )
+        
+        self.assertEqual(response.headers['Location'], '/pl/blog/study-tips?x=1')
+        self.assertNotIn('Set-Cookie', response.headers)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,202 @@
+"""
+Unit Tests for Uploaded Images
+"""
+
+import io
+import os
+import struct
+import tempfile
+import unittest
+from datetime import datetime
+from app import create_app
+from config import TestingConfig
+from models import db, BlogPost, UploadedImage
+from images import image_info, pillow_available, process_pending
+
+
+def png(width, height):
+    """Bytes of a PNG header of the given size"""
+    return b'\x89PNG\r\n\x1a\n' + struct.pack('>I', 13) + b'IHDR' + struct.pack('>II', width, height) + b'\x08\x02\x00\x00\x00'
+
+
+class TestImageInfo(unittest.TestCase):
+    """Test formats and sizes are read from file headers"""
+    
+    def test_formats(self):
+        """Test PNG, GIF, JPEG and the three WebP encodings"""
+        jpeg = (b'\xff\xd8' + b'\xff\xe0' + struct.pack('>H', 16) + b'JFIF\x00' + b'\x00' * 9
+                + b'\xff\xc0' + struct.pack('>HBHH', 17, 8, 480, 640) + b'\x03')
+        vp8 = b'RIFF\x00\x00\x00\x00WEBPVP8 ' + b'\x00' * 10 + struct.pack('<HH', 800, 600)
+        vp8l = b'RIFF\x00\x00\x00\x00WEBPVP8L' + b'\x00' * 5 + ((99) | (49 << 14)).to_bytes(4, 'little')
+        vp8x = b'RIFF\x00\x00\x00\x00WEBPVP8X' + b'\x00' * 8 + (1919).to_bytes(3, 'little') + (1079).to_bytes(3, 'little')
+        
+        self.assertEqual(image_info(png(1200, 800)), ('png', 1200, 800))
+        self.assertEqual(image_info(b'GIF89a' + struct.pack('<HH', 32, 16)), ('gif', 32, 16))
+        self.assertEqual(image_info(jpeg), ('jpeg', 640, 480))
+        self.assertEqual(image_info(vp8), ('webp', 800, 600))
+        self.assertEqual(image_info(vp8l), ('webp', 100, 50))
+        self.assertEqual(image_info(vp8x), ('webp', 1920, 1080))
+        self.assertIsNone(image_info(b'<svg xmlns="http://www.w3.org/2000/svg"></svg>'))
+    
+    def test_truncated_headers(self):
+        """Test a header cut short is not an image rather than an error"""
+        self.assertIsNone(image_info(png(1200, 800)[:20]))
+        self.assertIsNone(image_info(b'GIF89a\x20\x00'))
+
+
+class TestUploads(unittest.TestCase):
+    """Test storing uploads, serving them and rendering responsive images"""
+    
+    def setUp(self):
+        """Set up test fixtures"""
+        self.directory = tempfile.TemporaryDirectory()
+        self.app = create_app(type('ImageConfig', (TestingConfig,), {
+            'UPLOAD_FOLDER': self.directory.name,
+            'IMAGE_MAX_PIXELS': 4_000_000,
+        }))
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+        with self.client.session_transaction() as sess:
+            sess['is_admin'] = True
+    
+    def tearDown(self):
+        """Clean up after tests"""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        self.directory.cleanup()
+    
+    def submit(self, data, filename, title='Photo post'):
+        return self.client.post('/admin/posts/new', data={
+            'title_en': title, 'title_pl': 'Wpis ze zdjęciem', 'content_en': 'Content ' * 10,
+            'content_pl': 'Treść ' * 10,
+            'status': 'published', 'featured_image': '',
+            'featured_image_file': (io.BytesIO(data), filename),
+        }, content_type='multipart/form-data')
+    
+    def test_upload_is_stored_by_content_hash(self):
+        """Test an upload is stored under its hash and the post points at it"""
+        response = self.submit(png(1200, 800), 'holiday photo.png')
+        
+        self.assertEqual(response.status_code, 302)
+        image = UploadedImage.query.one()
+        self.assertRegex(image.filename, r'^[0-9a-f]{20}\.png$')
+        self.assertEqual((image.format, image.width, image.height), ('png', 1200, 800))
+        self.assertTrue(os.path.exists(os.path.join(self.directory.name, image.filename)))
+        post = BlogPost.query.filter_by(slug='photo-post').one()
+        self.assertEqual(post.featured_image, f'/static/uploads/{image.filename}')
+    
+    def test_same_file_is_stored_once(self):
+        """Test uploading the same bytes twice reuses the stored image"""
+        self.submit(png(1200, 800), 'a.png', title='First post')
+        self.submit(png(1200, 800), 'b.png', title='Second post')
+        
+        self.assertEqual(UploadedImage.query.count(), 1)
+        self.assertEqual(len(os.listdir(self.directory.name)), 1)
+        urls = {post.featured_image for post in BlogPost.query.all()}
+        self.assertEqual(len(urls), 1)
+    
+    def test_invalid_uploads_are_refused(self):
+        """Test wrong extensions, non-image bytes and oversized images re-show the form"""
+        for data, filename, error in (
+            (png(10, 10), 'image.svg', 'Allowed file types'),
+            (b'<?php echo 1; ?>', 'shell.png', 'not a valid'),
+            (png(4000, 4000), 'huge.png', 'at most 4 megapixels'),
+            (png(1200, 800)[:20], 'truncated.png', 'not a valid'),
+        ):
+            response = self.submit(data, filename)
+            
+            self.assertEqual(response.status_code, 200)
+            self.assertIn(error, response.get_data(as_text=True))
+        self.assertEqual(BlogPost.query.count(), 0)
+        self.assertEqual(os.listdir(self.directory.name), [])
+    
+    def test_uploads_are_immutable(self):
+        """Test stored files are served with a long immutable cache lifetime"""
+        self.submit(png(1200, 800), 'a.png')
+        url = BlogPost.query.one().featured_image
+        
+        response = self.client.get(url)
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'image/png')
+        self.assertIn('immutable', response.headers['Cache-Control'])
+    
+    def add_post(self, featured_image):
+        db.session.add(BlogPost(
+            title_en='Photo post', title_pl='Wpis', slug='photo-post', content_en='Content',
+            content_pl='Treść', featured_image=featured_image,
+            status='published', published_at=datetime(2024, 1, 1)
+        ))
+        db.session.commit()
+    
+    def test_pages_size_and_lazy_load_images(self):
+        """Test cards are lazy with their size and the post's hero image is not lazy"""
+        self.submit(png(1200, 800), 'a.png')
+        
+        listing = self.client.get('/en/blog').get_data(as_text=True)
+        post = self.client.get('/en/blog/photo-post').get_data(as_text=True)
+        
+        self.assertIn('width="1200" height="800"', listing)
+        self.assertIn('loading="lazy"', listing)
+        self.assertIn('width="1200" height="800"', post)
+        self.assertIn('fetchpriority="high"', post)
+        self.assertNotIn('loading="lazy"', post)
+    
+    def test_variants_are_offered_by_width(self):
+        """Test ready variants become <source> and srcset candidates"""
+        db.session.add(UploadedImage(
+            key='ab' * 10, filename=f"{'ab' * 10}.png", format='png', width=1200, height=800,
+            size=100, status='ready', variants=[
+                [w, w * 2 // 3, fmt, f"{'ab' * 10}-{w}.{ext}"]
+                for w in (320, 640, 960, 1200) for fmt, ext in (('webp', 'webp'), ('jpeg', 'jpg'))
+            ]
+        ))
+        self.add_post(f"/static/uploads/{'ab' * 10}.png")
+        
+        html = self.client.get('/en/blog').get_data(as_text=True)
+        
+        self.assertIn(f'<source type="image/webp" srcset="/static/uploads/{"ab" * 10}-320.webp 320w', html)
+        self.assertIn(f'src="/static/uploads/{"ab" * 10}-960.jpg"', html)
+        self.assertIn(f'/static/uploads/{"ab" * 10}-1200.jpg 1200w"', html)
+        self.assertIn('sizes="(min-width: 768px) 33vw, 100vw"', html)
+    
+    def test_external_image_urls_are_kept(self):
+        """Test a featured image URL from elsewhere is shown as it is"""
+        self.add_post('https://cdn.example.com/photo.jpg')
+        
+        html = self.client.get('/en/blog/photo-post').get_data(as_text=True)
+        
+        self.assertIn('src="https://cdn.example.com/photo.jpg"', html)
+        self.assertNotIn('srcset', html)
+    
+    @unittest.skipIf(pillow_available(), 'Pillow is installed')
+    def test_process_images_needs_pillow(self):
+        """Test 'flask process-images' explains that Pillow is missing"""
+        result = self.app.test_cli_runner().invoke(args=['process-images'])
+        
+        self.assertNotEqual(result.exit_code, 0)
+        self.assertIn('Pillow is not installed', result.output)
+    
+    @unittest.skipUnless(pillow_available(), 'requires Pillow')
+    def test_variants_are_made(self):
+        """Test an upload gets WebP and JPEG copies no wider than itself"""
+        from PIL import Image
+        
+        data = io.BytesIO()
+        Image.new('RGBA', (1000, 500), (200, 40, 40, 128)).save(data, format='PNG')
+        self.submit(data.getvalue(), 'a.png')
+        
+        image = UploadedImage.query.one()
+        self.assertEqual(image.status, 'ready')
+        self.assertEqual(sorted({variant[0] for variant in image.variants}), [320, 640, 960, 1000])
+        self.assertEqual({variant[2] for variant in image.variants}, {'webp', 'jpeg'})
+        for _, _, _, filename in image.variants:
+            self.assertTrue(os.path.exists(os.path.join(self.directory.name, filename)))
+        self.assertEqual(process_pending(self.app), {'processed': 0, 'failed': 0})
+
+
+if __name__ == '__main__':
+    unittest.main()
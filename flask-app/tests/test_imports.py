@@ -0,0 +1,133 @@
+"""
+Unit Tests for Bulk Import
+"""
+
+import io
+import json
+import unittest
+from app import create_app
+from config import TestingConfig
+from models import db, BlogPost
+from imports import read_records, import_posts
+
+
+class TestImportPosts(unittest.TestCase):
+    """Test chunked bulk import of blog posts"""
+    
+    def setUp(self):
+        """Set up test fixtures"""
+        self.app = create_app(TestingConfig)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        
+        db.session.add(BlogPost(
+            title_en="Existing Post",
+            title_pl="Istniejący wpis",
+            slug="existing-post",
+            content_en="Content",
+            content_pl="Treść"
+        ))
+        db.session.commit()
+    
+    def tearDown(self):
+        """Clean up after tests"""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+    
+    def test_import_deduplicates_slugs_in_memory(self):
+        """Test slugs are unique against existing posts and the batch itself"""
+        records = [
+            {'title_en': 'Existing Post', 'content_en': 'A', 'title_pl': 'B', 'content_pl': 'C'}
+            for _ in range(3)
+        ]
+        
+        stats = import_posts(records, chunk_size=2)
+        
+        self.assertEqual(stats['imported'], 3)
+        slugs = {post.slug for post in BlogPost.query.all()}
+        self.assertEqual(slugs, {'existing-post', 'existing-post-2', 'existing-post-3', 'existing-post-4'})
+    
+    def test_import_reports_bad_records_and_translations(self):
+        """Test invalid records are skipped and one-language posts are flagged"""
+        data = '\n'.join(json.dumps(record) for record in [
+            {'title_pl': 'Tylko po polsku', 'content_pl': 'Treść', 'status': 'published'},
+            {'title_en': 'No content'},
+        ]).encode('utf-8')
+        
+        stats = import_posts(read_records(io.BytesIO(data), 'ndjson'))
+        
+        self.assertEqual((stats['imported'], stats['failed']), (1, 1))
+        self.assertEqual(stats['needs_translation'], ['tylko-po-polsku'])
+        post = BlogPost.query.filter_by(slug='tylko-po-polsku').one()
+        self.assertEqual(post.title_en, 'Pending Translation')
+        self.assertEqual(post.customer_language, 'pl')
+        self.assertIsNotNone(post.published_at)
+        self.assertIn('posts_per_second', stats)
+    
+    def test_unreadable_lines_are_reported_and_skipped(self):
+        """Test broken JSON and non-UTF-8 lines fail alone, with their line numbers"""
+        good = json.dumps({'title_en': 'Good', 'title_pl': 'Dobry', 'content_en': 'A', 'content_pl': 'B'})
+        data = b'\n'.join([b'{"title_en": "Broken', good.encode(), b'\xff\xfe not utf-8', b'', good.encode()])
+        
+        stats = import_posts(read_records(io.BytesIO(data), 'ndjson'))
+        
+        self.assertEqual((stats['imported'], stats['failed']), (2, 2))
+        self.assertTrue(stats['errors'][0].startswith('line 1: '))
+        self.assertTrue(stats['errors'][1].startswith('line 3: '))
+    
+    def test_csv_line_that_is_not_utf8_is_skipped(self):
+        """Test a CSV line in another encoding fails alone"""
+        data = 'title_en,title_pl,content_en,content_pl\nOne,Jeden,A,B\n'.encode() + \
+            'Two,Dwa,Treść,B\n'.encode('cp1250') + b'Three,Trzy,A,B\n'
+        
+        stats = import_posts(read_records(io.BytesIO(data), 'csv'))
+        
+        self.assertEqual((stats['imported'], stats['failed']), (2, 1))
+        self.assertIn('line 3: not valid UTF-8', stats['errors'][0])
+    
+    def test_english_only_import_needs_polish_translation(self):
+        """Test English-only records get placeholders the translation step recognises"""
+        from translation_service import _missing_translations
+        
+        stats = import_posts([{'title_en': 'Only English', 'content_en': 'Body'}])
+        
+        post = BlogPost.query.filter_by(slug='only-english').one()
+        self.assertEqual(stats['needs_translation'], ['only-english'])
+        self.assertEqual([field for field, *_ in _missing_translations(post)], ['title_pl', 'content_pl'])
+    
+    def test_admin_import_csv_upload(self):
+        """Test importing an uploaded CSV file"""
+        client = self.app.test_client()
+        with client.session_transaction() as sess:
+            sess['is_admin'] = True
+        
+        csv_data = b'title_en,title_pl,content_en,content_pl\nHello,Czesc,Body,Tresc\n'
+        response = client.post('/admin/posts/import', data={
+            'file': (io.BytesIO(csv_data), 'posts.csv'),
+            'status': 'draft'
+        }, content_type='multipart/form-data')
+        
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(BlogPost.query.filter_by(slug='hello').one().status, 'draft')
+    
+    def test_admin_import_of_malformed_file_reports_errors(self):
+        """Test a malformed upload is reported rather than failing the request"""
+        client = self.app.test_client()
+        with client.session_transaction() as sess:
+            sess['is_admin'] = True
+        
+        response = client.post('/admin/posts/import', data={
+            'file': (io.BytesIO(b'not json\n\xff\n'), 'posts.ndjson'),
+            'status': 'draft'
+        }, content_type='multipart/form-data')
+        
+        self.assertEqual(response.status_code, 302)
+        with client.session_transaction() as sess:
+            messages = ' '.join(message for _, message in sess['_flashes'])
+        self.assertIn('2 records failed: line 1: ', messages)
+
+
+if __name__ == '__main__':
+    unittest.main()
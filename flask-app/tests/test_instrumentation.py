@@ -0,0 +1,127 @@
+"""
+Unit Tests for SQL Instrumentation and Query Budgets
+"""
+
+import unittest
+import pytest
+from app import create_app
+from config import TestingConfig
+from instrumentation import QueryStats
+from models import db, BlogPost, Comment
+
+
+def add_posts_with_comments(count):
+    """Create published posts with one pending comment each"""
+    for number in range(count):
+        post = BlogPost(
+            title_en=f"Post {number}",
+            title_pl=f"Wpis {number}",
+            slug=f"post-{number}",
+            content_en="Content",
+            content_pl="Treść",
+            status='published'
+        )
+        db.session.add(post)
+        db.session.flush()
+        db.session.add(Comment(post_id=post.id, content="A pending comment", status='pending'))
+    db.session.commit()
+
+
+class DebugHeadersConfig(TestingConfig):
+    QUERY_DEBUG_HEADERS = True
+    N_PLUS_ONE_THRESHOLD = 3
+
+
+class TestQueryInstrumentation(unittest.TestCase):
+    """Test per-request query statistics"""
+    
+    def setUp(self):
+        """Set up test fixtures"""
+        self.app = create_app(DebugHeadersConfig)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        add_posts_with_comments(5)
+        self.client = self.app.test_client()
+    
+    def tearDown(self):
+        """Clean up after tests"""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+    
+    def test_debug_headers(self):
+        """Test query count and DB time are returned in response headers"""
+        response = self.client.get('/en/blog')
+        
+        self.assertEqual(response.headers['X-Query-Count'], '3')
+        self.assertTrue(response.headers['X-Query-Time'].endswith('ms'))
+        self.assertIn('db;dur=', response.headers['Server-Timing'])
+    
+    def test_n_plus_one_is_logged(self):
+        """Test a statement repeated with different parameters is reported"""
+        @self.app.route('/lazy-posts')
+        def lazy_posts():
+            return ','.join(comment.post.slug for comment in Comment.query.all())
+        
+        with self.assertLogs('flask_app.sql', level='WARNING') as logs:
+            self.client.get('/lazy-posts')
+        
+        self.assertIn('Possible N+1 on GET /lazy-posts: 5 executions', logs.output[0])
+    
+    def test_slow_queries_are_logged(self):
+        """Test statements over the threshold are logged"""
+        app = create_app(type('SlowConfig', (DebugHeadersConfig,), {'SLOW_QUERY_THRESHOLD_MS': 0}))
+        with app.app_context():
+            db.create_all()
+            with self.assertLogs('flask_app.sql', level='WARNING') as logs:
+                app.test_client().get('/en/')
+        
+        self.assertIn('Slow query', logs.output[0])
+    
+    def test_parameters_are_not_kept_without_debug_headers(self):
+        """Test production requests count executions instead of keeping parameter reprs"""
+        tracked, counted = QueryStats(), QueryStats(track_parameters=False)
+        for stats in (tracked, counted):
+            for _ in range(3):
+                stats.record('SELECT 1 WHERE id = ?', (1,), 0.1)
+        
+        self.assertEqual(tracked.repeated(3), [])
+        self.assertEqual(counted.repeated(3), [('SELECT 1 WHERE id = ?', 3)])
+        self.assertIsNone(counted._parameters)
+
+
+@pytest.fixture
+def admin_client(client):
+    """Client with an admin session"""
+    with client.session_transaction() as sess:
+        sess['is_admin'] = True
+    return client
+
+
+@pytest.mark.parametrize('path, max_queries', [
+    ('/en/', 1),
+    ('/en/blog', 3),
+    ('/en/blog?q=Post', 3),
+    ('/en/blog/post-0', 4),
+])
+def test_public_query_budget(app, client, query_budget, path, max_queries):
+    """Public pages stay within their query budgets"""
+    add_posts_with_comments(10)
+    
+    with query_budget(max_queries):
+        assert client.get(path).status_code == 200
+
+
+@pytest.mark.parametrize('path, max_queries', [
+    ('/admin', 11),
+    ('/admin/posts', 2),
+    ('/admin/comments', 2),
+    ('/admin/inquiries', 2),
+])
+def test_admin_query_budget(app, admin_client, query_budget, path, max_queries):
+    """Admin pages stay within their query budgets regardless of list size"""
+    add_posts_with_comments(10)
+    
+    with query_budget(max_queries):
+        assert admin_client.get(path).status_code == 200
@@ -0,0 +1,111 @@
+"""
+Unit Tests for Logging Configuration
+"""
+
+import json
+import logging
+import os
+import tempfile
+import unittest
+from app import create_app
+from config import TestingConfig
+from models import db
+from logging_config import setup_logging, shutdown_logging, get_logger, SamplingFilter
+
+
+class TestQueuedJsonLogging(unittest.TestCase):
+    """Test queued JSON records with request context"""
+    
+    def setUp(self):
+        """Set up test fixtures"""
+        self.app = create_app(TestingConfig)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.directory = tempfile.TemporaryDirectory()
+        self.log_file = os.path.join(self.directory.name, 'app.log')
+        setup_logging(log_file=self.log_file)
+    
+    def tearDown(self):
+        """Clean up after tests"""
+        shutdown_logging('flask_app')
+        logging.getLogger('flask_app').handlers.clear()
+        self.directory.cleanup()
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+    
+    def read_records(self):
+        shutdown_logging('flask_app')
+        with open(self.log_file, encoding='utf-8') as log_file:
+            return [json.loads(line) for line in log_file]
+    
+    def test_records_carry_request_context(self):
+        """Test records logged in a request include its id, endpoint and language"""
+        @self.app.route('/log-something')
+        def log_something():
+            get_logger('test').info("Inside the request")
+            return 'ok'
+        
+        response = self.app.test_client().get('/log-something', headers={'X-Request-ID': 'abc123'})
+        
+        self.assertEqual(response.headers['X-Request-ID'], 'abc123')
+        record = [r for r in self.read_records() if r['message'] == 'Inside the request'][0]
+        self.assertEqual(record['logger'], 'flask_app.test')
+        self.assertEqual(record['request_id'], 'abc123')
+        self.assertEqual(record['endpoint'], 'log_something')
+        self.assertEqual(record['language'], 'en')
+        self.assertIn('latency_ms', record)
+    
+    def test_shutdown_flushes_exceptions(self):
+        """Test queued records, including tracebacks, are written on shutdown"""
+        try:
+            raise ValueError('boom')
+        except ValueError:
+            get_logger('test').exception("Something failed")
+        
+        record = self.read_records()[-1]
+        self.assertEqual(record['level'], 'ERROR')
+        self.assertIn('ValueError: boom', record['exception'])
+    
+    @unittest.skipUnless(hasattr(os, 'fork'), 'requires fork()')
+    def test_forked_worker_keeps_logging(self):
+        """Test a process forked after setup (a preloaded worker) still writes records"""
+        pid = os.fork()
+        if pid == 0:
+            try:
+                get_logger('test').info("From the forked worker")
+                shutdown_logging('flask_app')
+            finally:
+                os._exit(0)
+        os.waitpid(pid, 0)
+        
+        messages = [r['message'] for r in self.read_records()]
+        self.assertIn("From the forked worker", messages)
+
+
+class TestSamplingFilter(unittest.TestCase):
+    """Test per-logger sampling"""
+    
+    def make_record(self, name, level=logging.INFO):
+        return logging.LogRecord(name, level, __file__, 1, 'message', None, None)
+    
+    def test_keeps_every_nth_info_record(self):
+        """Test a 0.25 rate keeps one in four records of a sampled logger"""
+        sampler = SamplingFilter({'flask_app.translation': 0.25})
+        
+        kept = [sampler.filter(self.make_record('flask_app.translation')) for _ in range(8)]
+        
+        self.assertEqual(kept.count(True), 2)
+        self.assertTrue(sampler.filter(self.make_record('flask_app.admin')))
+    
+    def test_warnings_are_never_sampled(self):
+        """Test warnings pass even when a logger is fully sampled out"""
+        sampler = SamplingFilter({'flask_app.translation': 0.0})
+        
+        self.assertFalse(sampler.filter(self.make_record('flask_app.translation')))
+        self.assertTrue(sampler.filter(self.make_record('flask_app.translation', logging.WARNING)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+"""
+Unit Tests for Memory Tracking
+"""
+
+import unittest
+from unittest import mock
+from app import create_app
+from config import TestingConfig
+from models import db
+from security import rate_limiter
+
+
+class TestMemoryTracking(unittest.TestCase):
+    """Test tracemalloc snapshots, cache sizes and worker recycling"""
+    
+    def setUp(self):
+        """Set up test fixtures"""
+        self.app = create_app(type('MemoryConfig', (TestingConfig,), {'WTF_CSRF_ENABLED': False}))
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        
+        self.leak = []
+        
+        @self.app.route('/leak')
+        def leak():
+            self.leak.append(bytearray(64 * 1024))
+            return 'ok'
+        
+        self.client = self.app.test_client()
+        self.store = self.app.extensions['memory']
+    
+    def tearDown(self):
+        """Clean up after tests"""
+        self.store.stop()
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+    
+    def login(self):
+        with self.client.session_transaction() as sess:
+            sess['is_admin'] = True
+    
+    def test_snapshot_requires_tracing(self):
+        """Test a snapshot cannot be taken before tracing starts"""
+        self.assertFalse(self.store.tracing)
+        with self.assertRaises(RuntimeError):
+            self.store.take()
+    
+    def test_diff_points_at_growing_allocation_site(self):
+        """Test the admin page shows the line that grew between snapshots"""
+        self.login()
+        self.client.post('/admin/memory/tracing', data={'action': 'start'})
+        self.client.post('/admin/memory/snapshots', data={'label': 'before'})
+        for _ in range(20):
+            self.client.get('/leak')
+        self.client.post('/admin/memory/snapshots', data={'label': 'after'})
+        
+        response = self.client.get('/admin/memory')
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'Change from "before"', response.data)
+        self.assertIn(b'tests/test_memory.py', response.data)
+        self.assertEqual([s['label'] for s in self.store.list()], ['after', 'before'])
+    
+    def test_cache_sizes_reported(self):
+        """Test the known caches appear on the page with their sizes"""
+        self.login()
+        rate_limiter.requests['203.0.113.7'].append(0.0)
+        try:
+            response = self.client.get('/admin/memory')
+        finally:
+            rate_limiter.requests.pop('203.0.113.7', None)
+        
+        self.assertIn(b'rate_limiter.requests', response.data)
+        self.assertIn(b'TranslationService.translate', response.data)
+        self.assertIn(b'translation_service._translation_service', response.data)
+    
+    def test_memory_page_requires_admin(self):
+        """Test visitors are redirected to the admin login"""
+        response = self.client.get('/admin/memory')
+        self.assertEqual(response.status_code, 302)
+        
+        response = self.client.post('/admin/memory/tracing', data={'action': 'start'})
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(self.store.tracing)
+
+
+class TestWorkerRecycling(unittest.TestCase):
+    """Test the RSS self-recycle threshold"""
+    
+    def setUp(self):
+        """Set up test fixtures"""
+        config = type('RecycleConfig', (TestingConfig,), {'MAX_WORKER_RSS_MB': 1, 'MEMORY_CHECK_EVERY': 1})
+        self.app = create_app(config)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+    
+    def tearDown(self):
+        """Clean up after tests"""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+    
+    @mock.patch('memory.os.kill')
+    def test_gunicorn_worker_over_limit_is_recycled(self, kill):
+        """Test a gunicorn worker above MAX_WORKER_RSS_MB signals itself"""
+        self.client.get('/', environ_base={'SERVER_SOFTWARE': 'gunicorn/21.2.0'})
+        
+        kill.assert_called_once()
+    
+    @mock.patch('memory.os.kill')
+    def test_other_servers_only_warn(self, kill):
+        """Test the development server is never sent a signal"""
+        with self.assertLogs('flask_app.memory', level='WARNING'):
+            self.client.get('/')
+        
+        kill.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+"""
+Unit Tests for Request Metrics
+"""
+
+import json
+import os
+import tempfile
+import unittest
+from app import create_app
+from config import TestingConfig
+from models import db
+from metrics import (RETIRED_FILE, MetricsRegistry, MultiprocessStore, clear_snapshots, merge_snapshots,
+                     render_prometheus, retire_snapshots)
+
+
+class TestMetricsEndpoint(unittest.TestCase):
+    """Test request recording and the /metrics endpoint"""
+    
+    def setUp(self):
+        """Set up test fixtures"""
+        self.app = create_app(type('MetricsConfig', (TestingConfig,), {'METRICS_TOKEN': 'scrape-token'}))
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+    
+    def tearDown(self):
+        """Clean up after tests"""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+    
+    def test_metrics_requires_admin_or_token(self):
+        """Test anonymous scrapes are refused"""
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        
+        response = self.client.get('/metrics', headers={'Authorization': 'Bearer scrape-token'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith('text/plain; version=0.0.4'))
+    
+    def test_non_ascii_authorization_is_refused(self):
+        """Test a token with non-ASCII characters is refused rather than an error"""
+        response = self.client.get('/metrics', environ_base={'HTTP_AUTHORIZATION': 'Bearer scrape-tokén'})
+        
+        self.assertEqual(response.status_code, 403)
+    
+    def test_requests_are_counted_per_endpoint(self):
+        """Test status counters and latency histograms per endpoint"""
+        self.client.get('/en/')
+        self.client.get('/en/')
+        self.client.get('/missing-page')
+        
+        with self.client.session_transaction() as sess:
+            sess['is_admin'] = True
+        body = self.client.get('/metrics').get_data(as_text=True)
+        
+        self.assertIn('flask_app_requests_total{endpoint="index",method="GET",status="200"} 2', body)
+        self.assertIn('flask_app_requests_total{endpoint="none",method="GET",status="404"} 1', body)
+        self.assertIn('flask_app_request_duration_seconds_count{endpoint="index",method="GET"} 2', body)
+        self.assertIn('flask_app_request_duration_seconds_bucket{endpoint="index",method="GET",le="+Inf"} 2', body)
+        self.assertIn('flask_app_cache_hit_ratio{cache="translation"}', body)
+
+
+class TestMultiprocessAggregation(unittest.TestCase):
+    """Test merging of per-worker snapshots"""
+    
+    def test_histograms_are_cumulative(self):
+        """Test buckets are rendered cumulatively with +Inf equal to the count"""
+        registry = MetricsRegistry()
+        for seconds in (0.001, 0.02, 0.02, 30):
+            registry.observe('flask_app_request_duration_seconds', seconds, {'endpoint': 'blog', 'method': 'GET'})
+        
+        body = render_prometheus(merge_snapshots([(1, True, registry.snapshot())]))
+        
+        self.assertIn('_bucket{endpoint="blog",method="GET",le="0.005"} 1', body)
+        self.assertIn('_bucket{endpoint="blog",method="GET",le="0.025"} 3', body)
+        self.assertIn('_bucket{endpoint="blog",method="GET",le="10.0"} 3', body)
+        self.assertIn('_bucket{endpoint="blog",method="GET",le="+Inf"} 4', body)
+        self.assertIn('_count{endpoint="blog",method="GET"} 4', body)
+    
+    def test_counters_summed_and_dead_gauges_dropped(self):
+        """Test counters add up across workers while gauges of exited workers are ignored"""
+        worker = MetricsRegistry()
+        worker.inc('flask_app_requests_total', {'endpoint': 'blog', 'method': 'GET', 'status': '200'}, 3)
+        worker.add('flask_app_requests_in_flight', 2)
+        
+        with tempfile.TemporaryDirectory() as directory:
+            store = MultiprocessStore(directory)
+            store.flush(worker, force=True)
+            snapshots = store.read_all() + [(2 ** 22 + 1, False, worker.snapshot())]
+        
+        merged = merge_snapshots(snapshots)
+        labels = (('endpoint', 'blog'), ('method', 'GET'), ('status', '200'))
+        
+        self.assertEqual(merged[('counters', 'flask_app_requests_total', labels)], 6)
+        self.assertEqual(merged[('gauges', 'flask_app_requests_in_flight', ())], 2)
+    
+    def test_exited_workers_are_folded(self):
+        """Test an exited worker's file is merged into the retired totals and removed"""
+        worker = MetricsRegistry()
+        worker.inc('flask_app_requests_total', {'endpoint': 'blog', 'method': 'GET', 'status': '200'}, 3)
+        worker.add('flask_app_requests_in_flight', 2)
+        labels = (('endpoint', 'blog'), ('method', 'GET'), ('status', '200'))
+        
+        with tempfile.TemporaryDirectory() as directory:
+            store = MultiprocessStore(directory)
+            store.flush(worker, force=True)
+            # Two workers that have exited since
+            for pid in (2 ** 22 + 1, 2 ** 22 + 2):
+                with open(os.path.join(directory, f'{pid}-1.json'), 'w') as f:
+                    json.dump(worker.snapshot(), f)
+            
+            self.assertEqual(retire_snapshots(directory, 2 ** 22 + 1), 1)
+            self.assertEqual(retire_snapshots(directory), 1)
+            
+            self.assertEqual(sorted(os.listdir(directory)), sorted([os.path.basename(store.path), RETIRED_FILE]))
+            merged = merge_snapshots(store.read_all())
+            self.assertEqual(merged[('counters', 'flask_app_requests_total', labels)], 9)
+            self.assertEqual(merged[('gauges', 'flask_app_requests_in_flight', ())], 2)
+            
+            clear_snapshots(directory)
+            
+            self.assertEqual(os.listdir(directory), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
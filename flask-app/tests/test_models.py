@@ -5,7 +5,8 @@ Unit Tests for Database Models
 import unittest
 from datetime import datetime
 from app import create_app
-from models import db, BlogPost, Comment, ContactInquiry
+from config import TestingConfig
+from models import db, BlogPost, Comment, ContactInquiry, purge_deleted_posts
 
 
 class TestModels(unittest.TestCase):
@@ -136,5 +137,154 @@ class TestModels(unittest.TestCase):
         self.assertEqual(post.status, "pending")
 
 
+
+class TestBulkModeration(unittest.TestCase):
+    """Test set-based comment and post moderation"""
+    
+    def setUp(self):
+        """Set up test fixtures"""
+        self.app = create_app(TestingConfig)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        
+        post = BlogPost(
+            title_en="Test",
+            title_pl="Test",
+            slug="test",
+            content_en="Content",
+            content_pl="Content"
+        )
+        db.session.add(post)
+        db.session.commit()
+        self.post_id = post.id
+        
+        for i in range(10):
+            db.session.add(Comment(
+                post_id=post.id,
+                content=f"Buy cheap watches {i}" if i < 4 else f"Nice article {i}",
+                ip_address="10.0.0.1" if i % 2 else "10.0.0.2",
+                status="pending"
+            ))
+        db.session.commit()
+    
+    def tearDown(self):
+        """Clean up after tests"""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+    
+    def test_bulk_set_status_by_ids(self):
+        """Test approving an explicit id list in small batches"""
+        ids = [c.id for c in Comment.query.limit(5).all()]
+        
+        count = Comment.bulk_set_status('approved', ids=ids, batch_size=2)
+        
+        self.assertEqual(count, 5)
+        self.assertEqual(Comment.query.filter_by(status='approved').count(), 5)
+    
+    def test_bulk_set_status_by_criteria(self):
+        """Test marking every comment from one IP as spam"""
+        count = Comment.bulk_set_status(
+            'spam',
+            criteria=[Comment.ip_address == '10.0.0.1', Comment.status == 'pending']
+        )
+        
+        self.assertEqual(count, 5)
+        self.assertEqual(Comment.query.filter_by(status='spam').count(), 5)
+    
+    def test_bulk_delete_by_phrase(self):
+        """Test deleting comments matching a phrase"""
+        count = Comment.bulk_delete(criteria=[Comment.content.contains('cheap watches')])
+        
+        self.assertEqual(count, 4)
+        self.assertEqual(Comment.query.count(), 6)
+    
+    def test_bulk_requires_ids_or_criteria(self):
+        """Test that an unbounded bulk update is refused"""
+        with self.assertRaises(ValueError):
+            Comment.bulk_set_status('approved')
+    
+    def test_admin_bulk_endpoint_reports_count(self):
+        """Test the admin bulk endpoint applies a filter-based action"""
+        client = self.app.test_client()
+        with client.session_transaction() as sess:
+            sess['is_admin'] = True
+        
+        response = client.post('/admin/comments/bulk', data={
+            'action': 'reject',
+            'scope': 'filter',
+            'status': 'pending',
+            'q': 'cheap'
+        })
+        
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Comment.query.filter_by(status='rejected').count(), 4)
+        with client.session_transaction() as sess:
+            self.assertIn('4 comment(s) rejected!', str(sess.get('_flashes')))
+    
+    def test_admin_bulk_phrase_is_literal(self):
+        """Test '%' in a filter phrase matches itself rather than any text"""
+        db.session.add(Comment(post_id=self.post_id, content="Get 10% off", status='pending'))
+        db.session.commit()
+        client = self.app.test_client()
+        with client.session_transaction() as sess:
+            sess['is_admin'] = True
+        
+        client.post('/admin/comments/bulk', data={'action': 'spam', 'scope': 'filter', 'status': 'all', 'q': '0%'})
+        
+        self.assertEqual([comment.content for comment in Comment.query.filter_by(status='spam')], ['Get 10% off'])
+
+    
+    def test_admin_bulk_post_approval(self):
+        """Test approving selected pending posts in one request"""
+        posts = [
+            BlogPost(title_en=f"Pending {i}", title_pl=f"Pending {i}", slug=f"pending-{i}",
+                     content_en="Content", content_pl="Content", status="pending")
+            for i in range(3)
+        ]
+        db.session.add_all(posts)
+        db.session.commit()
+        ids = [post.id for post in posts[:2]]
+        
+        client = self.app.test_client()
+        with client.session_transaction() as sess:
+            sess['is_admin'] = True
+        
+        response = client.post('/admin/posts/bulk', data={
+            'action': 'approve',
+            'post_ids': ids + [self.post_id]
+        })
+        
+        self.assertEqual(response.status_code, 302)
+        published = BlogPost.query.filter_by(status='published').all()
+        self.assertEqual(sorted(post.id for post in published), ids)
+        self.assertTrue(all(post.published_at for post in published))
+
+    
+    def test_post_delete_cascades_in_database(self):
+        """Test deleting a post removes its comments without loading them"""
+        post = db.session.get(BlogPost, self.post_id)
+        db.session.delete(post)
+        db.session.commit()
+        
+        self.assertEqual(Comment.query.count(), 0)
+    
+    def test_soft_delete_and_chunked_purge(self):
+        """Test tombstoned posts are hidden and purged in chunks"""
+        post = db.session.get(BlogPost, self.post_id)
+        post.soft_delete()
+        
+        response = self.app.test_client().get('/en/blog/test')
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(Comment.query.count(), 10)
+        
+        purged = purge_deleted_posts(chunk_size=3)
+        
+        self.assertEqual(purged, {'posts': 1, 'comments': 10})
+        self.assertEqual(BlogPost.query.count(), 0)
+        self.assertEqual(Comment.query.count(), 0)
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,247 @@
+"""
+Unit Tests for Pre-rendering
+"""
+
+import gzip
+import json
+import os
+import tempfile
+import unittest
+from datetime import datetime
+from sqlalchemy import update
+from app import create_app
+from config import TestingConfig
+from instrumentation import QueryRecorder
+from models import db, BlogPost, Comment
+from prerender import STATE_FILE, page_file, prerender_site
+
+
+class TestPrerender(unittest.TestCase):
+    """Test static page output, incremental refresh and the dynamic fallbacks"""
+    
+    def setUp(self):
+        """Set up test fixtures"""
+        self.directory = tempfile.TemporaryDirectory()
+        self.app = create_app(type('PrerenderConfig', (TestingConfig,), {
+            'PRERENDER_DIR': self.directory.name,
+            'SITE_URL': 'https://example.com',
+        }))
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        for i in range(12):
+            db.session.add(BlogPost(
+                title_en=f'Post {i}', title_pl=f'Wpis {i}', slug=f'post-{i}',
+                content_en=f'Content {i}', content_pl=f'Treść {i}',
+                category_en='Tips', category_pl='Porady',
+                status='published', published_at=datetime(2024, 1, i + 1)
+            ))
+        db.session.commit()
+        self.post = BlogPost.query.filter_by(slug='post-3').first()
+    
+    def tearDown(self):
+        """Clean up after tests"""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        self.directory.cleanup()
+    
+    def read(self, path):
+        with open(page_file(self.directory.name, path), encoding='utf-8') as f:
+            return f.read()
+    
+    def mtimes(self):
+        state = os.path.join(self.directory.name, STATE_FILE)
+        with open(state) as f:
+            paths = json.load(f)['pages']
+        return {path: os.stat(page_file(self.directory.name, path)).st_mtime_ns for path in paths}
+    
+    def test_full_render(self):
+        """Test every public page is written in both languages with a gzipped sibling"""
+        result = prerender_site(self.app, full=True, jobs=1)
+        
+        # Homepage, services, blog listing, 2 feeds and 12 posts per language, plus the sitemap
+        self.assertEqual((result['pages'], result['rendered'], result['errors']), (35, 35, {}))
+        filename = page_file(self.directory.name, '/pl/blog/post-3')
+        with open(filename, 'rb') as f, open(filename + '.gz', 'rb') as compressed:
+            self.assertEqual(gzip.decompress(compressed.read()), f.read())
+        self.assertIn('Wpis 3', self.read('/pl/blog/post-3'))
+        self.assertIn('Post 11', self.read('/en/'))
+        self.assertIn('<rss', self.read('/en/blog/rss.xml'))
+        self.assertIn('https://example.com/pl/blog/post-3', self.read('/sitemap.xml'))
+    
+    def test_pages_are_the_same_for_every_visitor(self):
+        """Test pages carry no CSRF token or session and count views from the browser"""
+        prerender_site(self.app, full=True, jobs=1)
+        
+        html = self.read('/en/blog/post-3')
+        self.assertNotIn('csrf_token', html)
+        self.assertIn('data-count-view="/en/blog/post-3/view"', html)
+        self.assertIn('data-src="/en/blog/post-3/comment-form"', html)
+        self.assertIn('https://example.com/pl/blog/post-3', html)
+        self.assertEqual(db.session.get(BlogPost, self.post.id).views_count, 0)
+    
+    def test_second_run_renders_nothing(self):
+        """Test a run without changes keeps every page"""
+        prerender_site(self.app, jobs=1)
+        
+        result = prerender_site(self.app, jobs=1)
+        
+        self.assertEqual((result['rendered'], result['unchanged'], result['full']), (0, 35, False))
+    
+    def test_edit_refreshes_affected_pages_only(self):
+        """Test committing an edit re-renders the pages showing the post, not the others"""
+        prerender_site(self.app, jobs=1)
+        before = self.mtimes()
+        
+        self.post.title_en = 'Edited title'
+        db.session.commit()
+        
+        after = self.mtimes()
+        self.assertIn('Edited title', self.read('/en/blog/post-3'))
+        changed = {path for path in before if before[path] != after[path]}
+        # post-3 is on the listing's first page and in the feeds, not on the homepage
+        self.assertEqual(changed, {
+            '/en/blog/post-3', '/pl/blog/post-3', '/en/blog', '/pl/blog', '/sitemap.xml',
+            '/en/blog/rss.xml', '/en/blog/atom.xml', '/pl/blog/rss.xml', '/pl/blog/atom.xml',
+        })
+    
+    def test_refresh_reads_only_the_changed_posts(self):
+        """Test a commit's refresh reads its own posts and 'flask prerender' reads them all"""
+        prerender_site(self.app, jobs=1)
+        # A change the refresh is not told about
+        db.session.execute(
+            update(BlogPost).where(BlogPost.slug == 'post-5')
+            .values(title_en='Untracked edit', updated_at=datetime(2025, 1, 1)),
+            execution_options={'prerender': False}
+        )
+        
+        self.post.title_en = 'Edited title'
+        db.session.commit()
+        
+        self.assertIn('Edited title', self.read('/en/blog/post-3'))
+        self.assertNotIn('Untracked edit', self.read('/en/blog/post-5'))
+        
+        result = prerender_site(self.app, jobs=1)
+        
+        self.assertIn('Untracked edit', self.read('/en/blog/post-5'))
+        self.assertEqual(result['errors'], {})
+    
+    def test_bulk_statements_refresh_their_posts(self):
+        """Test a bulk delete of comments refreshes the posts they were on"""
+        db.session.add(Comment(post_id=self.post.id, content='Great read', status='approved'))
+        db.session.commit()
+        prerender_site(self.app, jobs=1)
+        self.assertIn('Great read', self.read('/en/blog/post-3'))
+        
+        Comment.bulk_delete(ids=[comment.id for comment in Comment.query.all()])
+        
+        self.assertNotIn('Great read', self.read('/en/blog/post-3'))
+    
+    def test_only_approved_comments_refresh(self):
+        """Test a pending comment changes nothing and its approval re-renders the post"""
+        prerender_site(self.app, jobs=1)
+        comment = Comment(post_id=self.post.id, content='Great read', status='pending')
+        db.session.add(comment)
+        db.session.commit()
+        
+        self.assertNotIn('Great read', self.read('/en/blog/post-3'))
+        
+        Comment.bulk_set_status('approved', ids=[comment.id])
+        
+        self.assertIn('Great read', self.read('/en/blog/post-3'))
+        self.assertIn('Great read', self.read('/pl/blog/post-3'))
+    
+    def test_unpublished_post_is_removed(self):
+        """Test a post taken back to draft loses its pages"""
+        prerender_site(self.app, jobs=1)
+        
+        self.post.status = 'draft'
+        db.session.commit()
+        
+        self.assertFalse(os.path.exists(os.path.join(self.directory.name, 'en', 'blog', 'post-3')))
+        self.assertFalse(os.path.exists(page_file(self.directory.name, '/pl/blog/post-3') + '.gz'))
+        self.assertIn('Post 4', self.read('/en/blog'))
+        self.assertNotIn('post-3', self.read('/sitemap.xml'))
+        self.assertNotIn('post-3', self.read('/pl/blog/atom.xml'))
+    
+    def test_parallel_rebuild(self):
+        """Test a full rebuild over several processes writes the same pages"""
+        result = prerender_site(self.app, full=True, jobs=2)
+        
+        self.assertEqual((result['rendered'], result['jobs'], result['errors']), (35, 2, {}))
+        self.assertIn('Post 7', self.read('/en/blog/post-7'))
+    
+    def test_cli(self):
+        """Test 'flask prerender --full'"""
+        result = self.app.test_cli_runner().invoke(args=['prerender', '--full', '--jobs', '1'])
+        
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn('Rendered 35 of 35 pages', result.output)
+    
+    def test_comment_form_fragment(self):
+        """Test the lazily loaded comment form is never cached"""
+        response = self.app.test_client().get('/en/blog/post-3/comment-form')
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('no-store', response.headers['Cache-Control'])
+        self.assertIn('<form', response.get_data(as_text=True))
+    
+    def test_view_beacon(self):
+        """Test the browser's beacon counts a view of a published post only"""
+        client = self.app.test_client()
+        
+        response = client.post('/en/blog/post-3/view')
+        self.post.status = 'draft'
+        db.session.commit()
+        
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(db.session.get(BlogPost, self.post.id).views_count, 1)
+        self.assertEqual(client.post('/en/blog/post-3/view').status_code, 404)
+    
+    def test_dynamic_post_page_is_unchanged(self):
+        """Test Flask still serves the post, with its form loaded later, and counts the view"""
+        html = self.app.test_client().get('/en/blog/post-3').get_data(as_text=True)
+        
+        self.assertNotIn('<form', html)
+        self.assertIn('data-src="/en/blog/post-3/comment-form"', html)
+        self.assertNotIn('data-count-view', html)
+        self.assertEqual(db.session.get(BlogPost, self.post.id).views_count, 1)
+
+
+
+class TestPrerenderDisabled(unittest.TestCase):
+    """Test the commit listeners cost nothing without PRERENDER_DIR"""
+    
+    def setUp(self):
+        """Set up test fixtures"""
+        self.app = create_app(TestingConfig)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        post = BlogPost(title_en='Post', title_pl='Wpis', slug='post', content_en='Content',
+                        content_pl='Treść', status='published')
+        db.session.add(post)
+        db.session.commit()
+        db.session.add(Comment(post_id=post.id, content='Buy now', status='pending'))
+        db.session.commit()
+    
+    def tearDown(self):
+        """Clean up after tests"""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+    
+    def test_bulk_update_runs_one_statement(self):
+        """Test a bulk status change does not look up the posts of its rows"""
+        ids = [comment.id for comment in Comment.query.all()]
+        
+        with QueryRecorder(*db.engines.values()) as queries:
+            Comment.bulk_set_status('spam', ids=ids)
+        
+        self.assertEqual(queries.count, 1)
+        self.assertEqual(Comment.query.one().status, 'spam')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+"""
+Unit Tests for the Request Profiler
+"""
+
+import time
+import unittest
+from collections import Counter
+from app import create_app
+from config import TestingConfig
+from models import db
+from profiler import top_functions, collapsed_stacks
+
+
+class TestRequestProfiler(unittest.TestCase):
+    """Test admin-triggered request profiling"""
+    
+    def setUp(self):
+        """Set up test fixtures"""
+        self.app = create_app(type('ProfilerConfig', (TestingConfig,), {'PROFILE_INTERVAL_MS': 1}))
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        
+        @self.app.route('/slow')
+        def slow():
+            deadline = time.perf_counter() + 0.05
+            while time.perf_counter() < deadline:
+                pass
+            return 'done'
+        
+        self.client = self.app.test_client()
+    
+    def tearDown(self):
+        """Clean up after tests"""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+    
+    def login(self):
+        with self.client.session_transaction() as sess:
+            sess['is_admin'] = True
+    
+    def test_profile_flag_ignored_for_visitors(self):
+        """Test anonymous visitors cannot trigger profiling"""
+        response = self.client.get('/slow?_profile=1')
+        
+        self.assertNotIn('X-Profile-Id', response.headers)
+        self.assertEqual(self.app.extensions['profiler'].list(), [])
+    
+    def test_admin_profile_is_stored_and_downloadable(self):
+        """Test an admin-profiled request records wall and CPU stacks"""
+        self.login()
+        
+        profile_id = self.client.get('/slow', headers={'X-Profile': '1'}).headers['X-Profile-Id']
+        profile = self.app.extensions['profiler'].get(profile_id)
+        
+        self.assertEqual(profile['endpoint'], 'slow')
+        self.assertGreater(profile['samples'], 0)
+        self.assertTrue(any('slow (' in stack.split(';')[-1] for stack in profile['cpu']))
+        
+        page = self.client.get(f'/admin/profiles/{profile_id}')
+        self.assertEqual(page.status_code, 200)
+        
+        download = self.client.get(f'/admin/profiles/{profile_id}/wall.collapsed')
+        line = download.get_data(as_text=True).splitlines()[0]
+        stack, count = line.rsplit(' ', 1)
+        self.assertIn(';', stack)
+        self.assertGreater(int(count), 0)
+    
+    def test_sample_every_nth_request(self):
+        """Test automatic 1-in-N sampling"""
+        self.app.config['PROFILE_SAMPLE_EVERY'] = 2
+        responses = [self.client.get('/') for _ in range(4)]
+        
+        self.assertEqual(len(self.app.extensions['profiler'].list()), 2)
+        # Sampled responses may be public: the id stays in the admin list
+        self.assertFalse(any('X-Profile-Id' in response.headers for response in responses))
+
+
+class TestProfileSummaries(unittest.TestCase):
+    """Test profile aggregation helpers"""
+    
+    def test_top_functions_self_and_total(self):
+        """Test self samples count leaf frames and totals count every frame once"""
+        stacks = Counter({'main;render;format': 3, 'main;query': 2, 'main;render': 1})
+        
+        summary = {label: (own, total) for label, own, total in top_functions(stacks)}
+        
+        self.assertEqual(summary['format'], (3, 3))
+        self.assertEqual(summary['render'], (1, 4))
+        self.assertEqual(collapsed_stacks(stacks).splitlines()[0], 'main;render;format 3')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+"""
+Unit Tests for Application Startup
+"""
+
+import os
+import unittest
+import pytest
+from app import create_app
+from benchmark import DEFERRED_MODULES, STARTUP_BUDGET_MS, parse_importtime, startup_time
+from models import db, SCHEMA_VERSION, check_schema, create_schema, get_schema_version
+
+
+class TestStartup(unittest.TestCase):
+    """Test cold start time and deferred imports"""
+    
+    def test_deferred_modules_are_not_imported(self):
+        """Test importing wsgi creates the app without loading deferred modules"""
+        result = startup_time(runs=1)
+        
+        self.assertEqual(result['deferred_imported'], [], f"{DEFERRED_MODULES} must load lazily")
+    
+    # Wall-clock time depends on the machine: opt in with RUN_SLOW_TESTS=1
+    @pytest.mark.slow
+    @unittest.skipUnless(os.environ.get('RUN_SLOW_TESTS'), 'set RUN_SLOW_TESTS=1 to check the startup budget')
+    def test_cold_start_within_budget(self):
+        """Test importing wsgi creates the app within budget"""
+        result = startup_time(runs=3)
+        
+        self.assertLess(result['wall_ms'], STARTUP_BUDGET_MS)
+    
+    def test_parse_importtime(self):
+        """Test -X importtime lines are parsed with their nesting depth"""
+        output = (
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       120 |        120 |   _sqlite3\n"
+            "import time:       300 |        420 | sqlite3\n"
+        )
+        
+        self.assertEqual(parse_importtime(output), [('_sqlite3', 1, 120, 120), ('sqlite3', 0, 300, 420)])
+
+
+class TestSchemaVersion(unittest.TestCase):
+    """Test the explicit schema creation and startup version check"""
+    
+    def setUp(self):
+        """Set up test fixtures"""
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+    
+    def tearDown(self):
+        """Clean up after tests"""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+    
+    def test_missing_schema_is_reported(self):
+        """Test an uninitialised database fails the check with a warning"""
+        self.assertIsNone(get_schema_version())
+        with self.assertLogs('flask_app.database', level='WARNING'):
+            self.assertFalse(check_schema())
+    
+    def test_create_schema_stamps_version(self):
+        """Test create_schema creates the tables and passes the check"""
+        tables = create_schema()
+        
+        self.assertIn('blog_posts', tables)
+        self.assertEqual(get_schema_version(), SCHEMA_VERSION)
+        self.assertTrue(check_schema())
+    
+    def test_auto_create_in_development(self):
+        """Test AUTO_CREATE_SCHEMA creates a missing schema at startup"""
+        self.assertTrue(check_schema(auto_create=True))
+        self.assertEqual(get_schema_version(), SCHEMA_VERSION)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+"""
+Unit Tests for the Template Cache
+"""
+
+import os
+import tempfile
+import unittest
+from app import create_app
+from config import TestingConfig
+from template_cache import template_names, precompile_templates
+
+
+class TestTemplateCache(unittest.TestCase):
+    """Test bytecode precompilation and startup warm-up"""
+    
+    def setUp(self):
+        """Set up test fixtures"""
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self.directory.name, 'jinja-cache')
+    
+    def tearDown(self):
+        """Clean up after tests"""
+        self.directory.cleanup()
+    
+    def create_app(self, **settings):
+        return create_app(type('TemplateConfig', (TestingConfig,), settings))
+    
+    def test_precompile_writes_every_template(self):
+        """Test every template compiles and lands in the cache directory"""
+        app = self.create_app()
+        
+        result = precompile_templates(app, self.cache_dir)
+        
+        names = template_names(app)
+        self.assertIn('base.html', names)
+        self.assertIn('admin/dashboard.html', names)
+        self.assertEqual(result['errors'], {})
+        self.assertEqual(result['templates'], len(names))
+        self.assertEqual(len(os.listdir(self.cache_dir)), len(names))
+    
+    def test_precompile_cli(self):
+        """Test the CLI compiles into TEMPLATE_CACHE_DIR, even after a warm-up"""
+        app = self.create_app(TEMPLATE_CACHE_DIR=self.cache_dir, TEMPLATE_WARMUP=True)
+        other = os.path.join(self.directory.name, 'other')
+        
+        result = app.test_cli_runner().invoke(args=['precompile-templates', '--directory', other])
+        
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertEqual(len(os.listdir(other)), len(template_names(app)))
+    
+    def test_warmup_loads_templates_at_startup(self):
+        """Test TEMPLATE_WARMUP compiles every template while the app is created"""
+        app = self.create_app(TEMPLATE_CACHE_DIR=self.cache_dir, TEMPLATE_WARMUP=True)
+        
+        self.assertEqual(len(app.jinja_env.cache), len(template_names(app)))
+        self.assertEqual(len(os.listdir(self.cache_dir)), len(template_names(app)))
+    
+    def test_workers_reuse_precompiled_bytecode(self):
+        """Test a new app loads templates from the shared directory instead of compiling"""
+        precompile_templates(self.create_app(), self.cache_dir)
+        app = self.create_app(TEMPLATE_CACHE_DIR=self.cache_dir)
+        compiled = []
+        original = app.jinja_env.compile
+        app.jinja_env.compile = lambda *args, **kwargs: compiled.append(args) or original(*args, **kwargs)
+        
+        with app.app_context():
+            response = app.test_client().get('/admin/login')
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(compiled, [])
+    
+    def test_no_cache_by_default(self):
+        """Test templates compile in memory only unless configured"""
+        app = self.create_app()
+        
+        self.assertIsNone(app.jinja_env.bytecode_cache)
+        self.assertEqual(len(app.jinja_env.cache), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
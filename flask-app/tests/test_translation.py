@@ -4,7 +4,7 @@ Unit Tests for Translation Service
 
 import unittest
 from unittest.mock import Mock, patch, MagicMock
-from translation_service import TranslationService, translate_text, translate_blog_post
+from translation_service import TranslationService, translate_text, translate_blog_post, translate_blog_posts, _missing_translations
 
 
 class TestTranslationService(unittest.TestCase):
@@ -145,5 +145,68 @@ class TestTranslateBlogPost(unittest.TestCase):
         self.assertFalse(result)
 
 
+
+class TestTranslateBlogPosts(unittest.TestCase):
+    """Test batched blog post translation"""
+    
+    def _make_post(self, post_id, language):
+        post = Mock()
+        post.id = post_id
+        post.customer_language = language
+        other = 'pl' if language == 'en' else 'en'
+        for field in ('title', 'content', 'excerpt', 'category'):
+            setattr(post, f'{field}_{language}', f'{field} {post_id}')
+            setattr(post, f'{field}_{other}', '')
+        return post
+    
+    @patch('translation_service.get_translation_service')
+    def test_groups_fields_into_batches(self, mock_get_service):
+        """Test one batch call per direction and text type"""
+        mock_service = Mock()
+        mock_service.is_available.return_value = True
+        mock_service.translate_batch.side_effect = lambda texts, *args, **kwargs: [
+            f'T({text})' for text in texts
+        ]
+        mock_get_service.return_value = mock_service
+        
+        posts = [self._make_post(1, 'en'), self._make_post(2, 'en'), self._make_post(3, 'pl')]
+        
+        result = translate_blog_posts(posts)
+        
+        self.assertEqual(result, {1, 2, 3})
+        # EN->PL text, EN->PL html, PL->EN text, PL->EN html
+        self.assertEqual(mock_service.translate_batch.call_count, 4)
+        self.assertEqual(posts[0].title_pl, 'T(title 1)')
+        self.assertEqual(posts[1].content_pl, 'T(content 2)')
+        self.assertEqual(posts[2].category_en, 'T(category 3)')
+    
+    def test_placeholders_of_customer_submissions_are_missing(self):
+        """Test the placeholders customer_blog.py stores for either language need translating"""
+        english = self._make_post(1, 'en')
+        english.title_pl = 'Oczekuje na tłumaczenie'
+        english.content_pl = 'Treść oczekuje na tłumaczenie'
+        polish = self._make_post(2, 'pl')
+        polish.title_en = 'Pending Translation'
+        polish.content_en = 'Content pending translation'
+        
+        self.assertEqual([field for field, *_ in _missing_translations(english)][:2], ['title_pl', 'content_pl'])
+        self.assertEqual([field for field, *_ in _missing_translations(polish)][:2], ['title_en', 'content_en'])
+        english.title_pl, english.content_pl = 'Tytuł', 'Treść'
+        self.assertNotIn('title_pl', [field for field, *_ in _missing_translations(english)])
+    
+    @patch('translation_service.get_translation_service')
+    def test_failed_batch_leaves_fields_untouched(self, mock_get_service):
+        """Test fields are not overwritten when a batch call fails"""
+        mock_service = Mock()
+        mock_service.is_available.return_value = True
+        mock_service.translate_batch.side_effect = lambda texts, *args, **kwargs: texts
+        mock_get_service.return_value = mock_service
+        
+        post = self._make_post(1, 'en')
+        
+        self.assertEqual(translate_blog_posts([post]), set())
+        self.assertEqual(post.title_pl, '')
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -3,12 +3,31 @@ Translation Service
 Handles automated translation with caching using DeepL API
 """
 
-import deepl
 from functools import lru_cache
 from flask import current_app
-import logging
+from metrics import count_translation_call
+from models import needs_translation
+from logging_config import get_logger
 
-logger = logging.getLogger(__name__)
+logger = get_logger('translation')
+
+
+def _import_deepl():
+    """
+    Import the DeepL client on first use
+    
+    deepl pulls in requests and its dependencies, which the app does not
+    otherwise need at startup. Also reachable as translation_service.deepl.
+    """
+    global deepl
+    import deepl
+    return deepl
+
+
+def __getattr__(name):
+    if name == 'deepl':
+        return _import_deepl()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 class TranslationService:
@@ -27,7 +46,7 @@ class TranslationService:
         self.api_key = api_key or current_app.config.get('DEEPL_API_KEY')
         if self.api_key:
             try:
-                self.translator = deepl.Translator(self.api_key)
+                self.translator = _import_deepl().Translator(self.api_key)
                 logger.info("DeepL translator initialized successfully")
             except Exception as e:
                 self.translator = None
@@ -67,13 +86,16 @@ class TranslationService:
                 target_lang=target_lang.upper()
             )
             
+            count_translation_call('text', 'ok')
             logger.info(f"Translated ({source_lang} -> {target_lang}): {text[:50]}...")
             return result.text
-            
-        except deepl.DeepLException as e:
+        
+        except _import_deepl().DeepLException as e:
+            count_translation_call('text', 'error')
             logger.error(f"DeepL translation error: {e}")
             return text
         except Exception as e:
+            count_translation_call('text', 'error')
             logger.error(f"Unexpected translation error: {e}")
             return text
     
@@ -103,17 +125,20 @@ class TranslationService:
                 tag_handling='html'
             )
             
+            count_translation_call('html', 'ok')
             logger.info(f"Translated HTML ({source_lang} -> {target_lang})")
             return result.text
-            
-        except deepl.DeepLException as e:
+        
+        except _import_deepl().DeepLException as e:
+            count_translation_call('html', 'error')
             logger.error(f"DeepL HTML translation error: {e}")
             return html
         except Exception as e:
+            count_translation_call('html', 'error')
             logger.error(f"Unexpected HTML translation error: {e}")
             return html
     
-    def translate_batch(self, texts, source_lang='EN', target_lang='PL'):
+    def translate_batch(self, texts, source_lang='EN', target_lang='PL', tag_handling=None):
         """
         Translate multiple texts at once (more efficient)
         
@@ -121,6 +146,7 @@ class TranslationService:
             texts: List of texts to translate
             source_lang: Source language code
             target_lang: Target language code
+            tag_handling: Optional DeepL tag handling mode ('html', 'xml')
         
         Returns:
             List of translated texts
@@ -132,20 +158,25 @@ class TranslationService:
             if target_lang.upper() == 'EN':
                 target_lang = 'EN-US'
             
+            options = {'tag_handling': tag_handling} if tag_handling else {}
             results = self.translator.translate_text(
                 texts,
                 source_lang=source_lang.upper(),
-                target_lang=target_lang.upper()
+                target_lang=target_lang.upper(),
+                **options
             )
             
             translated = [result.text for result in results]
+            count_translation_call('batch', 'ok')
             logger.info(f"Batch translated {len(texts)} texts ({source_lang} -> {target_lang})")
             return translated
-            
-        except deepl.DeepLException as e:
+        
+        except _import_deepl().DeepLException as e:
+            count_translation_call('batch', 'error')
             logger.error(f"DeepL batch translation error: {e}")
             return texts
         except Exception as e:
+            count_translation_call('batch', 'error')
             logger.error(f"Unexpected batch translation error: {e}")
             return texts
     
@@ -172,8 +203,8 @@ class TranslationService:
             detected = result.detected_source_lang
             logger.info(f"Detected language: {detected}")
             return detected
-            
-        except deepl.DeepLException as e:
+        
+        except _import_deepl().DeepLException as e:
             logger.error(f"Language detection error: {e}")
             return None
         except Exception as e:
@@ -207,8 +238,8 @@ class TranslationService:
             
             logger.info(f"API Usage: {result['character_count']}/{result['character_limit']} ({result['percentage_used']}%)")
             return result
-            
-        except deepl.DeepLException as e:
+        
+        except _import_deepl().DeepLException as e:
             logger.error(f"Usage check error: {e}")
             return None
         except Exception as e:
@@ -228,6 +259,9 @@ class TranslationService:
 # Global instance
 _translation_service = None
 
+# Maximum number of texts DeepL accepts in a single request
+TRANSLATION_BATCH_SIZE = 50
+
 
 def get_translation_service():
     """
@@ -277,47 +311,112 @@ def translate_blog_post(post):
     translated = False
     
     try:
-        if post.customer_language == 'en':
-            # Customer submitted in English, translate to Polish
-            if not post.title_pl or post.title_pl == 'Pending Translation':
-                post.title_pl = service.translate(post.title_en, 'EN', 'PL')
-                translated = True
-            
-            if not post.content_pl or 'pending translation' in post.content_pl.lower():
-                post.content_pl = service.translate_html(post.content_en, 'EN', 'PL')
-                translated = True
-            
-            if post.excerpt_en and (not post.excerpt_pl or 'pending' in post.excerpt_pl.lower()):
-                post.excerpt_pl = service.translate(post.excerpt_en, 'EN', 'PL')
-                translated = True
-            
-            if post.category_en and not post.category_pl:
-                post.category_pl = service.translate(post.category_en, 'EN', 'PL')
-                translated = True
-        
-        elif post.customer_language == 'pl':
-            # Customer submitted in Polish, translate to English
-            if not post.title_en or post.title_en == 'Pending Translation':
-                post.title_en = service.translate(post.title_pl, 'PL', 'EN')
-                translated = True
-            
-            if not post.content_en or 'pending translation' in post.content_en.lower():
-                post.content_en = service.translate_html(post.content_pl, 'PL', 'EN')
-                translated = True
-            
-            if post.excerpt_pl and (not post.excerpt_en or 'pending' in post.excerpt_en.lower()):
-                post.excerpt_en = service.translate(post.excerpt_pl, 'PL', 'EN')
-                translated = True
-            
-            if post.category_pl and not post.category_en:
-                post.category_en = service.translate(post.category_pl, 'PL', 'EN')
-                translated = True
+        for field, text, is_html, source_lang, target_lang in _missing_translations(post):
+            translate = service.translate_html if is_html else service.translate
+            setattr(post, field, translate(text, source_lang, target_lang))
+            translated = True
         
         if translated:
             logger.info(f"Successfully translated blog post: {post.id}")
         
         return translated
-        
+    
     except Exception as e:
         logger.error(f"Error translating blog post {post.id}: {e}")
-        return False
\ No newline at end of file
+        return False
+
+
+def _missing_translations(post):
+    """
+    List the fields of a customer post that still need translating
+    
+    Titles and content count as missing when empty or still holding a
+    TRANSLATION_PLACEHOLDERS value.
+    
+    Returns:
+        List of (target_field, source_text, is_html, source_lang, target_lang)
+    """
+    if post.customer_language == 'en':
+        src, tgt = 'en', 'pl'
+    elif post.customer_language == 'pl':
+        src, tgt = 'pl', 'en'
+    else:
+        return []
+    
+    def get(field, lang):
+        return getattr(post, f'{field}_{lang}')
+    
+    src_code, tgt_code = src.upper(), tgt.upper()
+    missing = []
+    
+    if needs_translation('title', get('title', tgt)):
+        missing.append((f'title_{tgt}', get('title', src), False, src_code, tgt_code))
+    
+    if needs_translation('content', get('content', tgt)):
+        missing.append((f'content_{tgt}', get('content', src), True, src_code, tgt_code))
+    
+    excerpt = get('excerpt', tgt)
+    if get('excerpt', src) and (not excerpt or 'pending' in excerpt.lower()):
+        missing.append((f'excerpt_{tgt}', get('excerpt', src), False, src_code, tgt_code))
+    
+    if get('category', src) and not get('category', tgt):
+        missing.append((f'category_{tgt}', get('category', src), False, src_code, tgt_code))
+    
+    return missing
+
+
+def translate_blog_posts(posts):
+    """
+    Auto-translate many blog posts with batched API calls
+    
+    Missing fields of all posts are grouped by language direction and
+    by plain text vs. HTML, then sent through translate_batch in chunks
+    of TRANSLATION_BATCH_SIZE instead of one request per field per post.
+    Posts are modified in place; nothing is committed.
+    
+    Args:
+        posts: Iterable of BlogPost model instances
+    
+    Returns:
+        Set of ids of the posts that received translations
+    """
+    service = get_translation_service()
+    
+    if not service.is_available():
+        logger.warning("Translation service not available")
+        return set()
+    
+    # (source_lang, target_lang, is_html) -> [(post, field, text), ...]
+    groups = {}
+    for post in posts:
+        for field, text, is_html, source_lang, target_lang in _missing_translations(post):
+            groups.setdefault((source_lang, target_lang, is_html), []).append((post, field, text))
+    
+    translated_ids = set()
+    for (source_lang, target_lang, is_html), items in groups.items():
+        for start in range(0, len(items), TRANSLATION_BATCH_SIZE):
+            chunk = items[start:start + TRANSLATION_BATCH_SIZE]
+            texts = [text for _, _, text in chunk]
+            results = service.translate_batch(
+                texts,
+                source_lang,
+                target_lang,
+                tag_handling='html' if is_html else None
+            )
+            
+            # translate_batch hands back the input list when the call fails
+            if results is texts:
+                logger.warning(
+                    f"Batch translation failed for {len(chunk)} fields "
+                    f"({source_lang} -> {target_lang})"
+                )
+                continue
+            
+            for (post, field, _), result in zip(chunk, results):
+                setattr(post, field, result)
+                translated_ids.add(post.id)
+    
+    if translated_ids:
+        logger.info(f"Batch translated {len(translated_ids)} blog posts")
+    
+    return translated_ids
@@ -4,12 +4,16 @@ Adds new fields to existing models for customer blog submissions and admin repli
 """
 
 from app import create_app
-from models import db
+from models import db, Comment, SCHEMA_VERSION, create_schema
+from content import render_pending
 from sqlalchemy import text
 
 app = create_app()
 
 with app.app_context():
+    # Tables that do not exist yet are created with their current columns
+    db.create_all()
+    
     # Add new columns to blog_posts table
     try:
         with db.engine.connect() as conn:
@@ -55,7 +59,74 @@ with app.app_context():
     except Exception as e:
         print(f"Error updating contact_inquiries: {e}")
     
+    # Soft-delete tombstone column for blog posts
+    try:
+        with db.engine.connect() as conn:
+            result = conn.execute(text("PRAGMA table_info(blog_posts)"))
+            columns = [row[1] for row in result]
+            
+            if 'deleted_at' not in columns:
+                conn.execute(text("ALTER TABLE blog_posts ADD COLUMN deleted_at DATETIME"))
+                conn.execute(text("CREATE INDEX IF NOT EXISTS ix_blog_posts_deleted_at ON blog_posts (deleted_at)"))
+                print("✓ Added deleted_at column")
+            
+            conn.commit()
+    except Exception as e:
+        print(f"Error updating blog_posts: {e}")
+    
+    # Rendered content columns for blog posts, filled in below
+    try:
+        with db.engine.connect() as conn:
+            result = conn.execute(text("PRAGMA table_info(blog_posts)"))
+            columns = [row[1] for row in result]
+            
+            for language in ('en', 'pl'):
+                if f'content_html_{language}' not in columns:
+                    conn.execute(text(f"ALTER TABLE blog_posts ADD COLUMN content_html_{language} TEXT"))
+                    conn.execute(text(f"ALTER TABLE blog_posts ADD COLUMN word_count_{language} INTEGER"))
+                    conn.execute(text(f"ALTER TABLE blog_posts ADD COLUMN reading_time_{language} INTEGER"))
+                    print(f"✓ Added rendered content columns ({language})")
+            
+            conn.commit()
+    except Exception as e:
+        print(f"Error updating blog_posts: {e}")
+    
+    # Rebuild comments table so post deletes cascade in the database
+    # (SQLite cannot alter an existing foreign key)
+    try:
+        with db.engine.connect() as conn:
+            result = conn.execute(text("PRAGMA foreign_key_list(comments)"))
+            on_delete = [row[6] for row in result if row[2] == 'blog_posts']
+            
+            if on_delete and on_delete[0].upper() != 'CASCADE':
+                result = conn.execute(text("PRAGMA table_info(comments)"))
+                columns = ', '.join(row[1] for row in result)
+                
+                conn.execute(text("ALTER TABLE comments RENAME TO comments_old"))
+                Comment.__table__.create(conn)
+                conn.execute(text(f"INSERT INTO comments ({columns}) SELECT {columns} FROM comments_old"))
+                conn.execute(text("DROP TABLE comments_old"))
+                print("✓ Rebuilt comments table with ON DELETE CASCADE")
+            
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_comments_post_id ON comments (post_id)"))
+            conn.commit()
+    except Exception as e:
+        print(f"Error updating comments: {e}")
+    
+    # Sanitize and measure the content of existing posts
+    try:
+        print(f"✓ Rendered the content of {render_pending()} post(s)")
+    except Exception as e:
+        print(f"Error rendering post content: {e}")
+    
+    # Create any missing tables and record the schema version checked at startup
+    create_schema()
+    print(f"✓ Stamped schema version {SCHEMA_VERSION}")
+    
     print("\n✅ Database migration completed successfully!")
     print("\nYou can now:")
     print("1. Accept customer blog submissions in single language")
-    print("2. Reply to customer inquiries from admin panel")
\ No newline at end of file
+    print("2. Reply to customer inquiries from admin panel")
+    print("3. Delete posts without loading their comments (soft delete + purge)")
+    print("4. Upload featured images (resized copies: pip install Pillow, then flask process-images)")
+    print("5. Show posts as sanitized HTML with their reading time")
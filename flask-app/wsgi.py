@@ -0,0 +1,15 @@
+"""
+WSGI Entry Point
+Serve with: gunicorn wsgi:app
+
+The application is created once per process when this module is imported.
+FLASK_CONFIG selects a configuration by name ('production', 'development',
+...); without it the base Config is used. Create the schema beforehand
+with 'flask --app app init-db'.
+"""
+
+import os
+from app import create_app
+from config import Config
+
+app = create_app(os.environ.get('FLASK_CONFIG') or Config)